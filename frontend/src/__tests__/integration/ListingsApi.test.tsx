@@ -1,4 +1,4 @@
-import { listingsApi } from '../../services/api';
+import { listingsApi, userApi } from '../../services/api';
 import axios from 'axios';
 
 jest.mock('axios');
@@ -152,8 +152,9 @@ describe('Listings Management - Integration Tests', () => {
     );
   });
 
-  it('should retrieve wishlist items successfully', async () => {
+  it('should retrieve wishlist items with one batch request', async () => {
     const token = 'testToken';
+    sessionStorage.clear(); // getWishlistItems caches its result for a few seconds
 
     // Mock the response for the wishlist API call
     (axios.get as jest.Mock).mockResolvedValueOnce({
@@ -162,27 +163,65 @@ describe('Listings Management - Integration Tests', () => {
       },
     });
 
-    // Mock the response for the getListingById call
-    (axios.get as jest.Mock).mockResolvedValueOnce({
-      data: { listing: mockListings[0] },
+    // Mock the response for the batch listings call
+    (axios.post as jest.Mock).mockResolvedValueOnce({
+      data: { listings: [mockListings[0]], missing: [] },
     });
 
     const wishlistItems = await listingsApi.getWishlistItems(token);
     expect(wishlistItems).toEqual([mockListings[0]]);
 
     // Check that axios.get was called correctly for the wishlist
-    expect(axios.get).toHaveBeenNthCalledWith(
-      1,
+    expect(axios.get).toHaveBeenCalledTimes(1);
+    expect(axios.get).toHaveBeenCalledWith(
       `${USER_SERVICE_URL}/api/users/wishlist/get`,
       {
         headers: { Authorization: `Bearer ${token}` },
       }
     );
 
-    // Check that axios.get was called correctly for getListingById
-    expect(axios.get).toHaveBeenNthCalledWith(
-      2,
-      `${LISTINGS_SERVICE_URL}/api/listings/1`
+    // Check that every listing was fetched in a single batch call
+    expect(axios.post).toHaveBeenCalledTimes(1);
+    expect(axios.post).toHaveBeenCalledWith(
+      `${LISTINGS_SERVICE_URL}/api/listings/batch`,
+      { ids: ['1'] }
+    );
+  });
+
+  it('should leave out wishlist listings that no longer exist', async () => {
+    const token = 'testToken';
+    sessionStorage.clear();
+
+    (axios.get as jest.Mock).mockResolvedValueOnce({
+      data: { wishlist: ['1', 'deleted'] },
+    });
+    (axios.post as jest.Mock).mockResolvedValueOnce({
+      data: { listings: [mockListings[0]], missing: ['deleted'] },
+    });
+
+    const wishlistItems = await listingsApi.getWishlistItems(token);
+    expect(wishlistItems).toEqual([mockListings[0]]);
+    expect(axios.post).toHaveBeenCalledWith(
+      `${LISTINGS_SERVICE_URL}/api/listings/batch`,
+      { ids: ['1', 'deleted'] }
+    );
+  });
+
+  it('should check a page of listings against the wishlist in one request', async () => {
+    const token = 'testToken';
+
+    (axios.post as jest.Mock).mockResolvedValueOnce({
+      data: { in_wishlist: { '1': true, '2': false } },
+    });
+
+    const statuses = await userApi.checkWishlistBulk(token, ['1', '2']);
+    expect(statuses).toEqual({ '1': true, '2': false });
+
+    expect(axios.post).toHaveBeenCalledTimes(1);
+    expect(axios.post).toHaveBeenCalledWith(
+      `${USER_SERVICE_URL}/api/users/wishlist/check_bulk`,
+      { listingIds: ['1', '2'] },
+      { headers: { Authorization: `Bearer ${token}` } }
     );
   });
 });
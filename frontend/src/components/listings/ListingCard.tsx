@@ -16,6 +16,7 @@ import {
 import { FaHeart, FaRegHeart } from "react-icons/fa";
 import { useNavigate } from "react-router-dom";
 import { Listing } from "../../types/listing";
+import { SellerRating } from "../../services/types";
 import { listingsApi } from "../../services/api";
 import { useAuth } from "../../context/AuthContext";
 import { useWishlist } from "../../context/WishlistContext";
@@ -24,11 +25,13 @@ import { useWishlist } from "../../context/WishlistContext";
 interface ListingCardProps {
   listing: Listing;
   context?: "home" | "recommended" | "wishlist";
+  sellerRating?: SellerRating; // Shown when the seller has been rated
 }
 
 const ListingCard: React.FC<ListingCardProps> = ({
   listing,
   context = "home",
+  sellerRating,
 }) => {
   const [showLoginDialog, setShowLoginDialog] = useState(false);
   const [isUpdating, setIsUpdating] = useState(false);
@@ -93,6 +96,9 @@ const ListingCard: React.FC<ListingCardProps> = ({
   };
 
   const getImageUrl = (listing: Listing): string => {
+    // Prefer the small thumbnail so the grid doesn't download full-size photos
+    if (listing.thumbnailUrl) return listing.thumbnailUrl;
+
     // If there's a direct imageUrl, use it
     if (listing.imageUrl) return listing.imageUrl;
 
@@ -165,6 +171,12 @@ const ListingCard: React.FC<ListingCardProps> = ({
           <Typography variant="body2" color="text.secondary" noWrap>
             {listing.description}
           </Typography>
+
+          {sellerRating && sellerRating.count > 0 && (
+            <Typography variant="body2" color="text.secondary">
+              ★ {sellerRating.score.toFixed(1)} ({sellerRating.count})
+            </Typography>
+          )}
         </CardContent>
 
         {/* Additional Info */}
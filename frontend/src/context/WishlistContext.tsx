@@ -1,12 +1,13 @@
 import React, { createContext, useContext, useState, useCallback, useEffect } from 'react';
 import { Listing } from '../types/listing';
-import { listingsApi } from '../services/api';
+import { listingsApi, userApi } from '../services/api';
 import { useAuth } from './AuthContext';
 
 interface WishlistContextType {
   wishlistItems: Listing[];          // Array of listings in the wishlist
   isWishlistLoading: boolean;        // Loading state for wishlist operations
   isItemWishlisted: (listingId: string) => boolean;  // Check if an item is in wishlist
+  checkWishlisted: (listingIds: string[]) => Promise<void>; // Refresh the wishlist state of a page of listings in one request
   addToWishlist: (listing: Listing) => Promise<void>; // Add item to wishlist
   removeFromWishlist: (listingId: string) => Promise<void>; // Remove item from wishlist
   refreshWishlist: () => Promise<void>; // Force refresh the wishlist data
@@ -20,6 +21,7 @@ const WishlistContext = createContext<WishlistContextType | undefined>(undefined
 export const WishlistProvider: React.FC<{ children: React.ReactNode }> = ({ children }) => {
   // Local state management
   const [wishlistItems, setWishlistItems] = useState<Listing[]>([]);
+  const [wishlistedIds, setWishlistedIds] = useState<Set<string>>(new Set());
   const [isWishlistLoading, setIsWishlistLoading] = useState(false);
   
   // Get authentication utilities from AuthContext
@@ -30,6 +32,7 @@ export const WishlistProvider: React.FC<{ children: React.ReactNode }> = ({ chil
     // Don't fetch if user is not authenticated
     if (!isAuthenticated) {
       setWishlistItems([]);
+      setWishlistedIds(new Set());
       return;
     }
 
@@ -38,8 +41,9 @@ export const WishlistProvider: React.FC<{ children: React.ReactNode }> = ({ chil
 
     try {
       setIsWishlistLoading(true);
-      const items = await listingsApi.getWishlistItems(token);
+      const items: Listing[] = await listingsApi.getWishlistItems(token);
       setWishlistItems(items);
+      setWishlistedIds(new Set(items.map(item => item.id)));
     } catch (error) {
       console.error('Error fetching wishlist:', error);
     } finally {
@@ -49,8 +53,28 @@ export const WishlistProvider: React.FC<{ children: React.ReactNode }> = ({ chil
 
 // Checks if a specific item is in the wishlist. Memorized to prevent unnecessary recreations on each render
   const isItemWishlisted = useCallback((listingId: string) => {
-    return wishlistItems.some(item => item.id === listingId);
-  }, [wishlistItems]);
+    return wishlistedIds.has(listingId);
+  }, [wishlistedIds]);
+
+// Checks a whole page of listings against the server-side wishlist with a single request
+  const checkWishlisted = useCallback(async (listingIds: string[]) => {
+    const token = getToken();
+    if (!isAuthenticated || !token || listingIds.length === 0) return;
+
+    try {
+      const statuses = await userApi.checkWishlistBulk(token, listingIds);
+      setWishlistedIds(prev => {
+        const next = new Set(prev);
+        Object.entries(statuses).forEach(([listingId, wishlisted]) => {
+          if (wishlisted) next.add(listingId);
+          else next.delete(listingId);
+        });
+        return next;
+      });
+    } catch (error) {
+      console.error('Error checking wishlist:', error);
+    }
+  }, [isAuthenticated, getToken]);
 
 //Adds an item to the wishlist. Updates both server and local state
   const addToWishlist = useCallback(async (listing: Listing) => {
@@ -62,6 +86,7 @@ export const WishlistProvider: React.FC<{ children: React.ReactNode }> = ({ chil
       await listingsApi.addToWishlist(listing.id, token);
       // Optimistically update local state
       setWishlistItems(prev => [...prev, listing]);
+      setWishlistedIds(prev => new Set(prev).add(listing.id));
     } catch (error) {
       console.error('Error adding to wishlist:', error);
     }
@@ -78,6 +103,11 @@ export const WishlistProvider: React.FC<{ children: React.ReactNode }> = ({ chil
       await listingsApi.removeFromWishlist(listingId, token);
       // Optimistically update local state
       setWishlistItems(prev => prev.filter(item => item.id !== listingId));
+      setWishlistedIds(prev => {
+        const next = new Set(prev);
+        next.delete(listingId);
+        return next;
+      });
     } catch (error) {
       console.error('Error removing from wishlist:', error);
     }
@@ -94,6 +124,7 @@ export const WishlistProvider: React.FC<{ children: React.ReactNode }> = ({ chil
       wishlistItems,
       isWishlistLoading,
       isItemWishlisted,
+      checkWishlisted,
       addToWishlist,
       removeFromWishlist,
       refreshWishlist
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { 
   Container, 
   Grid,
@@ -19,104 +19,118 @@ import SearchBar from '../components/search/SearchBar';
 import ListingCard from '../components/listings/ListingCard';
 import { Listing } from '../types/listing';
 import { CATEGORIES } from '../mock/listings';
-import { listingsApi } from '../services/api';
+import { listingsApi, ratingsApi } from '../services/api';
+import { SellerRating } from '../services/types';
+import { useWishlist } from '../context/WishlistContext';
 import { LISTINGS_PER_PAGE } from '../constants/pagination';
 
 const Home: React.FC = () => {
   // State management
   const [listings, setListings] = useState<Listing[]>([]);
-  const [filteredListings, setFilteredListings] = useState<Listing[]>([]);
+  const [sellerRatings, setSellerRatings] = useState<Record<string, SellerRating>>({});
+  const [totalPages, setTotalPages] = useState<number | null>(null); // only known for text searches
+  const [hasNextPage, setHasNextPage] = useState(false);
   const [isLoading, setIsLoading] = useState(true);
+  const [hasLoaded, setHasLoaded] = useState(false);
   const [error, setError] = useState<string | null>(null);
   const [searchQuery, setSearchQuery] = useState('');
   const [priceRange, setPriceRange] = useState<[number, number]>([0, 1000]);
+  const [committedPriceRange, setCommittedPriceRange] = useState<[number, number]>([0, 1000]);
   const [location, setLocation] = useState('');
-  const [sortBy, setSortBy] = useState('datePosted');
+  const [sortBy, setSortBy] = useState<'datePosted' | 'price'>('datePosted');
   const [category, setCategory] = useState('');
   const [currentPage, setCurrentPage] = useState(1);
+  const { checkWishlisted } = useWishlist();
+  // pageCursors[i] is the listings service cursor that loads page i + 1
+  const pageCursors = useRef<(string | null)[]>([null]);
 
-  // Fetch listings when component mounts
+  // Fetch the current page of listings: text searches go to the search service, filter-only
+  // browsing to the listings service's indexes, paged with the cursor each page returns
   useEffect(() => {
     const fetchListings = async () => {
       try {
         setIsLoading(true);
-        const data = await listingsApi.getListings();
-        console.log('Fetched listings:', data);
-        setListings(data);
-        setFilteredListings(data);
+        const query = searchQuery.trim();
+        const filters = {
+          category: category || undefined,
+          location: location || undefined,
+          // a slider end left at its limit means "any price", which also keeps listings without one
+          minPrice: committedPriceRange[0] > 0 ? committedPriceRange[0] : undefined,
+          maxPrice: committedPriceRange[1] < 1000 ? committedPriceRange[1] : undefined,
+          sortBy,
+          limit: LISTINGS_PER_PAGE,
+        };
+        if (query) {
+          const data = await listingsApi.searchListings(query, { ...filters, page: currentPage });
+          setListings(data.listings);
+          setTotalPages(data.totalPages);
+          setHasNextPage(currentPage < data.totalPages);
+        } else {
+          const data = await listingsApi.searchListingsPage({
+            ...filters,
+            cursor: pageCursors.current[currentPage - 1] ?? undefined,
+          });
+          pageCursors.current = [...pageCursors.current.slice(0, currentPage), data.nextCursor];
+          setListings(data.listings);
+          setTotalPages(null);
+          setHasNextPage(data.nextCursor !== null);
+        }
+        setError(null);
       } catch (err) {
         console.error('Error fetching listings:', err);
         setError('Failed to fetch listings. Please try again later.');
       } finally {
         setIsLoading(false);
+        setHasLoaded(true);
       }
     };
 
     fetchListings();
-  }, []);
+  }, [searchQuery, committedPriceRange, location, category, sortBy, currentPage]);
 
+  // One request for the ratings of every seller on the page; cards just omit them if it fails
+  useEffect(() => {
+    if (listings.length === 0) return;
+    ratingsApi.getSellerRatings(listings.map((listing) => listing.sellerId))
+      .then(setSellerRatings)
+      .catch((err) => console.error('Error fetching seller ratings:', err));
+  }, [listings]);
+
+  // One request for the wishlist state of every card on the page
+  useEffect(() => {
+    checkWishlisted(listings.map((listing) => listing.id));
+  }, [listings, checkWishlisted]);
+
+  // Any filter change starts again from the first page
   const handleSearch = (query: string) => {
     setSearchQuery(query);
+    setCurrentPage(1);
   };
 
   const handlePriceRangeChange = (event: Event, newValue: number | number[]) => {
     setPriceRange(newValue as [number, number]);
   };
 
+  const handlePriceRangeCommitted = (event: React.SyntheticEvent | Event, newValue: number | number[]) => {
+    setCommittedPriceRange(newValue as [number, number]);
+    setCurrentPage(1);
+  };
+
   const handleLocationChange = (event: any) => {
     setLocation(event.target.value);
+    setCurrentPage(1);
   };
 
   const handleSortChange = (event: any) => {
     setSortBy(event.target.value);
+    setCurrentPage(1);
   };
 
   const handleCategoryChange = (event: any) => {
     setCategory(event.target.value);
+    setCurrentPage(1);
   };
 
-  // Filter effect remains the same but uses real listings instead of mock data
-  useEffect(() => {
-    let filtered = [...listings];
-
-    if (searchQuery.trim()) {
-      filtered = filtered.filter(listing =>
-        (listing.title?.toLowerCase() || '').includes(searchQuery.toLowerCase()) ||
-        (listing.description?.toLowerCase() || '').includes(searchQuery.toLowerCase())
-      );
-    }
-
-    if (priceRange) {
-      filtered = filtered.filter(
-        listing => (listing.price || 0) >= priceRange[0] && (listing.price || 0) <= priceRange[1]
-      );
-    }
-
-    if (location) {
-      filtered = filtered.filter(listing => listing.location === location);
-    }
-
-    if (category) {
-      filtered = filtered.filter(listing => listing.category === category);
-    }
-
-    filtered.sort((a, b) => {
-      if (sortBy === 'datePosted') {
-        return new Date(b.datePosted || 0).getTime() - new Date(a.datePosted || 0).getTime();
-      }
-      return sortBy === 'price' ? (a.price || 0) - (b.price || 0) : 0;
-    });
-
-    setFilteredListings(filtered);
-  }, [searchQuery, priceRange, location, category, sortBy, listings]);
-
-  // Calculate pagination
-  const totalPages = Math.ceil(filteredListings.length / LISTINGS_PER_PAGE);
-  const paginatedListings = filteredListings.slice(
-    (currentPage - 1) * LISTINGS_PER_PAGE,
-    currentPage * LISTINGS_PER_PAGE
-  );
-
   const handleNextPage = () => {
     setCurrentPage(prev => prev + 1);
   };
@@ -125,7 +139,7 @@ const Home: React.FC = () => {
     setCurrentPage(prev => Math.max(1, prev - 1));
   };
 
-  if (isLoading) {
+  if (isLoading && !hasLoaded) {
     return (
       <>
         <Container sx={{ mt: 4, display: 'flex', justifyContent: 'center' }}>
@@ -174,6 +188,7 @@ const Home: React.FC = () => {
               <Slider
                 value={priceRange}
                 onChange={handlePriceRangeChange}
+                onChangeCommitted={handlePriceRangeCommitted}
                 valueLabelDisplay="auto"
                 min={0}
                 max={1000}
@@ -207,15 +222,15 @@ const Home: React.FC = () => {
 
         {/* Listings Grid */}
         <Grid container spacing={3}>
-          {paginatedListings.map((listing) => (
+          {listings.map((listing) => (
             <Grid item xs={12} sm={6} md={4} key={listing.id}>
-              <ListingCard listing={listing} context="home" />
+              <ListingCard listing={listing} context="home" sellerRating={sellerRatings[listing.sellerId]} />
             </Grid>
           ))}
         </Grid>
 
         {/* Pagination Controls */}
-        {filteredListings.length > 0 && (
+        {(listings.length > 0 || hasNextPage) && (
           <Stack 
             direction="row" 
             spacing={2} 
@@ -231,11 +246,11 @@ const Home: React.FC = () => {
                 Previous
               </Button>
               <Button disabled>
-                Page {currentPage} of {totalPages}
+                Page {currentPage}{totalPages !== null ? ` of ${totalPages}` : ''}
               </Button>
               <Button 
                 onClick={handleNextPage}
-                disabled={currentPage >= totalPages}
+                disabled={!hasNextPage}
               >
                 Next
               </Button>
@@ -244,7 +259,7 @@ const Home: React.FC = () => {
         )}
 
         {/* No Results Message */}
-        {filteredListings.length === 0 && (
+        {listings.length === 0 && !hasNextPage && !isLoading && (
           <Paper sx={{ p: 2, mt: 2, textAlign: 'center' }}>
             <Typography variant="h6" color="text.secondary">
               No listings found matching your criteria
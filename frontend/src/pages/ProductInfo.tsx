@@ -2,7 +2,8 @@ import React, { useState, useEffect } from 'react';
 import { Box, Grid, Typography, Link, Paper, TextField, MenuItem, Select, FormControl, Button, InputLabel, CircularProgress, Container, Alert } from '@mui/material';
 import { useParams, Navigate, useNavigate, Link as RouterLink } from 'react-router-dom';
 import { Listing } from '../types/listing';
-import { listingsApi, authApi } from '../services/api';
+import { listingsApi, authApi, ratingsApi } from '../services/api';
+import { SellerRating } from '../services/types';
 import CloudUploadIcon from '@mui/icons-material/CloudUpload';
 
 
@@ -17,6 +18,7 @@ const ProductInfo: React.FC = () => {
   const [previewUrl, setPreviewUrl] = useState<string | null>(null);
   const navigate = useNavigate();
   const [user, setUser] = useState<string | null>(null);
+  const [sellerRating, setSellerRating] = useState<SellerRating | null>(null);
 
   useEffect(() => {
     const fetchUser = async () => {
@@ -51,6 +53,14 @@ const ProductInfo: React.FC = () => {
     fetchListing();
   }, [id]);
 
+  useEffect(() => {
+    if (!listing?.sellerId) return;
+    // reputation is optional on this page, so a failed lookup just hides it
+    ratingsApi.getSellerRating(listing.sellerId)
+      .then(setSellerRating)
+      .catch(() => setSellerRating(null));
+  }, [listing?.sellerId]);
+
  
   if (isLoading) {
     return (
@@ -75,7 +85,10 @@ const ProductInfo: React.FC = () => {
   }
 
   const getImageUrl = () => {
-    if (listing.images && listing.images.length > 0) return listing.images[0];
+    if (listing.images && listing.images.length > 0) {
+      // the medium WebP derivative is plenty for the detail view
+      return listing.imageDerivatives?.[listing.images[0]]?.medium || listing.images[0];
+    }
     if (listing.imageUrl) return listing.imageUrl;
     return '/placeholder-image.jpg';
   };
@@ -213,6 +226,9 @@ const ProductInfo: React.FC = () => {
                 <Box sx={{ marginBottom: 1 }}>
                   <Typography variant="h6">
                     <strong>Seller:</strong> <RouterLink to={`/user-view/${listing.sellerName}`}>{listing.sellerName}</RouterLink>  
+                    {sellerRating && sellerRating.count > 0 && (
+                      <> ★ {sellerRating.score.toFixed(1)} ({sellerRating.count})</>
+                    )}
                   </Typography>
                 </Box>
                 
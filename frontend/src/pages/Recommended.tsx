@@ -14,17 +14,18 @@ import {
 } from '@mui/material';
 import ListingCard from '../components/listings/ListingCard';
 import { Listing } from '../types/listing';
-import { listingsApi, userApi } from '../services/api';
+import { recommendationsApi, userApi } from '../services/api';
 import { useAuth } from '../context/AuthContext';
 
 const LISTINGS_PER_PAGE = 9; // 3x3 grid 
+const RECOMMENDATIONS_LIMIT = 20;
 
 const Recommended: React.FC = () => {
   const [listings, setListings] = useState<Listing[]>([]);
   const [filteredListings, setFilteredListings] = useState<Listing[]>([]);
   const [isLoading, setIsLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
-  const [sortBy, setSortBy] = useState('datePosted');
+  const [sortBy, setSortBy] = useState('recommended');
   const [currentPage, setCurrentPage] = useState(1);
   const [userCategories, setUserCategories] = useState<string[]>([]);
   
@@ -40,19 +41,13 @@ const Recommended: React.FC = () => {
           throw new Error('Not authenticated');
         }
 
-        // Fetch user info to get categories
-        const userInfo = await userApi.getUserProfile(token);
+        // Fetch user info (for the interests line) and the ranked recommendations together
+        const [userInfo, recommendedListings] = await Promise.all([
+          userApi.getUserProfile(token),
+          recommendationsApi.getRecommendations(token, RECOMMENDATIONS_LIMIT),
+        ]);
         setUserCategories(userInfo.categories || []);
-
-        // Fetch all listings
-        const allListings = await listingsApi.getListings();
-        setListings(allListings);
-
-        // Filter listings based on user categories
-        const recommendedListings = allListings.filter(listing => 
-          userInfo.categories.includes(listing.category)
-        );
-
+        setListings(recommendedListings);
         setFilteredListings(recommendedListings);
       } catch (err) {
         console.error('Error fetching recommended listings:', err);
@@ -67,7 +62,8 @@ const Recommended: React.FC = () => {
 
   // Sort listings whenever sortBy changes
   useEffect(() => {
-    const sortedListings = [...filteredListings].sort((a, b) => {
+    // 'recommended' keeps the service's ranking
+    const sortedListings = [...listings].sort((a, b) => {
       if (sortBy === 'datePosted') {
         return new Date(b.datePosted).getTime() - new Date(a.datePosted).getTime();
       }
@@ -81,7 +77,7 @@ const Recommended: React.FC = () => {
     });
 
     setFilteredListings(sortedListings);
-  }, [sortBy]);
+  }, [sortBy, listings]);
 
   // Calculate pagination
   const totalPages = Math.ceil(filteredListings.length / LISTINGS_PER_PAGE);
@@ -133,6 +129,7 @@ const Recommended: React.FC = () => {
               label="Sort By"
               onChange={(e) => setSortBy(e.target.value)}
             >
+              <MenuItem value="recommended">Best Match</MenuItem>
               <MenuItem value="datePosted">Most Recent</MenuItem>
               <MenuItem value="priceLowToHigh">Price: Low to High</MenuItem>
               <MenuItem value="priceHighToLow">Price: High to Low</MenuItem>
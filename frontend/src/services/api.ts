@@ -8,7 +8,12 @@ import {
   LoginRequest,
   LoginResponse,
   ErrorResponse,
-  LogoutResponse
+  LogoutResponse,
+  ListingSearchParams,
+  ListingSearchResponse,
+  ListingFilterParams,
+  ListingFilterResponse,
+  SellerRating
 } from './types';
 import ForgotPassword from '../pages/auth/forgotPassword';
 import ResetPassword from '../pages/auth/reset_password';
@@ -26,6 +31,12 @@ const SEARCH_SERVICE_URL = process.env.REACT_APP_SEARCH_SERVICE_URL || 'http://l
 // Base URL for the user service
 const USER_SERVICE_URL =   process.env.REACT_APP_USER_SERVICE_URL || 'http://localhost:5005';
 
+// Base URL for the recommendations service
+const RECOMMENDATIONS_SERVICE_URL = process.env.REACT_APP_RECOMMENDATIONS_SERVICE_URL || 'http://localhost:5004';
+
+// Base URL for the ratings service
+const RATINGS_SERVICE_URL = process.env.REACT_APP_RATINGS_SERVICE_URL || 'http://localhost:5002';
+
 
 export const listingsApi = {
   // Function to fetch all listings from the listings service
@@ -34,10 +45,31 @@ export const listingsApi = {
     return response.data.listings; // Returns an array of Listing objects
   },
 
-  // Function to search listings based on a query string
-  searchListings: async (query: string) => {
-    const response = await axios.get<Listing[]>(`${SEARCH_SERVICE_URL}/search?q=${query}`);
-    return response.data; // Returns an array of Listing objects matching the search query
+  // Function to fetch a single page of listings; pass the returned nextCursor to get the following page
+  getListingsPage: async (limit: number, cursor?: string | null) => {
+    const response = await axios.get<{ listings: Listing[]; nextCursor: string | null }>(
+      `${LISTINGS_SERVICE_URL}/api/listings/all`,
+      { params: { limit, ...(cursor ? { cursor } : {}) } }
+    );
+    return response.data; // { listings, nextCursor }
+  },
+
+  // Function to fetch one page of listings filtered and sorted by the listings service;
+  // pass the returned nextCursor to get the following page. Text queries go to searchListings.
+  searchListingsPage: async (params: ListingFilterParams) => {
+    const response = await axios.get<ListingFilterResponse>(
+      `${LISTINGS_SERVICE_URL}/api/listings/search`,
+      { params }
+    );
+    return response.data; // { listings, nextCursor }
+  },
+
+  // Function to search listings based on a query string (relevance-ranked by the search service)
+  searchListings: async (query: string, params: ListingSearchParams = {}) => {
+    const response = await axios.get<ListingSearchResponse>(`${SEARCH_SERVICE_URL}/api/search`, {
+      params: { ...params, q: query },
+    });
+    return response.data; // { listings, total, page, limit, totalPages }
   },
 
   createListing: async (listingData: FormData) => {
@@ -84,11 +116,8 @@ export const listingsApi = {
       }
       
 
-      const listingPromises = listingIds.map((id: string) => 
-        listingsApi.getListingById(id)
-      );
-      
-      const listings = await Promise.all(listingPromises);
+      // One request for the whole wishlist instead of one per listing
+      const listings = await listingsApi.getListingsByIds(listingIds);
       
       sessionStorage.setItem(cacheKey, JSON.stringify({
         data: listings,
@@ -135,6 +164,15 @@ export const listingsApi = {
     return response.data.listing;
   },
 
+  getListingsByIds: async (ids: string[]): Promise<Listing[]> => {
+    // Listings that no longer exist are left out of the result
+    const response = await axios.post<{ listings: Listing[]; missing: string[] }>(
+      `${LISTINGS_SERVICE_URL}/api/listings/batch`,
+      { ids }
+    );
+    return response.data.listings;
+  },
+
   editListing: async (id: string, listingData: FormData) => {
     const response = await axios.put<Listing>(
       `${LISTINGS_SERVICE_URL}/api/listings/edit/${id}`,
@@ -454,6 +492,52 @@ export const authApi = {
 
 };
 
+export const recommendationsApi = {
+  // Function to fetch the user's top recommended listings, best first
+  getRecommendations: async (token: string, limit = 20) => {
+    const response = await axios.get<{ recommendations: Listing[] }>(
+      `${RECOMMENDATIONS_SERVICE_URL}/api/recommendations`,
+      {
+        params: { limit },
+        headers: { Authorization: `Bearer ${token}` }
+      }
+    );
+    return response.data.recommendations;
+  },
+};
+
+export const ratingsApi = {
+  // Function to fetch a seller's aggregate rating (count, mean and smoothed score)
+  getSellerRating: async (sellerId: string) => {
+    const response = await axios.get<{ rating: SellerRating }>(
+      `${RATINGS_SERVICE_URL}/api/ratings/seller/${sellerId}`
+    );
+    return response.data.rating;
+  },
+
+  // Function to fetch the ratings of many sellers in one request (e.g. every seller on a page of listings)
+  getSellerRatings: async (sellerIds: string[]) => {
+    const ids = Array.from(new Set(sellerIds.filter(Boolean)));
+    if (ids.length === 0) return {};
+    const response = await axios.post<{ ratings: Record<string, SellerRating> }>(
+      `${RATINGS_SERVICE_URL}/api/ratings/sellers`,
+      { ids }
+    );
+    return response.data.ratings;
+  },
+
+  // Function to rate the seller of a listing from 1 to 5; rating the same listing again replaces it.
+  // The ratings service reads the seller from the listing itself.
+  rateSeller: async (token: string, listingId: string, score: number, comment = '') => {
+    const response = await axios.post<{ seller: SellerRating }>(
+      `${RATINGS_SERVICE_URL}/api/ratings`,
+      { listingId, score, comment },
+      { headers: { Authorization: `Bearer ${token}` } }
+    );
+    return response.data.seller;
+  },
+};
+
 export const userApi = {
   // ... existing methods ...
 
@@ -482,4 +566,14 @@ export const userApi = {
     });
     return response.data.user_id;
   },
+
+  // Function to check which of many listings are in the user's wishlist, in one request per page
+  checkWishlistBulk: async (token: string, listingIds: string[]) => {
+    const response = await axios.post<{ in_wishlist: Record<string, boolean> }>(
+      `${USER_SERVICE_URL}/api/users/wishlist/check_bulk`,
+      { listingIds },
+      { headers: { Authorization: `Bearer ${token}` } }
+    );
+    return response.data.in_wishlist;
+  },
 };
@@ -1,4 +1,6 @@
 //all the structures for the api calling functions
+import { Listing } from '../types/listing';
+
 export interface RegisterRequest {
     username: string;
     email: string;
@@ -37,3 +39,46 @@ export interface ErrorResponse {
 export interface LogoutResponse {
     message: string;
 }
+
+export interface ListingSearchParams {
+    q?: string;
+    category?: string;
+    location?: string;
+    minPrice?: number;
+    maxPrice?: number;
+    sortBy?: 'datePosted' | 'price';
+    page?: number;
+    limit?: number;
+}
+
+export interface ListingSearchResponse {
+    listings: Listing[];
+    total: number;
+    page: number;
+    limit: number;
+    totalPages: number;
+}
+
+// Filter-only browsing on the listings service, paged with opaque cursors
+export interface ListingFilterParams {
+    category?: string;
+    location?: string;
+    minPrice?: number;
+    maxPrice?: number;
+    sortBy?: 'datePosted' | 'price';
+    limit?: number;
+    cursor?: string;
+}
+
+export interface ListingFilterResponse {
+    listings: Listing[];
+    nextCursor: string | null;
+}
+
+export interface SellerRating {
+    sellerId: string;
+    count: number;
+    sum: number;
+    mean: number | null; // null until the seller has been rated
+    score: number; // Bayesian-smoothed mean, used for display and sorting
+}
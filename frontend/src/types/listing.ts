@@ -1,6 +1,12 @@
 // This file defines the TypeScript interface for a Listing object.
 // It ensures that any object representing a listing will have these properties.
 
+export interface ImageDerivatives {
+  thumbnail?: string; // WebP, up to 320px on the longest edge
+  medium?: string; // WebP, up to 800px
+  full?: string; // WebP, up to 1600px
+}
+
 export interface Listing {
   id: string; // Unique identifier for the listing
   title: string; // Title of the listing
@@ -8,6 +14,8 @@ export interface Listing {
   price: number; // Price of the item in the listing
   imageUrl?: string; // URL of the image for the listing
   images?: string[]; // Array of image URLs
+  thumbnailUrl?: string; // Small WebP derivative of imageUrl, for list views
+  imageDerivatives?: Record<string, ImageDerivatives>; // Original image URL -> resized versions
   location: string; // Location where the item is available
   condition: string; // Condition of the item
   datePosted: string; // Date when the listing was posted
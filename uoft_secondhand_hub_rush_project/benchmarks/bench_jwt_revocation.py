@@ -0,0 +1,56 @@
+"""
+Micro-benchmark: cost of the JWT blocklist check per authenticated request.
+
+Compares the old check (a TokenBlocklist query per request) with the in-process
+RevocationCache in user_profile_service/revocation.py, for a token that is not
+revoked (the common case) against a blocklist holding --revoked entries.
+
+Usage (from uoft_secondhand_hub_rush_project/):
+    python benchmarks/bench_jwt_revocation.py --iterations 20000 --revoked 5000
+"""
+import argparse
+import datetime
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'user_profile_service'))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=20000)
+    parser.add_argument('--revoked', type=int, default=5000)
+    args = parser.parse_args()
+
+    db_dir = tempfile.TemporaryDirectory()
+    os.environ['DATABASE_URI'] = f"sqlite:///{db_dir.name}/tokens.db"
+    os.environ['VERIFY_USER_TABLE_ON_STARTUP'] = 'false'
+    from app import create_app, db, TokenBlocklist
+
+    app = create_app()
+    app.logger.disabled = True
+    with app.app_context():
+        now = datetime.datetime.utcnow()
+        db.session.add_all(TokenBlocklist(jti=f"revoked-{i}", created_at=now) for i in range(args.revoked))
+        db.session.commit()
+
+        start = time.perf_counter()
+        for _ in range(args.iterations):
+            TokenBlocklist.query.filter_by(jti='not-revoked').first()
+        query_cost = (time.perf_counter() - start) / args.iterations
+
+        cache = app.revocation_cache
+        cache.is_revoked('not-revoked')  # initial sync
+        start = time.perf_counter()
+        for _ in range(args.iterations):
+            cache.is_revoked('not-revoked')
+        cache_cost = (time.perf_counter() - start) / args.iterations
+
+    print(f"blocklist entries:  {args.revoked}")
+    print(f"database query:     {query_cost * 1e6:.2f} us/check")
+    print(f"revocation cache:   {cache_cost * 1e6:.2f} us/check (syncs: {cache.stats()['syncs']})")
+    print(f"speedup:            {query_cost / cache_cost:.0f}x")
+
+if __name__ == '__main__':
+    main()
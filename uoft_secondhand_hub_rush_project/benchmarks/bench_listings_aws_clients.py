@@ -0,0 +1,69 @@
+"""
+Micro-benchmark: per-request cost of building boto3 clients vs. the shared registry.
+
+Compares the old pattern (a fresh boto3.resource for every call) with the
+process-wide registry in listings_service/utils.py. Runs entirely against moto,
+so it measures client construction overhead (credential resolution, endpoint
+loading, pool setup) rather than network latency.
+
+Usage (from uoft_secondhand_hub_rush_project/):
+    python benchmarks/bench_listings_aws_clients.py --iterations 200
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'listings_service'))
+
+import boto3
+from moto import mock_aws
+from app import app
+from conftest import create_listings_table, TEST_REGION, TEST_TABLE
+from utils import get_listing_by_listing_id, reset_aws_clients
+
+def get_listing_with_fresh_resource(listing_id):
+    # the pre-registry code path: new resource (and connection pool) per request
+    dynamodb = boto3.resource(
+        'dynamodb',
+        region_name=app.config['AWS_S3_REGION'],
+        aws_access_key_id=app.config['AWS_ACCESS_KEY_ID'],
+        aws_secret_access_key=app.config['AWS_SECRET_ACCESS_KEY']
+    )
+    table = dynamodb.Table(app.config['AWS_DB_LISTINGS_TABLE_NAME'])
+    return table.get_item(Key={'id': listing_id}).get('Item')
+
+def time_calls(fn, iterations):
+    fn('bench-listing')  # warm up imports and moto
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn('bench-listing')
+    return (time.perf_counter() - start) / iterations
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    with mock_aws():
+        app.config.update(
+            AWS_ACCESS_KEY_ID='testing',
+            AWS_SECRET_ACCESS_KEY='testing',
+            AWS_S3_REGION=TEST_REGION,
+            AWS_DB_LISTINGS_TABLE_NAME=TEST_TABLE,
+        )
+        table = create_listings_table(boto3.resource('dynamodb', region_name=TEST_REGION))
+        table.put_item(Item={'id': 'bench-listing', 'title': 'Benchmark listing'})
+
+        with app.app_context():
+            reset_aws_clients()
+            before = time_calls(get_listing_with_fresh_resource, args.iterations)
+            after = time_calls(get_listing_by_listing_id, args.iterations)
+
+    print(f"iterations:            {args.iterations}")
+    print(f"fresh client/request:  {before * 1000:.3f} ms")
+    print(f"shared registry:       {after * 1000:.3f} ms")
+    print(f"speedup:               {before / after:.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+Benchmark: serial vs. parallel image uploads for a multi-photo listing.
+
+moto answers instantly, so each S3 PUT is padded with --latency-ms of simulated
+network round trip. Serial upload time grows with the number of images; the
+parallel path in upload_images_to_listings_s3 should stay close to a single
+upload's latency.
+
+Usage (from uoft_secondhand_hub_rush_project/):
+    python benchmarks/bench_listings_image_upload.py --images 6 --latency-ms 80
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'listings_service'))
+
+import boto3
+from moto import mock_aws
+from app import app
+from conftest import TEST_BUCKET, TEST_REGION
+import utils
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images', type=int, default=6)
+    parser.add_argument('--latency-ms', type=float, default=80)
+    parser.add_argument('--size-kb', type=int, default=512)
+    args = parser.parse_args()
+
+    payload = os.urandom(args.size_kb * 1024)
+    real_upload = utils.upload_to_listings_s3
+
+    def slow_upload(file, filename, content_type=None):
+        time.sleep(args.latency_ms / 1000)
+        return real_upload(file, filename, content_type)
+
+    utils.upload_to_listings_s3 = slow_upload
+
+    with mock_aws():
+        app.config.update(
+            AWS_ACCESS_KEY_ID='testing',
+            AWS_SECRET_ACCESS_KEY='testing',
+            AWS_S3_REGION=TEST_REGION,
+            AWS_S3_LISTINGS_BUCKET_NAME=TEST_BUCKET,
+        )
+        boto3.client('s3', region_name=TEST_REGION).create_bucket(
+            Bucket=TEST_BUCKET,
+            CreateBucketConfiguration={'LocationConstraint': TEST_REGION}
+        )
+
+        with app.app_context():
+            utils.reset_aws_clients()
+            app.logger.disabled = True
+
+            start = time.perf_counter()
+            for i in range(args.images):
+                utils.upload_to_listings_s3(io.BytesIO(payload), f'listings/serial/{i}.jpg')
+            serial = time.perf_counter() - start
+
+            uploads = [(io.BytesIO(payload), f'listings/parallel/{i}.jpg') for i in range(args.images)]
+            start = time.perf_counter()
+            assert utils.upload_images_to_listings_s3(uploads) is not None
+            parallel = time.perf_counter() - start
+
+    print(f"images:    {args.images} x {args.size_kb} KiB, {args.latency_ms:.0f} ms simulated latency")
+    print(f"serial:    {serial * 1000:.1f} ms")
+    print(f"parallel:  {parallel * 1000:.1f} ms")
+    print(f"speedup:   {serial / parallel:.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark: peak RSS of GET /api/listings/all, buffered jsonify vs. ?stream=1.
+
+The listings table is replaced by an in-process fixture that generates N listings
+lazily in DynamoDB-sized scan pages (about 1 MB each), so the only thing that
+differs between the two runs is how the endpoint builds its response. Each mode
+runs in its own subprocess and reports its peak resident set size.
+
+Usage (from uoft_secondhand_hub_rush_project/):
+    python benchmarks/bench_listings_streaming.py --count 100000
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'listings_service'))
+
+# roughly how many ~400 byte listings fit in one 1 MB DynamoDB scan page
+PAGE_SIZE = 2500
+
+class FixtureListingsTable:
+    """Stands in for the DynamoDB Table: scan() returns deterministic pages of listings."""
+
+    def __init__(self, count):
+        self.count = count
+
+    def scan(self, ExclusiveStartKey=None, **kwargs):
+        start = int(ExclusiveStartKey['id'].split('-')[1]) + 1 if ExclusiveStartKey else 0
+        end = min(start + PAGE_SIZE, self.count)
+        items = [{
+            'id': f'listing-{i:07d}',
+            'title': f'Listing number {i}',
+            'description': 'A gently used item in good condition, pick up on campus. ' * 3,
+            'price': Decimal(i % 500) + Decimal('0.99'),
+            'location': ['St. George', 'Mississauga', 'Scarborough'][i % 3],
+            'condition': 'Used',
+            'category': ['furniture', 'electronics', 'books', 'clothing'][i % 4],
+            'images': {f'https://bucket.s3.amazonaws.com/listings/listing-{i:07d}/photo.jpg'},
+            'datePosted': '2024-11-01T12:00:00',
+            'sellerId': f'seller-{i % 1000}',
+            'sellerName': f'Seller {i % 1000}',
+        } for i in range(start, end)]
+
+        response = {'Items': items}
+        if end < self.count:
+            response['LastEvaluatedKey'] = {'id': items[-1]['id']}
+        return response
+
+def run_mode(mode, count):
+    import utils
+    from app import app
+
+    utils.get_listings_table = lambda: FixtureListingsTable(count)
+    url = '/api/listings/all?stream=1' if mode == 'stream' else '/api/listings/all'
+
+    start = time.perf_counter()
+    with app.test_client() as client:
+        response = client.get(url, buffered=False)
+        body_bytes = 0
+        for chunk in response.response:
+            body_bytes += len(chunk)
+        response.close()
+    elapsed = time.perf_counter() - start
+
+    # ru_maxrss is in KiB on Linux
+    peak_mib = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{mode:>9} {count:>9} {peak_mib:>12.1f} {body_bytes / 2**20:>10.1f} {elapsed:>8.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=100000)
+    parser.add_argument('--mode', choices=['buffered', 'stream'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args.mode, args.count)
+        return
+
+    print(f"{'mode':>9} {'listings':>9} {'peak RSS MiB':>12} {'body MiB':>10} {'seconds':>8}")
+    sys.stdout.flush()
+    for mode in ('buffered', 'stream'):
+        subprocess.run([sys.executable, __file__, '--mode', mode, '--count', str(args.count)], check=True)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark: login-path user lookup by email as the users table grows.
+
+Compares the old full-table scan (scan_users_by_attribute("email", ...)) with the
+email-index query (get_user_by_email) used by login, pre_register and
+forgot_password. For each table size it reports the mean lookup latency and the
+number of items DynamoDB had to read (ScannedCount), which is what drives cost
+and latency on the real service. Password hashing is left out on purpose: it is
+constant per login and would hide the lookup cost.
+
+Runs against moto, so absolute numbers are only meaningful relative to each other.
+
+Usage (from uoft_secondhand_hub_rush_project/):
+    python benchmarks/bench_user_email_lookup.py --sizes 100 1000 5000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'user_profile_service'))
+os.environ.setdefault('VERIFY_USER_TABLE_ON_STARTUP', 'false')
+
+import boto3
+from boto3.dynamodb.conditions import Attr, Key
+from moto import mock_aws
+from app import create_app
+from utils import get_user_by_email, get_user_table, invalidate_user_table, scan_users_by_attribute
+
+REGION = 'us-east-2'
+TABLE_NAME = 'bench-users-table'
+
+def create_users_table(dynamodb):
+    return dynamodb.create_table(
+        TableName=TABLE_NAME,
+        KeySchema=[{'AttributeName': 'id', 'KeyType': 'HASH'}],
+        AttributeDefinitions=[
+            {'AttributeName': 'id', 'AttributeType': 'S'},
+            {'AttributeName': 'email', 'AttributeType': 'S'},
+        ],
+        GlobalSecondaryIndexes=[{
+            'IndexName': 'email-index',
+            'KeySchema': [{'AttributeName': 'email', 'KeyType': 'HASH'}],
+            'Projection': {'ProjectionType': 'ALL'},
+        }],
+        BillingMode='PAY_PER_REQUEST',
+    )
+
+def seed_users(table, count):
+    with table.batch_writer() as batch:
+        for i in range(count):
+            batch.put_item(Item={
+                'id': f'user-{i}',
+                'username': f'user{i}',
+                'email': f'user{i}@mail.utoronto.ca',
+                'email_verified': True,
+            })
+
+def time_lookup(fn, emails):
+    start = time.perf_counter()
+    for email in emails:
+        fn(email)
+    return (time.perf_counter() - start) / len(emails)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 5000])
+    parser.add_argument('--lookups', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'users':>8} {'scan ms':>10} {'scan read':>10} {'index ms':>10} {'index read':>10}")
+    for size in args.sizes:
+        with mock_aws():
+            app = create_app()
+            app.config.update(AWS_DB_USERS_TABLE_NAME=TABLE_NAME, AWS_S3_REGION=REGION)
+            seed_users(create_users_table(boto3.resource('dynamodb', region_name=REGION)), size)
+
+            with app.app_context():
+                invalidate_user_table()
+                # look up users spread across the table, last one included
+                emails = [f'user{(size - 1) * i // max(args.lookups - 1, 1)}@mail.utoronto.ca'
+                          for i in range(args.lookups)]
+                scan_ms = time_lookup(lambda e: scan_users_by_attribute('email', e), emails) * 1000
+                index_ms = time_lookup(get_user_by_email, emails) * 1000
+
+                table = get_user_table()
+                scan_read = table.scan(FilterExpression=Attr('email').eq(emails[-1]))['ScannedCount']
+                index_read = table.query(IndexName='email-index',
+                                         KeyConditionExpression=Key('email').eq(emails[-1]))['ScannedCount']
+                invalidate_user_table()
+
+        print(f"{size:>8} {scan_ms:>10.2f} {scan_read:>10} {index_ms:>10.2f} {index_read:>10}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""
+Benchmark: listings_service under `flask run` vs. gunicorn with gunicorn.conf.py.
+
+Each server runs the real listings app against an in-process moto DynamoDB seeded
+with BENCH_LISTINGS listings (bench-00000 ..). Every simulated AWS call also
+sleeps --aws-latency-ms, because moto answers in microseconds while real DynamoDB
+takes milliseconds, and waiting on AWS is what the workers spend most time on.
+locust_wsgi.py then drives the same read-heavy traffic against each server in
+headless mode and the aggregated results are printed side by side.
+
+gunicorn workers each seed their own moto table (preload_app is off), so every
+worker serves the same data.
+
+Usage (from uoft_secondhand_hub_rush_project/, needs locust and gunicorn):
+    python benchmarks/bench_wsgi_servers.py --users 100 --duration 60
+"""
+import argparse
+import csv
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(BENCH_DIR)
+LISTINGS_DIR = os.path.join(PROJECT_DIR, 'listings_service')
+BENCH_TABLE = 'bench-listings-table'
+BENCH_REGION = 'us-east-2'
+
+SERVERS = {
+    'flask run': ['flask', 'run', '--host=127.0.0.1', '--port={port}', '--with-threads'],
+    'gunicorn': [sys.executable, '-m', 'gunicorn', '-c', os.path.join(PROJECT_DIR, 'gunicorn.conf.py'),
+                 '--bind=127.0.0.1:{port}', '--access-logfile=', 'bench_wsgi_servers:create_bench_app()'],
+}
+
+def _add_aws_latency(latency_ms):
+    import botocore.handlers
+
+    def sleep_before_call(**kwargs):
+        time.sleep(latency_ms / 1000)
+
+    # registered on every botocore session created from here on, moto's included
+    botocore.handlers.BUILTIN_HANDLERS.append(('before-call', sleep_before_call))
+
+def create_bench_app():
+    """WSGI entry point for both servers: the listings app backed by a seeded moto table."""
+    sys.path.insert(0, LISTINGS_DIR)
+    import boto3
+    from moto import mock_aws
+
+    _add_aws_latency(float(os.getenv('BENCH_AWS_LATENCY_MS', 0)))
+    mock = mock_aws()
+    mock.start()
+
+    from app import app
+    from conftest import create_listings_table
+    from utils import reset_aws_clients
+
+    app.config.update(
+        AWS_ACCESS_KEY_ID='testing',
+        AWS_SECRET_ACCESS_KEY='testing',
+        AWS_S3_REGION=BENCH_REGION,
+        AWS_DB_LISTINGS_TABLE_NAME=BENCH_TABLE,
+        AWS_DB_LISTING_OUTBOX_TABLE_NAME=None,
+        LISTING_EVENTS_QUEUE_URL=None,
+        LISTING_CACHE_REDIS_URL=None,
+    )
+    reset_aws_clients()
+
+    dynamodb = boto3.resource('dynamodb', region_name=BENCH_REGION)
+    table = create_listings_table(dynamodb)
+    with table.batch_writer() as batch:
+        for i in range(int(os.getenv('BENCH_LISTINGS', 200))):
+            batch.put_item(Item={
+                'id': f'bench-{i:05d}',
+                'title': f'Benchmark listing {i}',
+                'description': 'A gently used item in good condition, pick up on campus.',
+                'price': str(i % 500),
+                'location': ['St. George', 'Mississauga', 'Scarborough'][i % 3],
+                'condition': 'Used',
+                'category': ['furniture', 'electronics', 'books', 'clothing'][i % 4],
+                'images': {f'https://bucket.s3.amazonaws.com/listings/bench-{i:05d}/photo.jpg'},
+                'datePosted': '2024-11-01T12:00:00',
+                'sellerId': f'seller-{i % 50}',
+                'sellerName': f'Seller {i % 50}',
+            })
+    return app
+
+def wait_until_healthy(port, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/health', timeout=1):
+                return
+        except OSError:
+            time.sleep(0.5)
+    raise RuntimeError(f'server on port {port} did not become healthy within {timeout}s')
+
+def run_server(name, args, env):
+    port = args.port
+    command = [part.format(port=port) for part in SERVERS[name]]
+    server = subprocess.Popen(command, cwd=BENCH_DIR, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_healthy(port)
+        with tempfile.TemporaryDirectory() as out_dir:
+            prefix = os.path.join(out_dir, 'stats')
+            subprocess.run([
+                sys.executable, '-m', 'locust', '-f', os.path.join(BENCH_DIR, 'locust_wsgi.py'),
+                '--headless', '--only-summary', f'--host=http://127.0.0.1:{port}',
+                f'--users={args.users}', f'--spawn-rate={args.users}', f'--run-time={args.duration}s',
+                f'--csv={prefix}',
+            ], env=env, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            with open(f'{prefix}_stats.csv', newline='') as f:
+                aggregated = [row for row in csv.DictReader(f) if row['Name'] == 'Aggregated'][0]
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    print(f"{name:>10} {float(aggregated['Requests/s']):>10.1f} {aggregated['50%']:>8} "
+          f"{aggregated['95%']:>8} {aggregated['99%']:>8} {aggregated['Failure Count']:>9}")
+    sys.stdout.flush()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--duration', type=int, default=60, help='seconds of load per server')
+    parser.add_argument('--listings', type=int, default=200)
+    parser.add_argument('--aws-latency-ms', type=float, default=10)
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--server', choices=sorted(SERVERS), action='append',
+                        help='only benchmark this server (repeatable)')
+    args = parser.parse_args()
+
+    env = dict(
+        os.environ,
+        FLASK_APP='bench_wsgi_servers:create_bench_app()',
+        PYTHONPATH=os.pathsep.join([BENCH_DIR, LISTINGS_DIR, os.environ.get('PYTHONPATH', '')]),
+        BENCH_LISTINGS=str(args.listings),
+        BENCH_AWS_LATENCY_MS=str(args.aws_latency_ms),
+    )
+
+    print(f"{'server':>10} {'req/s':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'failures':>9}")
+    sys.stdout.flush()
+    for name in args.server or SERVERS:
+        run_server(name, args, env)
+
+if __name__ == '__main__':
+    main()
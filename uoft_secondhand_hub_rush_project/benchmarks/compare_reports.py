@@ -0,0 +1,57 @@
+"""
+Compares two locustfile.py --report-file reports, e.g. the last release against this one.
+
+Prints req/s and p50/p95/p99 per endpoint for both runs along with the p95 change,
+and flags endpoints whose p95 got worse by more than --tolerance percent. With
+--fail-on-regression the script exits with 1 when anything was flagged.
+
+Usage (from uoft_secondhand_hub_rush_project/):
+    python benchmarks/compare_reports.py reports/v1.2.json reports/v1.3.json
+"""
+import argparse
+import json
+import sys
+
+def load_report(path):
+    with open(path) as f:
+        return json.load(f)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--tolerance', type=float, default=10.0, help='allowed p95 increase in percent')
+    parser.add_argument('--fail-on-regression', action='store_true')
+    args = parser.parse_args()
+
+    baseline = load_report(args.baseline)
+    candidate = load_report(args.candidate)
+    if baseline.get('fixtures') != candidate.get('fixtures'):
+        print(f"warning: fixtures differ ({baseline.get('fixtures')} vs {candidate.get('fixtures')})")
+
+    print(f"{'endpoint':<42} {'req/s':>15} {'p50 ms':>13} {'p95 ms':>13} {'p99 ms':>13} {'p95 change':>11}")
+    regressions = []
+    names = sorted(set(baseline['endpoints']) | set(candidate['endpoints']))
+    for name in names + ['total']:
+        before = baseline['total'] if name == 'total' else baseline['endpoints'].get(name)
+        after = candidate['total'] if name == 'total' else candidate['endpoints'].get(name)
+        if before is None or after is None:
+            print(f"{name:<42} {'only in ' + ('candidate' if before is None else 'baseline'):>15}")
+            continue
+
+        change = (after['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100 if before['p95_ms'] else 0.0
+        flag = ''
+        if change > args.tolerance:
+            flag = ' <-'
+            regressions.append(name)
+        print(f"{name:<42} {before['rps']:>7.1f}/{after['rps']:<7.1f} "
+              f"{before['p50_ms']:>6.0f}/{after['p50_ms']:<6.0f} {before['p95_ms']:>6.0f}/{after['p95_ms']:<6.0f} "
+              f"{before['p99_ms']:>6.0f}/{after['p99_ms']:<6.0f} {change:>+10.1f}%{flag}")
+
+    if regressions:
+        print(f"p95 regressed by more than {args.tolerance:.0f}% on: {', '.join(regressions)}")
+        if args.fail_on_regression:
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
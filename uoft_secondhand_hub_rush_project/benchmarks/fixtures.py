@@ -0,0 +1,82 @@
+"""
+Deterministic benchmark fixtures shared by seed_fixtures.py and locustfile.py.
+
+Users and listings are generated from a seed, so the load test knows every email,
+password and listing id the seeder wrote without reading them back. Both sides
+take their sizes from the same environment variables:
+
+    BENCH_SEED      random seed (default 444)
+    BENCH_USERS     number of verified users (default 50)
+    BENCH_LISTINGS  number of listings (default 500)
+    BENCH_PASSWORD  password shared by every fixture user
+"""
+import os
+import random
+from datetime import datetime, timedelta
+
+SEED = int(os.getenv('BENCH_SEED', 444))
+USER_COUNT = int(os.getenv('BENCH_USERS', 50))
+LISTING_COUNT = int(os.getenv('BENCH_LISTINGS', 500))
+PASSWORD = os.getenv('BENCH_PASSWORD', 'bench-password-444')
+
+CATEGORIES = ['furniture', 'electronics', 'books', 'clothing', 'kitchen', 'sports']
+LOCATIONS = ['St. George', 'Mississauga', 'Scarborough']
+CONDITIONS = ['New', 'Like New', 'Used', 'Fair']
+
+# listing titles are an adjective plus one of the items for their category
+ITEMS = {
+    'furniture': ['desk', 'chair', 'bookshelf', 'lamp', 'mattress', 'dresser'],
+    'electronics': ['monitor', 'laptop', 'headphones', 'keyboard', 'calculator', 'printer'],
+    'books': ['calculus textbook', 'physics textbook', 'novel', 'lab manual', 'dictionary'],
+    'clothing': ['winter jacket', 'hoodie', 'boots', 'scarf', 'backpack'],
+    'kitchen': ['kettle', 'rice cooker', 'frying pan', 'blender', 'microwave'],
+    'sports': ['bike', 'yoga mat', 'skates', 'tennis racket', 'dumbbells'],
+}
+ADJECTIVES = ['gently used', 'barely used', 'vintage', 'compact', 'sturdy', 'cheap']
+
+# the words users type into the search box, most of which match some listing
+SEARCH_TERMS = sorted({item.split()[-1] for items in ITEMS.values() for item in items}) + ['ikea', 'ece444']
+
+def user_id(i):
+    return f'bench-user-{i:04d}'
+
+def user_email(i):
+    return f'bench-user-{i:04d}@mail.utoronto.ca'
+
+def listing_id(i):
+    return f'bench-listing-{i:05d}'
+
+def fixture_users(count=USER_COUNT, seed=SEED):
+    """Verified user records, without the password hash (the seeder adds it)."""
+    rng = random.Random(seed)
+    return [{
+        'id': user_id(i),
+        'username': f'bench_user_{i:04d}',
+        'email': user_email(i),
+        'categories': rng.sample(CATEGORIES, 2),
+        'location': rng.choice(LOCATIONS),
+        'email_verified': True,
+    } for i in range(count)]
+
+def fixture_listings(count=LISTING_COUNT, user_count=USER_COUNT, seed=SEED):
+    """Listing records in the shape listings_service stores, sellers drawn from the fixture users."""
+    rng = random.Random(seed + 1)
+    posted = datetime(2024, 9, 1)
+    listings = []
+    for i in range(count):
+        category = CATEGORIES[i % len(CATEGORIES)]
+        seller = rng.randrange(user_count)
+        listings.append({
+            'id': listing_id(i),
+            'title': f'{rng.choice(ADJECTIVES).capitalize()} {rng.choice(ITEMS[category])}',
+            'description': f'Selling my {category} item, pick up on campus. Message me for details.',
+            'price': f'{rng.randint(5, 400)}.{rng.choice(["00", "50", "99"])}',
+            'location': rng.choice(LOCATIONS),
+            'condition': rng.choice(CONDITIONS),
+            'category': category,
+            'images': [f'https://bench-listings.s3.amazonaws.com/listings/{listing_id(i)}/photo.jpg'],
+            'datePosted': (posted + timedelta(minutes=37 * i)).isoformat(),
+            'sellerId': user_id(seller),
+            'sellerName': f'bench_user_{seller:04d}',
+        })
+    return listings
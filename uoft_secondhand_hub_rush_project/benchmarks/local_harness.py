@@ -0,0 +1,234 @@
+"""
+Offline benchmark harness: the locust suite against local stand-ins for AWS.
+
+Steps:
+  1. start a moto server (or use --aws-endpoint, e.g. DynamoDB Local or LocalStack)
+  2. create the users and listings tables and the listings bucket
+  3. seed N users and M listings from benchmarks/fixtures.py
+  4. boot listings_service, user_profile_service and search_engine under gunicorn
+     (or flask run), pointed at the stand-in through AWS_ENDPOINT_URL
+  5. run locustfile.py headless and write its JSON report
+
+search_engine serves from the in-process fake_elasticsearch.py index, loaded from
+the seeded table on startup, unless --elasticsearch-url points at a real cluster.
+Nothing touches real AWS, and the same seed gives the same dataset, so two
+reports from this harness can be compared with compare_reports.py.
+
+Needs the services' requirements plus `moto[server]` and `locust`, and boto3
+1.28.57+ (for AWS_ENDPOINT_URL).
+
+Usage (from uoft_secondhand_hub_rush_project/):
+    python benchmarks/local_harness.py --users 50 --listings 2000 \
+        --locust-users 100 --duration 120 --report-file reports/local.json
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(BENCH_DIR)
+GUNICORN_CONF = os.path.join(PROJECT_DIR, 'gunicorn.conf.py')
+
+REGION = 'us-east-2'
+USERS_TABLE = 'bench-users'
+LISTINGS_TABLE = 'bench-listings'
+LISTINGS_BUCKET = 'bench-listings'
+JWT_SECRET_KEY = 'local-harness-jwt-secret'
+
+# service name -> (directory, WSGI target, health path, port offset from --port-base)
+SERVICES = {
+    'listings_service': ('listings_service', 'app:app', '/health', 1),
+    'search_engine': ('search_engine', 'local_harness:create_search_app()', '/health', 3),
+    'user_profile_service': ('user_profile_service', 'app:create_app()', '/health', 5),
+}
+
+def create_search_app():
+    """search_engine WSGI target for the harness: the fake index, loaded from the seeded table."""
+    from app import app
+    from fake_elasticsearch import FakeElasticsearch
+    from utils import reindex_listings_from_table
+
+    if not app.config['ELASTICSEARCH_URL']:
+        app.extensions['elasticsearch'] = FakeElasticsearch()
+    with app.app_context():
+        reindex_listings_from_table()
+    return app
+
+def create_tables(dynamodb):
+    dynamodb.create_table(
+        TableName=USERS_TABLE,
+        KeySchema=[{'AttributeName': 'id', 'KeyType': 'HASH'}],
+        AttributeDefinitions=[
+            {'AttributeName': 'id', 'AttributeType': 'S'},
+            {'AttributeName': 'username', 'AttributeType': 'S'},
+            {'AttributeName': 'email', 'AttributeType': 'S'},
+        ],
+        GlobalSecondaryIndexes=[
+            {'IndexName': f'{name}-index', 'KeySchema': [{'AttributeName': name, 'KeyType': 'HASH'}],
+             'Projection': {'ProjectionType': 'ALL'}}
+            for name in ('username', 'email')
+        ],
+        BillingMode='PAY_PER_REQUEST',
+    )
+    dynamodb.create_table(
+        TableName=LISTINGS_TABLE,
+        KeySchema=[{'AttributeName': 'id', 'KeyType': 'HASH'}],
+        AttributeDefinitions=[
+            {'AttributeName': 'id', 'AttributeType': 'S'},
+            {'AttributeName': 'sellerId', 'AttributeType': 'S'},
+            {'AttributeName': 'category', 'AttributeType': 'S'},
+            {'AttributeName': 'catalog', 'AttributeType': 'S'},
+            {'AttributeName': 'datePosted', 'AttributeType': 'S'},
+            {'AttributeName': 'sortPrice', 'AttributeType': 'N'},
+        ],
+        GlobalSecondaryIndexes=[
+            {'IndexName': f'{name}-index', 'KeySchema': [{'AttributeName': name, 'KeyType': 'HASH'}],
+             'Projection': {'ProjectionType': 'ALL'}}
+            for name in ('sellerId', 'category')
+        ] + [
+            # the indexes /api/listings/search queries
+            {'IndexName': f'{partition}-{sort_key}-index',
+             'KeySchema': [{'AttributeName': partition, 'KeyType': 'HASH'},
+                           {'AttributeName': sort_key, 'KeyType': 'RANGE'}],
+             'Projection': {'ProjectionType': 'ALL'}}
+            for partition in ('catalog', 'category')
+            for sort_key in ('datePosted', 'sortPrice')
+        ],
+        BillingMode='PAY_PER_REQUEST',
+    )
+
+def service_env(args, aws_endpoint, work_dir):
+    return dict(
+        os.environ,
+        AWS_ENDPOINT_URL=aws_endpoint,
+        AWS_ACCESS_KEY_ID='testing',
+        AWS_SECRET_ACCESS_KEY='testing',
+        AWS_S3_REGION=REGION,
+        AWS_DB_USERS_TABLE_NAME=USERS_TABLE,
+        AWS_DB_LISTINGS_TABLE_NAME=LISTINGS_TABLE,
+        AWS_S3_LISTINGS_BUCKET_NAME=LISTINGS_BUCKET,
+        AWS_S3_USERS_BUCKET_NAME=LISTINGS_BUCKET,
+        JWT_SECRET_KEY=JWT_SECRET_KEY,
+        SECRET_KEY='local-harness-secret',
+        DATABASE_URI=f"sqlite:///{os.path.join(work_dir, 'tokens.db')}",
+        ELASTICSEARCH_URL=args.elasticsearch_url,
+        # no SQS queue or Redis locally: listing events and the shared cache stay off
+        AWS_DB_LISTING_OUTBOX_TABLE_NAME='',
+        LISTING_EVENTS_QUEUE_URL='',
+        LISTING_CACHE_REDIS_URL='',
+    )
+
+def start_service(name, args, env):
+    directory, target, _, offset = SERVICES[name]
+    port = args.port_base + offset
+    if args.server == 'gunicorn':
+        command = [sys.executable, '-m', 'gunicorn', '-c', GUNICORN_CONF, f'--bind=127.0.0.1:{port}', target]
+    else:
+        command = [sys.executable, '-m', 'flask', 'run', '--host=127.0.0.1', f'--port={port}', '--with-threads']
+
+    env = dict(env, FLASK_APP=target,
+               PYTHONPATH=os.pathsep.join([BENCH_DIR, os.path.join(PROJECT_DIR, directory)]))
+    if name == 'user_profile_service':
+        # pending registrations live in process memory, so one worker (see docker-compose.yml)
+        env['GUNICORN_WORKERS'] = '1'
+        env['GUNICORN_THREADS'] = '8'
+
+    log = open(os.path.join(args.log_dir, f'{name}.log'), 'w')
+    return subprocess.Popen(command, cwd=os.path.join(PROJECT_DIR, directory), env=env,
+                            stdout=log, stderr=subprocess.STDOUT)
+
+def wait_until_healthy(url, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1):
+                return
+        except OSError:
+            time.sleep(0.5)
+    raise RuntimeError(f'{url} did not become healthy within {timeout}s')
+
+def run_locust(args, env):
+    host = lambda offset: f'http://127.0.0.1:{args.port_base + offset}'
+    command = [
+        sys.executable, '-m', 'locust', '-f', os.path.join(PROJECT_DIR, 'locustfile.py'), '--headless',
+        f"--host={host(SERVICES['listings_service'][3])}",
+        f'--users={args.locust_users}', f'--spawn-rate={args.spawn_rate}', f'--run-time={args.duration}s',
+    ]
+    if args.report_file:
+        command.append(f'--report-file={os.path.abspath(args.report_file)}')
+    env = dict(env, USERS_HOST=host(SERVICES['user_profile_service'][3]),
+               SEARCH_HOST=host(SERVICES['search_engine'][3]))
+    return subprocess.run(command, cwd=PROJECT_DIR, env=env).returncode
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=50, help='fixture users to seed')
+    parser.add_argument('--listings', type=int, default=500, help='fixture listings to seed')
+    parser.add_argument('--seed', type=int, default=444)
+    parser.add_argument('--locust-users', type=int, default=50)
+    parser.add_argument('--spawn-rate', type=float, default=10)
+    parser.add_argument('--duration', type=int, default=60, help='seconds of load')
+    parser.add_argument('--report-file', default='')
+    parser.add_argument('--server', choices=['gunicorn', 'flask'], default='gunicorn')
+    parser.add_argument('--port-base', type=int, default=5100,
+                        help='services listen on base+1 (listings), +3 (search), +5 (users)')
+    parser.add_argument('--aws-endpoint', default='',
+                        help='use this DynamoDB/S3 stand-in instead of starting a moto server')
+    parser.add_argument('--moto-port', type=int, default=5099)
+    parser.add_argument('--elasticsearch-url', default='', help='real cluster for search_engine (default: fake index)')
+    parser.add_argument('--log-dir', default='', help='where service logs go (default: a new temp dir)')
+    args = parser.parse_args()
+
+    # fixtures.py reads its sizes from the environment, and so does the locust process
+    os.environ.update(BENCH_USERS=str(args.users), BENCH_LISTINGS=str(args.listings), BENCH_SEED=str(args.seed))
+    import boto3
+    from seed_fixtures import seed_tables
+
+    moto_server = None
+    aws_endpoint = args.aws_endpoint
+    if not aws_endpoint:
+        from moto.server import ThreadedMotoServer
+        moto_server = ThreadedMotoServer(ip_address='127.0.0.1', port=args.moto_port)
+        moto_server.start()
+        aws_endpoint = f'http://127.0.0.1:{args.moto_port}'
+
+    processes = []
+    args.log_dir = args.log_dir or tempfile.mkdtemp(prefix='local-harness-logs-')
+    os.makedirs(args.log_dir, exist_ok=True)
+    with tempfile.TemporaryDirectory() as work_dir:
+        try:
+            aws = dict(region_name=REGION, endpoint_url=aws_endpoint,
+                       aws_access_key_id='testing', aws_secret_access_key='testing')
+            dynamodb = boto3.resource('dynamodb', **aws)
+            create_tables(dynamodb)
+            boto3.client('s3', **aws).create_bucket(
+                Bucket=LISTINGS_BUCKET, CreateBucketConfiguration={'LocationConstraint': REGION})
+            user_count, listing_count = seed_tables(dynamodb, USERS_TABLE, LISTINGS_TABLE)
+            print(f'Seeded {user_count} users and {listing_count} listings at {aws_endpoint}.')
+
+            env = service_env(args, aws_endpoint, work_dir)
+            for name in SERVICES:
+                processes.append(start_service(name, args, env))
+            for name, (_, _, health_path, offset) in SERVICES.items():
+                wait_until_healthy(f'http://127.0.0.1:{args.port_base + offset}{health_path}')
+            print(f'Services are up ({args.server}); running locust for {args.duration}s.')
+
+            exit_code = run_locust(args, env)
+        finally:
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.wait(timeout=30)
+            if moto_server:
+                moto_server.stop()
+
+        if exit_code:
+            print(f'locust exited with {exit_code}; service logs are in {args.log_dir}')
+    sys.exit(exit_code)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+"""
+Read-heavy listings traffic used by bench_wsgi_servers.py to compare WSGI servers.
+
+Each simulated user browses without think time, so the numbers reflect how much
+the server can push through rather than how fast users click. Listing ids are
+the ones bench_wsgi_servers.py seeds: bench-00000 .. bench-<BENCH_LISTINGS - 1>.
+"""
+import os
+import random
+
+from locust import HttpUser, constant, task
+
+LISTING_COUNT = int(os.getenv("BENCH_LISTINGS", 200))
+
+
+def random_listing_id():
+    return f"bench-{random.randrange(LISTING_COUNT):05d}"
+
+
+class ListingsReader(HttpUser):
+    wait_time = constant(0)
+
+    @task(3)
+    def browse_first_page(self):
+        self.client.get("/api/listings/all?limit=20", name="/api/listings/all?limit=20")
+
+    @task(5)
+    def view_listing(self):
+        self.client.get(f"/api/listings/{random_listing_id()}", name="/api/listings/[id]")
+
+    @task(1)
+    def load_wishlist(self):
+        ids = [random_listing_id() for _ in range(20)]
+        self.client.post("/api/listings/batch", json={"ids": ids}, name="/api/listings/batch")
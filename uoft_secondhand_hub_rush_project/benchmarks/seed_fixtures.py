@@ -0,0 +1,68 @@
+"""
+Seeds the users and listings tables with the benchmark fixtures from fixtures.py.
+
+Users are written as verified accounts with BENCH_PASSWORD, so the load test can
+log in without going through email verification. Re-running overwrites the same
+items, which also clears any wishlists the previous run left behind.
+
+Tables and credentials come from the same variables the services use
+(AWS_DB_USERS_TABLE_NAME, AWS_DB_LISTINGS_TABLE_NAME, AWS_S3_REGION and the usual
+AWS credential chain). Search results come from Elasticsearch, so rebuild the
+index once seeding is done:
+    docker compose exec search_engine flask reindex-listings
+
+Usage (from uoft_secondhand_hub_rush_project/):
+    python benchmarks/seed_fixtures.py
+    BENCH_USERS=200 BENCH_LISTINGS=5000 python benchmarks/seed_fixtures.py
+"""
+import argparse
+import os
+import sys
+from decimal import Decimal
+
+import boto3
+from dotenv import load_dotenv
+from werkzeug.security import generate_password_hash
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import fixtures
+
+def seed_tables(dynamodb, users_table, listings_table):
+    """Writes the fixture users and listings; returns (users written, listings written)."""
+    # every fixture user shares one password, so hash it once
+    password_hash = generate_password_hash(fixtures.PASSWORD)
+    users = fixtures.fixture_users()
+    with dynamodb.Table(users_table).batch_writer(overwrite_by_pkeys=['id']) as batch:
+        for user in users:
+            batch.put_item(Item={**user, 'password': password_hash})
+
+    listings = fixtures.fixture_listings()
+    with dynamodb.Table(listings_table).batch_writer(overwrite_by_pkeys=['id']) as batch:
+        for listing in listings:
+            price = Decimal(listing['price'])
+            # catalog/sortPrice: the listings service's search index keys (listing_search_keys)
+            batch.put_item(Item={**listing, 'price': price, 'images': set(listing['images']),
+                                 'catalog': 'listings', 'sortPrice': price})
+
+    return len(users), len(listings)
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users-table', default=os.getenv('AWS_DB_USERS_TABLE_NAME'))
+    parser.add_argument('--listings-table', default=os.getenv('AWS_DB_LISTINGS_TABLE_NAME'))
+    parser.add_argument('--region', default=os.getenv('AWS_S3_REGION', 'us-east-2'))
+    parser.add_argument('--endpoint-url', default=os.getenv('AWS_ENDPOINT_URL'),
+                        help='DynamoDB endpoint to seed instead of AWS')
+    args = parser.parse_args()
+
+    if not args.users_table or not args.listings_table:
+        parser.error('set AWS_DB_USERS_TABLE_NAME and AWS_DB_LISTINGS_TABLE_NAME (or pass the table flags)')
+
+    dynamodb = boto3.resource('dynamodb', region_name=args.region, endpoint_url=args.endpoint_url)
+    user_count, listing_count = seed_tables(dynamodb, args.users_table, args.listings_table)
+    print(f"Seeded {user_count} users and {listing_count} listings (seed {fixtures.SEED}).")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Gunicorn settings shared by every service in docker-compose.yml.
+
+docker-compose mounts this file into each container as /app/gunicorn.conf.py,
+which gunicorn picks up from the working directory. Every setting can be
+overridden per service through the GUNICORN_* environment variables.
+
+Workers default to 2 x CPUs + 1 (capped at GUNICORN_MAX_WORKERS), each running
+GUNICORN_THREADS request threads. The services spend most of a request waiting
+on DynamoDB, S3 or Elasticsearch, so threads are a cheap way to keep a worker
+busy while it waits.
+
+Graceful reload (new code or settings, no dropped requests):
+    docker compose kill -s HUP <service>
+"""
+import os
+
+
+def _cpu_count():
+    # respects CPU pinning (docker --cpuset-cpus), unlike os.cpu_count()
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+
+workers = int(os.getenv(
+    "GUNICORN_WORKERS",
+    min(2 * _cpu_count() + 1, int(os.getenv("GUNICORN_MAX_WORKERS", 8))),
+))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+
+# a worker silent for this long is killed and replaced; image uploads get a longer limit
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+# how long in-flight requests get to finish on reload or shutdown
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+# the frontend talks to the services directly, so keep idle browser connections open briefly
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+
+# recycle workers now and then so a slow leak can't grow forever; jitter avoids
+# every worker restarting at once
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 1000))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 100))
+
+# the apps start background threads (mail queue, token purger) that don't survive
+# a fork, so every worker builds its own app
+preload_app = False
+# heartbeat files in memory rather than on the container's overlay filesystem
+worker_tmp_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
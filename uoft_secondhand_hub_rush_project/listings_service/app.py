@@ -1,5 +1,7 @@
 import os
-from flask import Flask, request, jsonify, render_template_string
+import time
+import click
+from flask import Flask, Response, request, jsonify, render_template_string, stream_with_context
 from utils import upload_to_listings_s3
 from utils import upload_to_listings_table
 from utils import delete_from_listings_table
@@ -8,6 +10,19 @@ from utils import get_listings_by_seller
 from utils import retrieve_listings_by_category
 from utils import get_listing_by_listing_id
 from utils import update_listing_in_table
+from utils import get_listings_page
+from utils import iter_all_listings
+from utils import iter_listings_by_seller
+from utils import ListingJSONEncoder
+from utils import search_listings
+from utils import LISTING_SEARCH_SORTS
+from utils import LISTING_SEARCH_KEY_NAMES
+from utils import backfill_listing_search_keys
+from utils import relay_listing_events
+from utils import upload_listing_images
+from utils import get_listings_by_ids
+from utils import get_listing_cache_stats
+from utils import get_similar_listings
 import uuid
 from decimal import Decimal
 from flask_cors import CORS
@@ -73,21 +88,16 @@ def create_listing():
         if not files:
             return jsonify({'error': 'At least one image is required'}), 400
 
-        image_urls = []
-        for file in files:
-            if file.filename == '':
-                continue
-            
-            filename = f"listings/{data['id']}/{file.filename}"  # store them in a folder named by listing id
-            file_url = upload_to_listings_s3(file, filename)
-            if file_url:
-                image_urls.append(file_url)
-            else:
-                return jsonify({'error': 'Failed to upload one or more images'}), 500
-
-        if not image_urls:
+        # store them in a folder named by listing id
+        uploads = [(file, f"listings/{data['id']}/{file.filename}") for file in files if file.filename != '']
+        if not uploads:
             return jsonify({'error': 'No valid images were uploaded'}), 400
 
+        uploaded = upload_listing_images(uploads)
+        if uploaded is None:
+            return jsonify({'error': 'Failed to upload one or more images'}), 500
+        image_urls, image_derivatives = uploaded
+
         listing_data = {
             'id': data['id'],
             'title': data['title'],
@@ -97,6 +107,7 @@ def create_listing():
             'condition': data['condition'],
             'category': data['category'],
             'images': image_urls,  # Keep as list for JSON response
+            'imageDerivatives': image_derivatives,  # original URL -> {thumbnail, medium, full} URLs
             'datePosted': data['datePosted'],
             'sellerId': data['sellerId'],
             'sellerName': data['sellerName']
@@ -130,25 +141,89 @@ def delete_listing(id):
     else:
         return jsonify({'error': f'Failed to delete listing with id {id}'}), 500
 
+def without_search_keys(listing):
+    # drop the attributes only the search indexes use
+    return {key: value for key, value in listing.items() if key not in LISTING_SEARCH_KEY_NAMES}
+
+def format_listing(listing):
+    # Convert sets to lists and Decimals to floats for JSON serialization
+    formatted_listing = {
+        **without_search_keys(listing),
+        'images': list(listing.get('images', set())) if isinstance(listing.get('images'), set) else listing.get('images', []),
+        'price': float(listing.get('price', 0)) if isinstance(listing.get('price'), Decimal) else listing.get('price', 0),
+    }
+    # Add imageUrl if images exist
+    if formatted_listing['images']:
+        formatted_listing['imageUrl'] = formatted_listing['images'][0]
+        add_thumbnail_url(formatted_listing)
+    return formatted_listing
+
+def add_thumbnail_url(listing):
+    # list views load the small WebP derivative of the cover image when there is one
+    derivatives = listing.get('imageDerivatives', {}).get(listing.get('imageUrl'), {})
+    if 'thumbnail' in derivatives:
+        listing['thumbnailUrl'] = derivatives['thumbnail']
+
+def wants_stream():
+    return request.args.get('stream', '').lower() in ('1', 'true')
+
+def stream_listings(pages, add_image_url=True):
+    """
+    Streams {"listings": [...]} to the client one DynamoDB page at a time, so only
+    the current page is held in memory instead of the whole result set.
+    """
+    encoder = ListingJSONEncoder()
+
+    def generate():
+        yield '{"listings": ['
+        first = True
+        for page in pages:
+            chunks = []
+            for listing in page:
+                if add_image_url and listing.get('images'):
+                    listing['imageUrl'] = next(iter(listing['images']))
+                    add_thumbnail_url(listing)
+                chunks.append(encoder.encode(without_search_keys(listing)))
+            if chunks:
+                yield ('' if first else ',') + ','.join(chunks)
+                first = False
+        yield ']}'
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
 @app.route('/api/listings/all', methods=['GET'])
 def get_all_listings_route():
+    if wants_stream():
+        return stream_listings(iter_all_listings())
+
+    limit = request.args.get('limit')
+    cursor = request.args.get('cursor')
+
+    # paginated mode: return a single page plus an opaque cursor for the next one
+    if limit is not None or cursor:
+        try:
+            limit = int(limit) if limit is not None else app.config['LISTINGS_DEFAULT_PAGE_SIZE']
+        except ValueError:
+            return jsonify({'error': 'limit must be an integer'}), 400
+        if limit < 1:
+            return jsonify({'error': 'limit must be at least 1'}), 400
+        limit = min(limit, app.config['LISTINGS_MAX_PAGE_SIZE'])
+
+        try:
+            listings, next_cursor = get_listings_page(limit, cursor)
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+
+        return jsonify({
+            'listings': [format_listing(listing) for listing in listings],
+            'nextCursor': next_cursor
+        }), 200
+
     try:
         # Get listings from DynamoDB
         listings = get_all_listings()
 
-        # Convert sets to lists and Decimals to floats for JSON serialization
-        formatted_listings = []
-        for listing in listings:
-            formatted_listing = {
-                **listing,
-                'images': list(listing.get('images', set())) if isinstance(listing.get('images'), set) else listing.get('images', []),
-                'price': float(listing.get('price', 0)) if isinstance(listing.get('price'), Decimal) else listing.get('price', 0),
-            }
-            # Add imageUrl if images exist
-            if formatted_listing['images']:
-                formatted_listing['imageUrl'] = formatted_listing['images'][0]
-            
-            formatted_listings.append(formatted_listing)
+        formatted_listings = [format_listing(listing) for listing in listings]
 
         return jsonify({'listings': formatted_listings}), 200
     except Exception as e:
@@ -156,21 +231,60 @@ def get_all_listings_route():
         traceback.print_exc()
         return jsonify({'error': 'Failed to fetch listings'}), 500
 
+@app.route('/api/listings/search', methods=['GET'])
+def search_listings_route():
+    if request.args.get('q', '').strip():
+        return jsonify({'error': 'Text search is served by the search service (/api/search)'}), 400
+
+    try:
+        min_price = request.args.get('minPrice', type=float)
+        max_price = request.args.get('maxPrice', type=float)
+        limit = int(request.args.get('limit', app.config['LISTINGS_DEFAULT_PAGE_SIZE']))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+
+    sort_by = request.args.get('sortBy', 'datePosted')
+    if sort_by not in LISTING_SEARCH_SORTS:
+        return jsonify({'error': f"sortBy must be one of: {', '.join(LISTING_SEARCH_SORTS)}"}), 400
+    if limit < 1:
+        return jsonify({'error': 'limit must be at least 1'}), 400
+    limit = min(limit, app.config['LISTINGS_MAX_PAGE_SIZE'])
+
+    try:
+        listings, next_cursor = search_listings(
+            category=request.args.get('category'),
+            location=request.args.get('location'),
+            min_price=min_price,
+            max_price=max_price,
+            sort_by=sort_by,
+            limit=limit,
+            cursor=request.args.get('cursor')
+        )
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+    except Exception as e:
+        print(f"Error searching listings: {str(e)}")
+        traceback.print_exc()
+        return jsonify({'error': 'Failed to search listings'}), 500
+
+    return jsonify({
+        'listings': [format_listing(listing) for listing in listings],
+        'nextCursor': next_cursor
+    }), 200
+
 @app.route('/api/listings/edit/<id>', methods=['PUT'])
 def edit_listing(id):
     data = request.form.to_dict()  # Get form data
     files = request.files.getlist('file')  # Optional: new images
     
     # If there are new images, upload them to S3
-    image_urls = []
-    if files:
-        for file in files:
-            filename = f"listings/{id}/{file.filename}"  # Store in a folder named by listing id
-            file_url = upload_to_listings_s3(file, filename)
-            if file_url:
-                image_urls.append(file_url)
-            else:
-                return jsonify({'error': 'Failed to upload one or more images'}), 500
+    image_urls, image_derivatives = [], None
+    uploads = [(file, f"listings/{id}/{file.filename}") for file in files if file.filename != '']
+    if uploads:
+        uploaded = upload_listing_images(uploads)
+        if uploaded is None:
+            return jsonify({'error': 'Failed to upload one or more images'}), 500
+        image_urls, image_derivatives = uploaded
     
     # prep data for updated listing
     update_data = {
@@ -181,6 +295,7 @@ def edit_listing(id):
         'condition': data.get('condition'),
         'category': data.get('category'),
         'images': image_urls if image_urls else None,  # only add new images if provided
+        'imageDerivatives': image_derivatives,  # replaced together with images
         'datePosted': data.get('datePosted'),
         'sellerId': data.get('sellerId'),
         'sellerName': data.get('sellerName')
@@ -195,6 +310,9 @@ def edit_listing(id):
 
 @app.route('/api/listings/user/<seller_id>', methods=['GET'])
 def get_listings_by_user(seller_id):
+    if wants_stream():
+        return stream_listings(iter_listings_by_seller(seller_id), add_image_url=False)
+
     try:
         # Get listings from database
         listings = get_listings_by_seller(seller_id)
@@ -203,7 +321,7 @@ def get_listings_by_user(seller_id):
         formatted_listings = []
         for listing in listings:
             formatted_listing = {
-                **listing,
+                **without_search_keys(listing),
                 'images': list(listing.get('images', set())) if isinstance(listing.get('images'), set) else listing.get('images', []),
                 'price': float(listing.get('price', 0)) if isinstance(listing.get('price'), Decimal) else listing.get('price', 0),
             }
@@ -230,6 +348,40 @@ def health_check():
 def simple_health_check():
     return jsonify({'status': 'healthy'}), 200
 
+@app.route('/api/listings/metrics', methods=['GET'])
+def metrics():
+    return jsonify({'listing_cache': get_listing_cache_stats()}), 200
+
+@app.route('/api/listings/batch', methods=['POST'])
+def get_listings_batch():
+    """
+    Returns the listings for a list of ids in one call (e.g. to hydrate a wishlist).
+
+    Body: {"ids": [...]}. Listings come back in the requested order; ids that no longer
+    exist are listed under "missing".
+    """
+    data = request.get_json(silent=True) or {}
+    listing_ids = data.get('ids')
+    if not isinstance(listing_ids, list) or not all(isinstance(listing_id, str) for listing_id in listing_ids):
+        return jsonify({'error': 'ids must be a list of listing ids'}), 400
+    if len(listing_ids) > app.config['LISTINGS_BATCH_MAX_IDS']:
+        return jsonify({'error': f"At most {app.config['LISTINGS_BATCH_MAX_IDS']} ids per request"}), 400
+
+    try:
+        listings = get_listings_by_ids(listing_ids)
+        if listings is None:
+            return jsonify({'error': 'Failed to fetch listings'}), 500
+
+        ordered_ids = list(dict.fromkeys(listing_ids))
+        return jsonify({
+            'listings': [format_listing(listings[listing_id]) for listing_id in ordered_ids if listing_id in listings],
+            'missing': [listing_id for listing_id in ordered_ids if listing_id not in listings]
+        }), 200
+    except Exception as e:
+        print(f"Error fetching listings batch: {str(e)}")
+        traceback.print_exc()
+        return jsonify({'error': 'Failed to fetch listings'}), 500
+
 @app.route('/api/listings/<id>', methods=['GET'])
 def get_listing_by_id_endpoint(id):
     try:
@@ -238,12 +390,35 @@ def get_listing_by_id_endpoint(id):
         if listing is None:
             return jsonify({'error': 'Listing not found'}), 404
             
-        return jsonify({'listing': listing}), 200
+        return jsonify({'listing': without_search_keys(listing), 'similar': get_similar_listings(listing)}), 200
     except Exception as e:
         print(f"Error fetching listing: {str(e)}")
         traceback.print_exc()
         return jsonify({'error': 'Failed to fetch listing'}), 500
 
+@app.cli.command('relay-listing-events')
+@click.option('--once', is_flag=True, help='Relay a single batch and exit.')
+def relay_listing_events_command(once):
+    """Forward listing events from the outbox table to the queue, retrying until they are sent."""
+    if not app.config['AWS_DB_LISTING_OUTBOX_TABLE_NAME'] or not app.config['LISTING_EVENTS_QUEUE_URL']:
+        raise click.UsageError('AWS_DB_LISTING_OUTBOX_TABLE_NAME and LISTING_EVENTS_QUEUE_URL must be set.')
+    while True:
+        try:
+            sent = relay_listing_events()
+        except Exception as e:
+            # unsent events stay in the outbox, so the next pass retries them
+            app.logger.error(f"Failed to relay listing events: {e}")
+            sent = 0
+        if once:
+            break
+        if not sent:
+            time.sleep(app.config['LISTING_OUTBOX_POLL_SECONDS'])
+
+@app.cli.command('backfill-listing-search-keys')
+def backfill_listing_search_keys_command():
+    """Add the search index keys to listings created before /api/listings/search used them."""
+    click.echo(f"Updated {backfill_listing_search_keys()} listings.")
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5001)
 
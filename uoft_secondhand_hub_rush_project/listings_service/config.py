@@ -10,3 +10,47 @@ AWS_S3_LISTINGS_BUCKET_NAME = os.getenv('AWS_S3_LISTINGS_BUCKET_NAME')
 AWS_DB_LISTINGS_TABLE_NAME = os.getenv('AWS_DB_LISTINGS_TABLE_NAME')
 AWS_S3_REGION = os.getenv('AWS_S3_REGION', 'us-east-2') 
 JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY')
+
+# Size of the shared HTTP connection pool used by each boto3 client
+AWS_MAX_POOL_CONNECTIONS = int(os.getenv('AWS_MAX_POOL_CONNECTIONS', 50))
+
+# Page size for cursor-paginated listing endpoints
+LISTINGS_DEFAULT_PAGE_SIZE = int(os.getenv('LISTINGS_DEFAULT_PAGE_SIZE', 20))
+LISTINGS_MAX_PAGE_SIZE = int(os.getenv('LISTINGS_MAX_PAGE_SIZE', 100))
+
+# Most index items one /api/listings/search request evaluates; a page cut short by it
+# still returns a cursor to continue from
+LISTINGS_SEARCH_MAX_SCANNED = int(os.getenv('LISTINGS_SEARCH_MAX_SCANNED', 1000))
+
+# Outbox table written in the same transaction as every listing change (unset disables
+# listing events), and the SQS queue `flask relay-listing-events` forwards them to
+AWS_DB_LISTING_OUTBOX_TABLE_NAME = os.getenv('AWS_DB_LISTING_OUTBOX_TABLE_NAME')
+LISTING_EVENTS_QUEUE_URL = os.getenv('LISTING_EVENTS_QUEUE_URL')
+# Events the relay sends per pass, and how long it sleeps when the outbox is empty
+LISTING_OUTBOX_RELAY_BATCH_SIZE = int(os.getenv('LISTING_OUTBOX_RELAY_BATCH_SIZE', 100))
+LISTING_OUTBOX_POLL_SECONDS = float(os.getenv('LISTING_OUTBOX_POLL_SECONDS', 1))
+
+# Number of listing images uploaded to S3 in parallel (shared across requests)
+IMAGE_UPLOAD_MAX_WORKERS = int(os.getenv('IMAGE_UPLOAD_MAX_WORKERS', 8))
+
+# Resized WebP derivatives (thumbnail/medium/full) generated for every listing photo
+LISTING_IMAGE_DERIVATIVES = os.getenv('LISTING_IMAGE_DERIVATIVES', 'true').lower() == 'true'
+IMAGE_DERIVATIVE_QUALITY = int(os.getenv('IMAGE_DERIVATIVE_QUALITY', 80))
+
+# Most listing ids accepted by one /api/listings/batch request
+LISTINGS_BATCH_MAX_IDS = int(os.getenv('LISTINGS_BATCH_MAX_IDS', 500))
+
+# Read-through cache for single listings: per-process LRU size and TTL (0 disables it),
+# plus an optional Redis cache shared by every worker
+LISTING_CACHE_MAX_ENTRIES = int(os.getenv('LISTING_CACHE_MAX_ENTRIES', 2048))
+LISTING_CACHE_TTL = float(os.getenv('LISTING_CACHE_TTL', 30))
+LISTING_CACHE_REDIS_URL = os.getenv('LISTING_CACHE_REDIS_URL')
+
+# "Similar listings" on the detail page: how many to show (0 disables it), how many of
+# a listing's top TF-IDF terms are searched, the document-frequency ratio above which a
+# term is ignored, and how often each process rebuilds the index from the table (its
+# own writes are applied right away; the rebuild picks up other workers' writes)
+SIMILAR_LISTINGS_LIMIT = int(os.getenv('SIMILAR_LISTINGS_LIMIT', 6))
+SIMILAR_LISTINGS_QUERY_TERMS = int(os.getenv('SIMILAR_LISTINGS_QUERY_TERMS', 8))
+SIMILAR_LISTINGS_MAX_DF_RATIO = float(os.getenv('SIMILAR_LISTINGS_MAX_DF_RATIO', 0.5))
+SIMILAR_LISTINGS_REBUILD_INTERVAL = int(os.getenv('SIMILAR_LISTINGS_REBUILD_INTERVAL', 3600))
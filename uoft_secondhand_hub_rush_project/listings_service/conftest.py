@@ -0,0 +1,77 @@
+import pytest
+import boto3
+from moto import mock_aws
+from app import app
+from utils import reset_aws_clients
+from utils import reset_listing_cache
+from utils import reset_similar_listings_index
+
+# fake resources used by the moto-backed tests (no real AWS account needed)
+TEST_REGION = 'us-east-2'
+TEST_BUCKET = 'test-listings-bucket'
+TEST_TABLE = 'test-listings-table'
+
+def create_listings_table(dynamodb):
+    return dynamodb.create_table(
+        TableName=TEST_TABLE,
+        KeySchema=[{'AttributeName': 'id', 'KeyType': 'HASH'}],
+        AttributeDefinitions=[
+            {'AttributeName': 'id', 'AttributeType': 'S'},
+            {'AttributeName': 'sellerId', 'AttributeType': 'S'},
+            {'AttributeName': 'category', 'AttributeType': 'S'},
+            {'AttributeName': 'catalog', 'AttributeType': 'S'},
+            {'AttributeName': 'datePosted', 'AttributeType': 'S'},
+            {'AttributeName': 'sortPrice', 'AttributeType': 'N'},
+        ],
+        GlobalSecondaryIndexes=[
+            {
+                'IndexName': 'sellerId-index',
+                'KeySchema': [{'AttributeName': 'sellerId', 'KeyType': 'HASH'}],
+                'Projection': {'ProjectionType': 'ALL'},
+            },
+            {
+                'IndexName': 'category-index',
+                'KeySchema': [{'AttributeName': 'category', 'KeyType': 'HASH'}],
+                'Projection': {'ProjectionType': 'ALL'},
+            },
+            # search_listings: every listing, or one category, sorted by date or price
+            *[
+                {
+                    'IndexName': f'{partition}-{sort_key}-index',
+                    'KeySchema': [{'AttributeName': partition, 'KeyType': 'HASH'},
+                                  {'AttributeName': sort_key, 'KeyType': 'RANGE'}],
+                    'Projection': {'ProjectionType': 'ALL'},
+                }
+                for partition in ('catalog', 'category')
+                for sort_key in ('datePosted', 'sortPrice')
+            ],
+        ],
+        BillingMode='PAY_PER_REQUEST',
+    )
+
+@pytest.fixture
+def mock_aws_app():
+    with mock_aws():
+        app.config.update(
+            TESTING=True,
+            AWS_ACCESS_KEY_ID='testing',
+            AWS_SECRET_ACCESS_KEY='testing',
+            AWS_S3_REGION=TEST_REGION,
+            AWS_S3_LISTINGS_BUCKET_NAME=TEST_BUCKET,
+            AWS_DB_LISTINGS_TABLE_NAME=TEST_TABLE,
+            AWS_MAX_POOL_CONNECTIONS=50,
+        )
+        reset_aws_clients()
+        reset_listing_cache()
+        reset_similar_listings_index()
+
+        boto3.client('s3', region_name=TEST_REGION).create_bucket(
+            Bucket=TEST_BUCKET,
+            CreateBucketConfiguration={'LocationConstraint': TEST_REGION}
+        )
+        create_listings_table(boto3.resource('dynamodb', region_name=TEST_REGION))
+
+        with app.app_context():
+            yield app
+
+        reset_aws_clients()
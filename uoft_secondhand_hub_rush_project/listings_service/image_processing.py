@@ -0,0 +1,54 @@
+import io
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+# Derivatives generated for every listing photo: longest edge in pixels. Images
+# are never upscaled, so a small photo may produce several identical sizes.
+IMAGE_DERIVATIVE_SIZES = {
+    'thumbnail': 320,
+    'medium': 800,
+    'full': 1600,
+}
+
+IMAGE_DERIVATIVE_FORMAT = 'WEBP'
+IMAGE_DERIVATIVE_CONTENT_TYPE = 'image/webp'
+IMAGE_DERIVATIVE_EXTENSION = 'webp'
+
+# guard against decompression bombs from user uploads (about 8000 x 6000)
+Image.MAX_IMAGE_PIXELS = 50_000_000
+
+class UnsupportedImageError(ValueError):
+    pass
+
+def make_image_derivatives(file, quality=80):
+    """
+    Resizes an uploaded photo into the WebP derivatives in IMAGE_DERIVATIVE_SIZES.
+
+    Camera orientation (EXIF) is applied before resizing and metadata is dropped.
+    The file is rewound afterwards so the original can still be uploaded.
+
+    Returns:
+        dict: derivative name -> encoded WebP bytes
+
+    Raises:
+        UnsupportedImageError: If the file is not an image Pillow can decode.
+    """
+    try:
+        image = Image.open(file)
+        image = ImageOps.exif_transpose(image)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+        raise UnsupportedImageError(str(e)) from e
+    finally:
+        file.seek(0)
+
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+
+    derivatives = {}
+    # largest first, so each smaller size is resampled from an already reduced copy
+    for name, max_edge in sorted(IMAGE_DERIVATIVE_SIZES.items(), key=lambda item: -item[1]):
+        image = image.copy()
+        image.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        image.save(buffer, IMAGE_DERIVATIVE_FORMAT, quality=quality, method=4)
+        derivatives[name] = buffer.getvalue()
+    return derivatives
@@ -0,0 +1,181 @@
+import copy
+import json
+import threading
+import time
+from collections import OrderedDict
+from decimal import Decimal
+
+# Read-through cache for single listings (the detail page). Each process keeps an
+# LRU of up to LISTING_CACHE_MAX_ENTRIES listings for LISTING_CACHE_TTL seconds.
+# When LISTING_CACHE_REDIS_URL is set, misses fall through to a cache shared by
+# every worker before reaching DynamoDB.
+#
+# Writes made through this process invalidate the entry in both tiers. Other
+# processes drop their own copy when its TTL runs out, so keep the TTL short.
+#
+# Every key in the shared tier has a version, bumped by each invalidation. A load
+# reads the version before calling the loader and only stores its result if the
+# version is unchanged, so an invalidation from any worker always beats a load
+# that started before it.
+
+# sets KEYS[1] only while its version (KEYS[2]) still equals ARGV[1]
+_SET_IF_VERSION_SCRIPT = """
+if (redis.call('get', KEYS[2]) or '0') ~= ARGV[1] then
+    return 0
+end
+redis.call('set', KEYS[1], ARGV[2], 'EX', ARGV[3])
+return 1
+"""
+
+# versions outlive cached values so a slow load still sees invalidations made during it
+VERSION_TTL_SECONDS = 24 * 3600
+
+class RedisListingCacheBackend:
+    """Shared tier backed by Redis (needs the `redis` package)."""
+
+    def __init__(self, url, key_prefix='listing:'):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.key_prefix = key_prefix
+        self._set_if_version = self.client.register_script(_SET_IF_VERSION_SCRIPT)
+
+    def _version_key(self, key):
+        return f'{self.key_prefix}{key}:version'
+
+    def get(self, key):
+        return self.client.get(self.key_prefix + key)
+
+    def version(self, key):
+        version = self.client.get(self._version_key(key))
+        return version.decode() if version is not None else '0'
+
+    def set(self, key, value, ttl_seconds, version):
+        """Stores the value unless the key was invalidated since `version` was read."""
+        self._set_if_version(keys=[self.key_prefix + key, self._version_key(key)],
+                             args=[version, value, max(1, int(ttl_seconds))])
+
+    def delete(self, key):
+        pipeline = self.client.pipeline()
+        pipeline.incr(self._version_key(key))
+        pipeline.expire(self._version_key(key), VERSION_TTL_SECONDS)
+        pipeline.delete(self.key_prefix + key)
+        pipeline.execute()
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, set):
+        return sorted(value)
+    raise TypeError(f"Cannot cache value of type {type(value).__name__}")
+
+class ListingCache:
+    def __init__(self, max_entries=2048, ttl_seconds=30.0, shared=None, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.shared = shared
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, value), least recently used first
+        # bumped by every invalidation, so a load that raced with a write is not cached
+        self._generation = 0
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0,
+                       'shared_hits': 0, 'shared_errors': 0}
+
+    @property
+    def enabled(self):
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def get_or_load(self, key, loader):
+        """
+        Returns a copy of the cached value for `key`, calling `loader()` on a miss.
+
+        Results of None (not found, or a failed read) are not cached.
+        """
+        if not self.enabled:
+            return loader()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > self._clock():
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return copy.deepcopy(entry[1])
+            self._stats['misses'] += 1
+            generation = self._generation
+
+        value = self._get_shared(key)
+        if value is None:
+            version = self._shared_version(key)
+            value = loader()
+            if value is None:
+                return None
+            with self._lock:
+                current = generation == self._generation
+            if current and version is not None:
+                self._set_shared(key, value, version)
+
+        with self._lock:
+            if generation == self._generation:
+                self._store(key, value)
+        return copy.deepcopy(value)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._generation += 1
+            self._stats['invalidations'] += 1
+        if self.shared is not None:
+            try:
+                self.shared.delete(key)
+            except Exception:
+                self._count('shared_errors')
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, size=len(self._entries), max_entries=self.max_entries,
+                        ttl_seconds=self.ttl_seconds, shared=self.shared is not None)
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+
+    def _store(self, key, value):
+        self._entries.pop(key, None)
+        self._entries[key] = (self._clock() + self.ttl_seconds, value)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats['evictions'] += 1
+
+    def _get_shared(self, key):
+        if self.shared is None:
+            return None
+        try:
+            data = self.shared.get(key)
+        except Exception:
+            self._count('shared_errors')
+            return None
+        if data is None:
+            return None
+        self._count('shared_hits')
+        return json.loads(data)
+
+    def _shared_version(self, key):
+        # None means the shared tier is off or unreachable, and the load is not shared
+        if self.shared is None:
+            return None
+        try:
+            return self.shared.version(key)
+        except Exception:
+            self._count('shared_errors')
+            return None
+
+    def _set_shared(self, key, value, version):
+        try:
+            self.shared.set(key, json.dumps(value, default=_json_default), self.ttl_seconds, version)
+        except Exception:
+            self._count('shared_errors')
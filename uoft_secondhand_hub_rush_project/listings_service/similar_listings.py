@@ -0,0 +1,136 @@
+import math
+import re
+import threading
+from collections import Counter
+from decimal import Decimal
+
+# Content-similarity index behind the "similar listings" strip on the detail page.
+#
+# Every listing is a sparse TF-IDF vector over the words of its title (counted
+# twice), category and description, kept in an inverted index (term -> listing ->
+# weight). A lookup only walks the postings of the query listing's QUERY_TERMS
+# highest-weighted terms, and skips terms found in more than MAX_DF_RATIO of all
+# listings. That gives approximate top-K cosine neighbours without comparing
+# against the whole catalog.
+#
+# add/remove keep it current as listings are written; lookups never modify it.
+# Vector norms use the IDF at the time a listing was added. A periodic rebuild
+# from the table refreshes them, and also picks up writes that other workers made.
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+_STOPWORDS = frozenset("""
+    a an and are as at be but by for from has have i in is it its me my of on or so that the this
+    to was will with you your used new good great condition pick up selling sell price obo
+""".split())
+
+# fields of a listing copied into each similar-listing card
+CARD_FIELDS = ('id', 'title', 'price', 'category', 'location', 'condition')
+
+def tokenize(text):
+    return [token for token in _TOKEN_RE.findall(str(text or '').lower())
+            if len(token) > 1 and token not in _STOPWORDS]
+
+def listing_terms(listing):
+    title = tokenize(listing.get('title'))
+    terms = Counter(title + title + tokenize(listing.get('category')) + tokenize(listing.get('description')))
+    return {term: 1 + math.log(count) for term, count in terms.items()}
+
+def listing_card(listing):
+    card = {field: listing.get(field) for field in CARD_FIELDS if listing.get(field) is not None}
+    if isinstance(card.get('price'), Decimal):
+        card['price'] = float(card['price'])
+    images = list(listing.get('images') or [])
+    if images:
+        card['imageUrl'] = images[0]
+        derivatives = (listing.get('imageDerivatives') or {}).get(images[0], {})
+        if 'thumbnail' in derivatives:
+            card['thumbnailUrl'] = derivatives['thumbnail']
+    return card
+
+class SimilarListingsIndex:
+    def __init__(self, query_terms=8, max_df_ratio=0.5):
+        self.query_terms = query_terms
+        self.max_df_ratio = max_df_ratio
+        self._lock = threading.Lock()
+        self._terms = {}     # listing id -> {term: log tf}
+        self._norms = {}     # listing id -> TF-IDF vector norm when it was added
+        self._cards = {}     # listing id -> card shown on the detail page
+        self._postings = {}  # term -> {listing id: log tf}
+
+    def __len__(self):
+        return len(self._terms)
+
+    def __contains__(self, listing_id):
+        return listing_id in self._terms
+
+    def _idf(self, term):
+        return math.log((len(self._terms) + 1) / (len(self._postings.get(term, ())) + 1)) + 1
+
+    def _norm(self, terms):
+        return math.sqrt(sum((weight * self._idf(term)) ** 2 for term, weight in terms.items())) or 1.0
+
+    def add(self, listing):
+        """Indexes a listing, replacing any previous version of it."""
+        terms = listing_terms(listing)
+        with self._lock:
+            self._remove(listing['id'])
+            self._terms[listing['id']] = terms
+            self._cards[listing['id']] = listing_card(listing)
+            for term, weight in terms.items():
+                self._postings.setdefault(term, {})[listing['id']] = weight
+            self._norms[listing['id']] = self._norm(terms)
+
+    def remove(self, listing_id):
+        with self._lock:
+            self._remove(listing_id)
+
+    def _remove(self, listing_id):
+        terms = self._terms.pop(listing_id, None)
+        if terms is None:
+            return
+        self._cards.pop(listing_id, None)
+        self._norms.pop(listing_id, None)
+        for term in terms:
+            postings = self._postings[term]
+            postings.pop(listing_id, None)
+            if not postings:
+                del self._postings[term]
+
+    def similar(self, listing_id, k=6):
+        """Returns the cards of up to k listings most similar to this one, best first."""
+        with self._lock:
+            return self._similar(listing_id, self._terms.get(listing_id), k)
+
+    def similar_to(self, listing, k=6):
+        """
+        Like similar, but queries with the given version of the listing, which does not
+        have to be in the index (e.g. written by another worker since the last rebuild).
+        """
+        terms = listing_terms(listing)
+        with self._lock:
+            return self._similar(listing['id'], terms, k)
+
+    def _similar(self, listing_id, terms, k):
+        if not terms:
+            return []
+
+        max_df = max(1, self.max_df_ratio * len(self._terms))
+        # terms no indexed listing has cannot match anything
+        weighted = sorted(
+            ((weight * self._idf(term), term) for term, weight in terms.items()
+             if 0 < len(self._postings.get(term, ())) <= max_df),
+            reverse=True
+        )[:self.query_terms]
+
+        scores = {}
+        for query_weight, term in weighted:
+            idf = self._idf(term)
+            for other_id, weight in self._postings[term].items():
+                if other_id != listing_id:
+                    scores[other_id] = scores.get(other_id, 0.0) + query_weight * weight * idf
+
+        best = sorted(scores.items(), key=lambda item: (-item[1] / self._norms[item[0]], item[0]))[:k]
+        # candidates' norms may be stale, so the cosine is capped at 1
+        query_norm = self._norm(terms)
+        return [{**self._cards[other_id], 'score': round(min(score / (self._norms[other_id] * query_norm), 1.0), 4)}
+                for other_id, score in best]
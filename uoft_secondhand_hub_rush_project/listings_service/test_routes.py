@@ -0,0 +1,336 @@
+import io
+import json
+import boto3
+import pytest
+from decimal import Decimal
+from utils import upload_to_listings_table
+from utils import update_listing_in_table
+from utils import backfill_listing_search_keys
+from utils import relay_listing_events
+from utils import wait_for_similar_listings_index
+from test_utils import make_listing
+from test_utils import make_jpeg
+from conftest import TEST_BUCKET, TEST_REGION
+
+@pytest.fixture
+def client(mock_aws_app):
+    with mock_aws_app.test_client() as client:
+        yield client
+
+@pytest.fixture
+def seeded_listings(mock_aws_app):
+    listing_ids = [f'listing-{i:02d}' for i in range(25)]
+    for listing_id in listing_ids:
+        upload_to_listings_table(make_listing(listing_id))
+    return listing_ids
+
+def test_get_all_listings_without_limit_returns_everything(client, seeded_listings):
+    response = client.get('/api/listings/all')
+    assert response.status_code == 200
+
+    listings = response.get_json()['listings']
+    assert {listing['id'] for listing in listings} == set(seeded_listings)
+    assert all(listing['imageUrl'] == 'https://example.com/lamp.jpg' for listing in listings)
+
+def test_get_all_listings_cursor_pagination(client, seeded_listings):
+    seen_ids = []
+    cursor = None
+    pages = 0
+
+    while True:
+        query = {'limit': 10}
+        if cursor:
+            query['cursor'] = cursor
+        response = client.get('/api/listings/all', query_string=query)
+        assert response.status_code == 200
+
+        data = response.get_json()
+        assert len(data['listings']) <= 10
+        seen_ids.extend(listing['id'] for listing in data['listings'])
+        pages += 1
+
+        cursor = data['nextCursor']
+        if not cursor:
+            break
+
+    assert pages >= 3
+    assert sorted(seen_ids) == sorted(seeded_listings)
+
+def test_get_all_listings_limit_is_capped(client, seeded_listings, mock_aws_app):
+    mock_aws_app.config['LISTINGS_MAX_PAGE_SIZE'] = 5
+    try:
+        response = client.get('/api/listings/all?limit=1000')
+    finally:
+        mock_aws_app.config['LISTINGS_MAX_PAGE_SIZE'] = 100
+
+    assert response.status_code == 200
+    assert len(response.get_json()['listings']) == 5
+
+@pytest.mark.parametrize('query', ['limit=0', 'limit=abc', 'limit=5&cursor=not-a-cursor'])
+def test_get_all_listings_rejects_bad_pagination(client, query):
+    response = client.get(f'/api/listings/all?{query}')
+    assert response.status_code == 400
+
+def test_get_all_listings_stream_matches_buffered(client, seeded_listings):
+    buffered = client.get('/api/listings/all').get_json()['listings']
+
+    response = client.get('/api/listings/all?stream=1')
+    assert response.status_code == 200
+    assert response.is_streamed
+    streamed = json.loads(response.get_data(as_text=True))['listings']
+
+    assert sorted(streamed, key=lambda l: l['id']) == sorted(buffered, key=lambda l: l['id'])
+    assert all(isinstance(listing['price'], float) for listing in streamed)
+    assert all(listing['images'] == [listing['imageUrl']] for listing in streamed)
+
+def test_get_all_listings_stream_empty_table(client):
+    response = client.get('/api/listings/all?stream=true')
+    assert json.loads(response.get_data(as_text=True)) == {'listings': []}
+
+def test_get_listings_by_user_stream(client, mock_aws_app):
+    upload_to_listings_table(make_listing('mine-1', sellerId='alice'))
+    upload_to_listings_table(make_listing('mine-2', sellerId='alice'))
+    upload_to_listings_table(make_listing('theirs', sellerId='bob'))
+
+    response = client.get('/api/listings/user/alice?stream=1')
+    listings = json.loads(response.get_data(as_text=True))['listings']
+    assert {listing['id'] for listing in listings} == {'mine-1', 'mine-2'}
+
+@pytest.fixture
+def search_listings_fixture(mock_aws_app):
+    upload_to_listings_table(make_listing('desk', title='Oak Desk', price=Decimal('80'), category='furniture',
+                                          location='St. George', datePosted='2024-11-03T00:00:00'))
+    upload_to_listings_table(make_listing('chair', title='Office chair', description='Comfy desk chair',
+                                          price=Decimal('40'), category='furniture', location='Scarborough',
+                                          datePosted='2024-11-02T00:00:00'))
+    upload_to_listings_table(make_listing('laptop', title='Laptop', price=Decimal('600'), category='electronics',
+                                          location='St. George', datePosted='2024-11-04T00:00:00'))
+    upload_to_listings_table(make_listing('novel', title='Novel', price=Decimal('5'), category='books',
+                                          location='Mississauga', datePosted='2024-11-01T00:00:00'))
+
+def search_page(client, query):
+    response = client.get('/api/listings/search', query_string=query)
+    assert response.status_code == 200
+    data = response.get_json()
+    return [listing['id'] for listing in data['listings']], data['nextCursor']
+
+def search_ids(client, query):
+    # every page of the search, following the cursors
+    ids, cursor = search_page(client, query)
+    while cursor:
+        page_ids, cursor = search_page(client, {**query, 'cursor': cursor})
+        ids.extend(page_ids)
+    return ids
+
+def test_search_listings_filters(client, search_listings_fixture):
+    assert search_ids(client, {'category': 'furniture', 'location': 'St. George'}) == ['desk']
+    assert search_ids(client, {'minPrice': 10, 'maxPrice': 100}) == ['desk', 'chair']
+    assert search_ids(client, {'minPrice': 10, 'maxPrice': 100, 'sortBy': 'price'}) == ['chair', 'desk']
+    assert search_ids(client, {'maxPrice': 50, 'sortBy': 'price'}) == ['novel', 'chair']
+    assert search_ids(client, {'category': 'toys'}) == []
+
+def test_search_listings_sorting(client, search_listings_fixture):
+    assert search_ids(client, {}) == ['laptop', 'desk', 'chair', 'novel']
+    assert search_ids(client, {'sortBy': 'price'}) == ['novel', 'chair', 'desk', 'laptop']
+    assert search_ids(client, {'category': 'furniture', 'sortBy': 'price'}) == ['chair', 'desk']
+
+def test_search_listings_pagination(client, search_listings_fixture):
+    ids, cursor = search_page(client, {'sortBy': 'price', 'limit': 3})
+    assert ids == ['novel', 'chair', 'desk']
+    assert search_page(client, {'sortBy': 'price', 'limit': 3, 'cursor': cursor}) == (['laptop'], None)
+
+    # filtered reads go past the page; the cursor picks up right after its last listing
+    ids, cursor = search_page(client, {'location': 'St. George', 'limit': 1})
+    assert ids == ['laptop']
+    assert search_page(client, {'location': 'St. George', 'limit': 1, 'cursor': cursor}) == (['desk'], None)
+
+def test_search_listings_keeps_listings_without_a_price(client, search_listings_fixture):
+    listing = make_listing('free-couch', title='Couch', datePosted='2024-11-05T00:00:00')
+    del listing['price']
+    upload_to_listings_table(listing)
+
+    assert search_ids(client, {})[0] == 'free-couch'
+    assert search_ids(client, {'sortBy': 'price'})[0] == 'free-couch'
+    assert 'free-couch' not in search_ids(client, {'minPrice': 0})
+    assert 'free-couch' not in search_ids(client, {'maxPrice': 100, 'sortBy': 'price'})
+
+def test_search_listings_follows_edits(client, search_listings_fixture):
+    assert update_listing_in_table('novel', {'price': Decimal('700')})
+    assert search_ids(client, {'sortBy': 'price'}) == ['chair', 'desk', 'laptop', 'novel']
+
+def test_search_listings_continues_after_the_scan_cap(client, search_listings_fixture, mock_aws_app):
+    max_scanned = mock_aws_app.config['LISTINGS_SEARCH_MAX_SCANNED']
+    mock_aws_app.config['LISTINGS_SEARCH_MAX_SCANNED'] = 2
+    try:
+        # the only match is the oldest listing, past the first read
+        ids, cursor = search_page(client, {'location': 'Mississauga'})
+        assert ids == [] and cursor
+        assert search_ids(client, {'location': 'Mississauga'}) == ['novel']
+    finally:
+        mock_aws_app.config['LISTINGS_SEARCH_MAX_SCANNED'] = max_scanned
+
+def test_backfill_listing_search_keys(client, search_listings_fixture, mock_aws_app):
+    table = boto3.resource('dynamodb', region_name=TEST_REGION).Table(mock_aws_app.config['AWS_DB_LISTINGS_TABLE_NAME'])
+    table.put_item(Item=make_listing('old-lamp', title='Lamp', price=Decimal('15'), datePosted='2024-10-01T00:00:00'))
+    assert 'old-lamp' not in search_ids(client, {})
+
+    assert backfill_listing_search_keys() == 1
+    assert backfill_listing_search_keys() == 0
+    assert search_ids(client, {'sortBy': 'price'})[1] == 'old-lamp'
+
+@pytest.mark.parametrize('query', ['sortBy=title', 'limit=0', 'limit=abc', 'cursor=not-a-cursor', 'q=desk'])
+def test_search_listings_rejects_bad_params(client, query):
+    response = client.get(f'/api/listings/search?{query}')
+    assert response.status_code == 400
+
+@pytest.fixture
+def listing_events_queue(mock_aws_app):
+    boto3.resource('dynamodb', region_name=TEST_REGION).create_table(
+        TableName='test-listing-outbox',
+        KeySchema=[{'AttributeName': 'id', 'KeyType': 'HASH'}],
+        AttributeDefinitions=[{'AttributeName': 'id', 'AttributeType': 'S'}],
+        BillingMode='PAY_PER_REQUEST',
+    )
+    sqs = boto3.client('sqs', region_name=TEST_REGION)
+    mock_aws_app.config.update(
+        AWS_DB_LISTING_OUTBOX_TABLE_NAME='test-listing-outbox',
+        LISTING_EVENTS_QUEUE_URL=sqs.create_queue(QueueName='listing-events')['QueueUrl'],
+    )
+    yield sqs, mock_aws_app.config['LISTING_EVENTS_QUEUE_URL']
+    mock_aws_app.config.update(AWS_DB_LISTING_OUTBOX_TABLE_NAME=None, LISTING_EVENTS_QUEUE_URL=None)
+
+def received_events(sqs, queue_url):
+    messages = sqs.receive_message(QueueUrl=queue_url, MaxNumberOfMessages=10).get('Messages', [])
+    return [json.loads(message['Body']) for message in messages]
+
+def outbox_size():
+    return boto3.resource('dynamodb', region_name=TEST_REGION).Table('test-listing-outbox').scan()['Count']
+
+def test_listing_writes_publish_events(client, listing_events_queue):
+    sqs, queue_url = listing_events_queue
+    form = {
+        'id': 'bike', 'title': 'Bike', 'description': 'Road bike', 'price': '120', 'location': 'St. George',
+        'condition': 'Used', 'category': 'sports', 'datePosted': '2024-11-05T00:00:00',
+        'sellerId': 'alice', 'sellerName': 'Alice', 'file': (io.BytesIO(b'image'), 'bike.jpg'),
+    }
+    assert client.post('/api/listings/create-listing', data=form).status_code == 200
+    assert client.put('/api/listings/edit/bike', data={'title': 'Red bike', 'price': '100'}).status_code == 200
+    assert client.delete('/api/listings/delete/bike').status_code == 200
+
+    # the writes only commit events to the outbox; the relay sends them on
+    assert outbox_size() == 3
+    assert received_events(sqs, queue_url) == []
+    assert relay_listing_events() == 3
+    assert outbox_size() == 0
+
+    events = received_events(sqs, queue_url)
+    assert sorted((event['type'], event['listingId']) for event in events) == [
+        ('delete', 'bike'), ('upsert', 'bike'), ('upsert', 'bike')
+    ]
+    assert all(isinstance(event['emittedAt'], float) for event in events)
+
+def test_unsent_listing_events_stay_in_the_outbox(client, listing_events_queue, mock_aws_app):
+    sqs, queue_url = listing_events_queue
+    upload_to_listings_table(make_listing('lamp'))
+
+    mock_aws_app.config['LISTING_EVENTS_QUEUE_URL'] = queue_url + '-missing'
+    with pytest.raises(Exception):
+        relay_listing_events()
+    assert outbox_size() == 1
+
+    mock_aws_app.config['LISTING_EVENTS_QUEUE_URL'] = queue_url
+    assert relay_listing_events() == 1
+    assert [event['listingId'] for event in received_events(sqs, queue_url)] == ['lamp']
+
+def test_listing_writes_and_events_commit_together(client, listing_events_queue, mock_aws_app):
+    mock_aws_app.config['AWS_DB_LISTING_OUTBOX_TABLE_NAME'] = 'missing-outbox'
+    assert not upload_to_listings_table(make_listing('lamp'))
+    assert client.get('/api/listings/lamp').status_code == 404
+
+def test_listing_events_disabled_without_outbox(client, seeded_listings):
+    assert client.delete(f'/api/listings/delete/{seeded_listings[0]}').status_code == 200
+
+def test_create_listing_uploads_every_image(client):
+    form = {
+        'id': 'bike', 'title': 'Bike', 'description': 'Road bike', 'price': '120', 'location': 'St. George',
+        'condition': 'Used', 'category': 'sports', 'datePosted': '2024-11-05T00:00:00',
+        'sellerId': 'alice', 'sellerName': 'Alice',
+        'file': [(io.BytesIO(b'image'), f'{i}.jpg') for i in range(4)],
+    }
+    response = client.post('/api/listings/create-listing', data=form)
+    assert response.status_code == 200
+    assert sorted(response.get_json()['listing']['images']) == sorted(
+        f"https://{TEST_BUCKET}.s3.amazonaws.com/listings/bike/{i}.jpg" for i in range(4)
+    )
+
+def test_created_listing_serves_thumbnail(client):
+    form = {
+        'id': 'sofa', 'title': 'Sofa', 'description': 'Two seater', 'price': '150', 'location': 'St. George',
+        'condition': 'Used', 'category': 'furniture', 'datePosted': '2024-11-05T00:00:00',
+        'sellerId': 'alice', 'sellerName': 'Alice', 'file': (make_jpeg(2400, 1600), 'sofa.jpg'),
+    }
+    listing = client.post('/api/listings/create-listing', data=form).get_json()['listing']
+    base = f"https://{TEST_BUCKET}.s3.amazonaws.com/listings/sofa"
+    assert listing['imageDerivatives'][f'{base}/sofa.jpg']['medium'] == f'{base}/sofa_medium.webp'
+
+    listed = client.get('/api/listings/all?limit=10').get_json()['listings'][0]
+    assert listed['thumbnailUrl'] == f'{base}/sofa_thumbnail.webp'
+    streamed = json.loads(client.get('/api/listings/all?stream=1').get_data(as_text=True))['listings'][0]
+    assert streamed['thumbnailUrl'] == f'{base}/sofa_thumbnail.webp'
+
+def test_listings_batch_returns_requested_order(client, mock_aws_app):
+    for i in range(150):
+        upload_to_listings_table(make_listing(f'batch-{i:03d}'))
+    requested = [f'batch-{i:03d}' for i in reversed(range(150))] + ['gone', 'batch-149']
+
+    response = client.post('/api/listings/batch', json={'ids': requested})
+    assert response.status_code == 200
+    data = response.get_json()
+    assert [listing['id'] for listing in data['listings']] == requested[:150]
+    assert data['missing'] == ['gone']
+    assert data['listings'][0]['price'] == 15.0
+    assert data['listings'][0]['imageUrl'] == 'https://example.com/lamp.jpg'
+
+@pytest.mark.parametrize('body', [{}, {'ids': 'batch-1'}, {'ids': [1, 2]}, {'ids': ['x'] * 501}])
+def test_listings_batch_rejects_bad_ids(client, body):
+    assert client.post('/api/listings/batch', json=body).status_code == 400
+
+def test_listing_detail_reflects_edits_and_reports_cache_metrics(client, seeded_listings):
+    listing_id = seeded_listings[0]
+    for _ in range(3):
+        assert client.get(f'/api/listings/{listing_id}').get_json()['listing']['title'] == 'Desk lamp'
+
+    assert client.put(f'/api/listings/edit/{listing_id}', data={'title': 'Floor lamp'}).status_code == 200
+    assert client.get(f'/api/listings/{listing_id}').get_json()['listing']['title'] == 'Floor lamp'
+
+    stats = client.get('/api/listings/metrics').get_json()['listing_cache']
+    assert (stats['hits'], stats['misses']) == (2, 2)
+
+def test_listing_detail_includes_similar_listings(client, mock_aws_app):
+    upload_to_listings_table(make_listing('lamp', title='Desk lamp', description='LED desk lamp'))
+    upload_to_listings_table(make_listing('desk-lamp', title='IKEA desk lamp'))
+    upload_to_listings_table(make_listing('novel', title='Mystery novel', description='Paperback', category='books'))
+    upload_to_listings_table(make_listing('atlas', title='World atlas', description='Hardcover', category='books'))
+    upload_to_listings_table(make_listing('kettle', title='Electric kettle', description='1.7L', category='kitchen'))
+    upload_to_listings_table(make_listing('toaster', title='Toaster', description='Two slot', category='kitchen'))
+
+    # the first detail request only starts building the index in the background
+    data = client.get('/api/listings/lamp').get_json()
+    assert data['listing']['id'] == 'lamp'
+    assert data['similar'] == []
+    wait_for_similar_listings_index()
+
+    data = client.get('/api/listings/lamp').get_json()
+    assert [card['id'] for card in data['similar']] == ['desk-lamp']
+
+    assert client.put('/api/listings/edit/novel', data={'title': 'Reading lamp'}).status_code == 200
+    assert {card['id'] for card in client.get('/api/listings/lamp').get_json()['similar']} == {'desk-lamp', 'novel'}
+
+    assert client.delete('/api/listings/delete/desk-lamp').status_code == 200
+    assert [card['id'] for card in client.get('/api/listings/lamp').get_json()['similar']] == ['novel']
+
+    mock_aws_app.config['SIMILAR_LISTINGS_LIMIT'] = 0
+    try:
+        assert client.get('/api/listings/lamp').get_json()['similar'] == []
+    finally:
+        mock_aws_app.config['SIMILAR_LISTINGS_LIMIT'] = 6
@@ -0,0 +1,390 @@
+import io
+import threading
+import pytest
+from PIL import Image
+from decimal import Decimal
+from utils import get_aws_client
+from utils import get_aws_resource
+from utils import upload_to_listings_s3
+from utils import upload_to_listings_table
+from utils import get_listing_by_listing_id
+from utils import upload_images_to_listings_s3
+from utils import upload_listing_images
+from utils import get_listings_by_ids
+from utils import get_listing_cache
+from utils import update_listing_in_table
+from utils import delete_from_listings_table
+from utils import get_similar_listings_index
+from utils import wait_for_similar_listings_index
+from listing_cache import ListingCache
+from similar_listings import SimilarListingsIndex
+from image_processing import make_image_derivatives
+from image_processing import UnsupportedImageError
+from conftest import TEST_BUCKET
+
+def make_listing(listing_id, **overrides):
+    listing = {
+        'id': listing_id,
+        'title': 'Desk lamp',
+        'description': 'Barely used lamp',
+        'price': Decimal('15'),
+        'location': 'St. George',
+        'condition': 'Used',
+        'category': 'furniture',
+        'images': ['https://example.com/lamp.jpg'],
+        'datePosted': '2024-11-01T12:00:00',
+        'sellerId': 'seller-1',
+        'sellerName': 'Seller One'
+    }
+    listing.update(overrides)
+    return listing
+
+def test_aws_client_is_shared_across_calls(mock_aws_app):
+    assert get_aws_client('s3') is get_aws_client('s3')
+    assert get_aws_client('s3') is not get_aws_client('dynamodb')
+
+def test_aws_client_is_shared_across_threads(mock_aws_app):
+    clients = []
+
+    def worker():
+        with mock_aws_app.app_context():
+            clients.append(get_aws_client('s3'))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(clients) == 8
+    assert all(client is clients[0] for client in clients)
+
+def test_aws_resource_is_cached_per_thread(mock_aws_app):
+    resources = []
+
+    def worker():
+        with mock_aws_app.app_context():
+            resources.append(get_aws_resource('dynamodb'))
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+
+    assert get_aws_resource('dynamodb') is get_aws_resource('dynamodb')
+    assert resources[0] is not get_aws_resource('dynamodb')
+
+def test_aws_client_uses_configured_pool_size(mock_aws_app):
+    mock_aws_app.config['AWS_MAX_POOL_CONNECTIONS'] = 7
+    assert get_aws_client('dynamodb').meta.config.max_pool_connections == 7
+
+def test_listing_round_trip_through_shared_clients(mock_aws_app):
+    file_url = upload_to_listings_s3(io.BytesIO(b'image-bytes'), 'listings/lamp/lamp.jpg')
+    assert file_url == f"https://{TEST_BUCKET}.s3.amazonaws.com/listings/lamp/lamp.jpg"
+
+    assert upload_to_listings_table(make_listing('lamp'))
+    listing = get_listing_by_listing_id('lamp')
+    assert listing['title'] == 'Desk lamp'
+    assert listing['price'] == 15.0
+    assert listing['images'] == ['https://example.com/lamp.jpg']
+
+def bucket_keys():
+    response = get_aws_client('s3').list_objects_v2(Bucket=TEST_BUCKET)
+    return sorted(obj['Key'] for obj in response.get('Contents', []))
+
+def test_upload_images_runs_in_parallel_and_keeps_order(mock_aws_app):
+    uploads = [(io.BytesIO(b'image'), f'listings/bike/{i}.jpg') for i in range(6)]
+    image_urls = upload_images_to_listings_s3(uploads)
+
+    assert image_urls == [f"https://{TEST_BUCKET}.s3.amazonaws.com/listings/bike/{i}.jpg" for i in range(6)]
+    assert bucket_keys() == [f'listings/bike/{i}.jpg' for i in range(6)]
+
+def test_upload_images_cleans_up_after_partial_failure(mock_aws_app, monkeypatch):
+    import utils
+    real_upload = utils.upload_to_listings_s3
+
+    def flaky_upload(file, filename, content_type=None):
+        return None if filename.endswith('3.jpg') else real_upload(file, filename, content_type)
+
+    monkeypatch.setattr(utils, 'upload_to_listings_s3', flaky_upload)
+    uploads = [(io.BytesIO(b'image'), f'listings/bike/{i}.jpg') for i in range(6)]
+
+    assert upload_images_to_listings_s3(uploads) is None
+    assert bucket_keys() == []
+
+def make_jpeg(width, height, orientation=None):
+    image = Image.new('RGB', (width, height), (200, 80, 40))
+    exif = Image.Exif()
+    if orientation:
+        exif[0x0112] = orientation
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=95, exif=exif.tobytes())
+    buffer.seek(0)
+    return buffer
+
+def test_make_image_derivatives_sizes():
+    # orientation 6 means the camera was rotated 90 degrees, so the stored width is the height
+    photo = make_jpeg(3000, 2000, orientation=6)
+    derivatives = make_image_derivatives(photo)
+
+    sizes = {name: Image.open(io.BytesIO(data)).size for name, data in derivatives.items()}
+    assert sizes == {'thumbnail': (213, 320), 'medium': (533, 800), 'full': (1067, 1600)}
+    assert all(Image.open(io.BytesIO(data)).format == 'WEBP' for data in derivatives.values())
+    assert len(derivatives['thumbnail']) < len(photo.getvalue()) / 10
+    assert photo.tell() == 0
+
+def test_make_image_derivatives_never_upscales():
+    derivatives = make_image_derivatives(make_jpeg(200, 100))
+    assert {Image.open(io.BytesIO(data)).size for data in derivatives.values()} == {(200, 100)}
+
+def test_make_image_derivatives_rejects_non_images():
+    with pytest.raises(UnsupportedImageError):
+        make_image_derivatives(io.BytesIO(b'not an image'))
+
+def test_upload_listing_images_stores_derivatives(mock_aws_app):
+    image_urls, image_derivatives = upload_listing_images([
+        (make_jpeg(1200, 900), 'listings/bike/front.jpg'),
+        (io.BytesIO(b'not an image'), 'listings/bike/notes.jpg'),
+    ])
+
+    base = f"https://{TEST_BUCKET}.s3.amazonaws.com/listings/bike"
+    assert image_urls == [f'{base}/front.jpg', f'{base}/notes.jpg']
+    assert image_derivatives == {
+        f'{base}/front.jpg': {name: f'{base}/front_{name}.webp' for name in ('thumbnail', 'medium', 'full')}
+    }
+    thumbnail = get_aws_client('s3').get_object(Bucket=TEST_BUCKET, Key='listings/bike/front_thumbnail.webp')
+    assert thumbnail['ContentType'] == 'image/webp'
+
+def test_upload_listing_images_derivatives_can_be_disabled(mock_aws_app):
+    mock_aws_app.config['LISTING_IMAGE_DERIVATIVES'] = False
+    try:
+        image_urls, image_derivatives = upload_listing_images([(make_jpeg(1200, 900), 'listings/bike/front.jpg')])
+    finally:
+        mock_aws_app.config['LISTING_IMAGE_DERIVATIVES'] = True
+
+    assert image_derivatives == {}
+    assert bucket_keys() == ['listings/bike/front.jpg']
+
+def test_get_listings_by_ids_retries_unprocessed_keys(mock_aws_app, monkeypatch):
+    import utils
+    for i in range(120):
+        upload_to_listings_table(make_listing(f'listing-{i}'))
+
+    dynamodb = get_aws_resource('dynamodb')
+    real_batch_get_item = dynamodb.batch_get_item
+    calls = []
+
+    def throttled_batch_get_item(RequestItems):
+        # hand back half of every first request as unprocessed, like a throttled table
+        calls.append(len(next(iter(RequestItems.values()))['Keys']))
+        table_name, request = next(iter(RequestItems.items()))
+        if len(calls) % 2 == 1 and len(request['Keys']) > 1:
+            half = len(request['Keys']) // 2
+            response = real_batch_get_item(RequestItems={table_name: {'Keys': request['Keys'][:half]}})
+            response['UnprocessedKeys'] = {table_name: {'Keys': request['Keys'][half:]}}
+            return response
+        return real_batch_get_item(RequestItems=RequestItems)
+
+    monkeypatch.setattr(dynamodb, 'batch_get_item', throttled_batch_get_item)
+    monkeypatch.setattr(utils.time, 'sleep', lambda seconds: None)
+
+    listings = get_listings_by_ids([f'listing-{i}' for i in range(120)] + ['missing'])
+    assert sorted(listings) == sorted(f'listing-{i}' for i in range(120))
+    assert calls == [100, 50, 21, 11]
+
+def count_listing_reads(monkeypatch):
+    import utils
+    real_read_listing = utils._read_listing
+    calls = []
+
+    def counting_read_listing(listing_id):
+        calls.append(listing_id)
+        return real_read_listing(listing_id)
+
+    monkeypatch.setattr(utils, '_read_listing', counting_read_listing)
+    return calls
+
+def test_listing_cache_serves_hot_listings_without_dynamodb(mock_aws_app, monkeypatch):
+    upload_to_listings_table(make_listing('lamp'))
+    calls = count_listing_reads(monkeypatch)
+
+    for _ in range(5):
+        listing = get_listing_by_listing_id('lamp')
+        assert listing['title'] == 'Desk lamp'
+        listing['title'] = 'mutated by a caller'
+
+    assert calls == ['lamp']
+    assert get_listing_cache().stats()['hits'] == 4
+    assert get_listing_cache().stats()['misses'] == 1
+
+def test_listing_cache_is_invalidated_by_writes(mock_aws_app):
+    upload_to_listings_table(make_listing('lamp'))
+    assert get_listing_by_listing_id('lamp')['title'] == 'Desk lamp'
+
+    assert update_listing_in_table('lamp', {'title': 'Floor lamp'})
+    assert get_listing_by_listing_id('lamp')['title'] == 'Floor lamp'
+
+    assert delete_from_listings_table('lamp')
+    assert get_listing_by_listing_id('lamp') is None
+    assert get_listing_cache().stats()['invalidations'] == 3
+
+def test_listing_cache_evicts_least_recently_used():
+    cache = ListingCache(max_entries=2, ttl_seconds=60)
+    loads = []
+
+    def load(key):
+        return cache.get_or_load(key, lambda: loads.append(key) or {'id': key})
+
+    load('a'), load('b'), load('a'), load('c')  # 'b' is least recently used
+    load('a'), load('b')
+    assert loads == ['a', 'b', 'c', 'b']
+    assert cache.stats()['evictions'] == 2
+
+def test_listing_cache_expires_entries():
+    now = [0.0]
+    cache = ListingCache(max_entries=10, ttl_seconds=30, clock=lambda: now[0])
+    loads = []
+    load = lambda: cache.get_or_load('a', lambda: loads.append('a') or {'id': 'a'})
+
+    load()
+    now[0] = 29.9
+    load()
+    now[0] = 30.0
+    load()
+    assert loads == ['a', 'a']
+
+def test_listing_cache_drops_loads_that_race_with_a_write():
+    cache = ListingCache(max_entries=10, ttl_seconds=60)
+
+    def stale_load():
+        cache.invalidate('a')  # an update lands while the old item is being read
+        return {'id': 'a', 'title': 'old'}
+
+    assert cache.get_or_load('a', stale_load)['title'] == 'old'
+    assert cache.get_or_load('a', lambda: {'id': 'a', 'title': 'new'})['title'] == 'new'
+
+class FakeSharedCache(dict):
+    def __init__(self):
+        super().__init__()
+        self.versions = {}
+
+    def version(self, key):
+        return str(self.versions.get(key, 0))
+
+    def set(self, key, value, ttl_seconds, version):
+        if self.version(key) == version:
+            self[key] = value
+
+    def delete(self, key):
+        self.versions[key] = self.versions.get(key, 0) + 1
+        self.pop(key, None)
+
+def test_listing_cache_uses_shared_tier():
+    shared = FakeSharedCache()
+    worker_a = ListingCache(shared=shared)
+    worker_b = ListingCache(shared=shared)
+
+    worker_a.get_or_load('a', lambda: {'id': 'a', 'price': Decimal('12.5'), 'images': {'x'}})
+    assert worker_b.get_or_load('a', lambda: None) == {'id': 'a', 'price': 12.5, 'images': ['x']}
+    assert worker_b.stats()['shared_hits'] == 1
+
+    worker_a.invalidate('a')
+    assert 'a' not in shared
+
+@pytest.mark.parametrize('invalidating_worker', ['same', 'other'])
+def test_shared_tier_drops_loads_that_race_with_a_write(invalidating_worker):
+    shared = FakeSharedCache()
+    worker_a = ListingCache(shared=shared)
+    worker_b = ListingCache(shared=shared)
+    invalidator = worker_a if invalidating_worker == 'same' else worker_b
+
+    def stale_load():
+        invalidator.invalidate('a')  # an update lands while the old item is being read
+        return {'id': 'a', 'title': 'old'}
+
+    assert worker_a.get_or_load('a', stale_load)['title'] == 'old'
+    assert 'a' not in shared
+    assert worker_b.get_or_load('a', lambda: {'id': 'a', 'title': 'new'})['title'] == 'new'
+    assert ListingCache(shared=shared).get_or_load('a', lambda: None)['title'] == 'new'
+
+def similar_ids(index, listing_id, k=6):
+    return [card['id'] for card in index.similar(listing_id, k)]
+
+def test_similar_listings_rank_by_shared_terms():
+    index = SimilarListingsIndex(max_df_ratio=1.0)
+    index.add(make_listing('lamp', title='Desk lamp', description='LED desk lamp'))
+    index.add(make_listing('desk-lamp', title='IKEA desk lamp', description='Adjustable arm'))
+    index.add(make_listing('lamp-shade', title='Lamp shade', description='Fabric shade'))
+    index.add(make_listing('calculus', title='Calculus textbook', description='Stewart', category='books'))
+    index.add(make_listing('chemistry', title='Chemistry textbook', description='Organic', category='books'))
+
+    assert similar_ids(index, 'lamp') == ['desk-lamp', 'lamp-shade']
+    assert similar_ids(index, 'lamp', k=1) == ['desk-lamp']
+    card = index.similar('lamp')[0]
+    assert card['price'] == 15.0 and card['imageUrl'] == 'https://example.com/lamp.jpg'
+    assert 0 < card['score'] <= 1
+
+def test_similar_listings_skip_terms_in_most_listings():
+    index = SimilarListingsIndex(max_df_ratio=0.5)
+    for listing_id in ('a', 'b', 'c'):
+        index.add(make_listing(listing_id, title='Chair', description='', category='furniture'))
+    index.add(make_listing('d', title='Table', description='', category='furniture'))
+    assert similar_ids(index, 'd') == []
+
+def test_similar_listings_follow_edits_and_deletes():
+    index = SimilarListingsIndex(max_df_ratio=1.0)
+    index.add(make_listing('lamp', title='Desk lamp', description=''))
+    index.add(make_listing('bike', title='Road bike', description='', category='sports'))
+    index.add(make_listing('helmet', title='Bike helmet', description='', category='sports'))
+    assert similar_ids(index, 'lamp') == []
+
+    index.add(make_listing('lamp', title='Bike lamp', description='', category='sports'))
+    assert set(similar_ids(index, 'lamp')) == {'bike', 'helmet'}
+
+    index.remove('bike')
+    assert 'bike' not in index and len(index) == 2
+    assert similar_ids(index, 'lamp') == ['helmet']
+    assert index.similar('bike') == []
+
+def test_similar_lookup_does_not_change_the_index():
+    index = SimilarListingsIndex(max_df_ratio=1.0)
+    index.add(make_listing('desk-lamp', title='IKEA desk lamp', description=''))
+    index.add(make_listing('bike', title='Road bike', description='', category='sports'))
+
+    # a listing another worker wrote is looked up by its content, not inserted
+    lamp = make_listing('lamp', title='Desk lamp', description='')
+    assert [card['id'] for card in index.similar_to(lamp)] == ['desk-lamp']
+    assert 'lamp' not in index and len(index) == 2
+
+def test_similar_index_rebuild_keeps_writes_made_during_it(mock_aws_app, monkeypatch):
+    import utils
+    upload_to_listings_table(make_listing('lamp', title='Desk lamp', description=''))
+    upload_to_listings_table(make_listing('desk-lamp', title='IKEA desk lamp', description=''))
+    real_build = utils._build_similar_listings_index
+
+    def build_while_listings_change():
+        index = real_build()  # this snapshot still has desk-lamp
+        delete_from_listings_table('desk-lamp')
+        upload_to_listings_table(make_listing('lamp-shade', title='Lamp shade', description=''))
+        return index
+
+    monkeypatch.setattr(utils, '_build_similar_listings_index', build_while_listings_change)
+    assert get_similar_listings_index() is None
+    wait_for_similar_listings_index()
+
+    index = get_similar_listings_index()
+    assert 'desk-lamp' not in index and 'lamp-shade' in index
+
+def test_listing_writes_succeed_when_side_effects_fail(mock_aws_app, monkeypatch):
+    import utils
+
+    def broken(*args):
+        raise RuntimeError('index is broken')
+
+    monkeypatch.setattr(utils, 'update_similar_listings_index', broken)
+    monkeypatch.setattr(utils, 'remove_from_similar_listings_index', broken)
+    monkeypatch.setattr(get_listing_cache(), 'invalidate', broken)
+
+    assert upload_to_listings_table(make_listing('lamp')) is True
+    assert update_listing_in_table('lamp', {'title': 'Floor lamp'}) is True
+    assert get_listing_by_listing_id('lamp')['title'] == 'Floor lamp'
+    assert delete_from_listings_table('lamp') is True
@@ -1,35 +1,238 @@
 import boto3
+import base64
+import io
+import binascii
+import json
+import random
+import threading
+import time
+import uuid
+from boto3.dynamodb.conditions import Attr, Key
+from botocore.config import Config
+from concurrent.futures import ThreadPoolExecutor
+from functools import reduce
 from flask import current_app
 from decimal import Decimal
+from image_processing import make_image_derivatives
+from image_processing import UnsupportedImageError
+from image_processing import IMAGE_DERIVATIVE_CONTENT_TYPE
+from image_processing import IMAGE_DERIVATIVE_EXTENSION
+from listing_cache import ListingCache
+from listing_cache import RedisListingCacheBackend
+from similar_listings import SimilarListingsIndex
 
-def upload_to_listings_s3(file, filename):
-    s3_client = boto3.client(
-        's3',
-        aws_access_key_id=current_app.config['AWS_ACCESS_KEY_ID'],
-        aws_secret_access_key=current_app.config['AWS_SECRET_ACCESS_KEY'],
-        region_name=current_app.config['AWS_S3_REGION']
+# Process-wide AWS client registry. Building a boto3 client/resource resolves
+# credentials, loads endpoint data and opens a fresh connection pool, so we do
+# it once per process (clients) or once per thread (resources, which boto3 does
+# not guarantee to be thread-safe) and reuse them across requests.
+_aws_registry_lock = threading.RLock()
+_aws_sessions = {}
+_aws_clients = {}
+_aws_local = threading.local()
+
+def _aws_registry_key():
+    return (
+        current_app.config['AWS_S3_REGION'],
+        current_app.config['AWS_ACCESS_KEY_ID'],
+        current_app.config['AWS_SECRET_ACCESS_KEY']
+    )
+
+def _aws_client_config():
+    return Config(
+        max_pool_connections=current_app.config.get('AWS_MAX_POOL_CONNECTIONS', 50),
+        retries={'max_attempts': 3, 'mode': 'standard'}
     )
 
+def _get_aws_session(key):
+    # boto3 sessions are not thread-safe to create, so guard with the registry lock
+    with _aws_registry_lock:
+        session = _aws_sessions.get(key)
+        if session is None:
+            region, access_key_id, secret_access_key = key
+            session = boto3.session.Session(
+                aws_access_key_id=access_key_id,
+                aws_secret_access_key=secret_access_key,
+                region_name=region
+            )
+            _aws_sessions[key] = session
+        return session
+
+def get_aws_client(service_name):
+    """Returns the shared, pooled boto3 client for this process."""
+    key = _aws_registry_key()
+    client = _aws_clients.get((service_name, key))
+    if client is None:
+        with _aws_registry_lock:
+            client = _aws_clients.get((service_name, key))
+            if client is None:
+                client = _get_aws_session(key).client(service_name, config=_aws_client_config())
+                _aws_clients[(service_name, key)] = client
+    return client
+
+def get_aws_resource(service_name):
+    """Returns the calling thread's cached boto3 resource."""
+    resources = getattr(_aws_local, 'resources', None)
+    if resources is None:
+        resources = _aws_local.resources = {}
+
+    key = _aws_registry_key()
+    resource = resources.get((service_name, key))
+    if resource is None:
+        with _aws_registry_lock:
+            resource = _get_aws_session(key).resource(service_name, config=_aws_client_config())
+        resources[(service_name, key)] = resource
+    return resource
+
+def get_listings_table():
+    return get_aws_resource('dynamodb').Table(current_app.config['AWS_DB_LISTINGS_TABLE_NAME'])
+
+def reset_aws_clients():
+    """Drops every cached session, client and resource (used by tests and benchmarks)."""
+    with _aws_registry_lock:
+        _aws_sessions.clear()
+        _aws_clients.clear()
+        _aws_local.__dict__.clear()
+
+def upload_to_listings_s3(file, filename, content_type=None):
+    s3_client = get_aws_client('s3')
+
     try:
         s3_client.upload_fileobj(
             file,
             current_app.config['AWS_S3_LISTINGS_BUCKET_NAME'],
-            filename
+            filename,
+            ExtraArgs={'ContentType': content_type} if content_type else None
         )
         return f"https://{current_app.config['AWS_S3_LISTINGS_BUCKET_NAME']}.s3.amazonaws.com/{filename}"
     except Exception as e:
         current_app.logger.error(f"Failed to upload to S3: {e}")
         return None
 
+# Shared pool for image uploads. It is bounded so concurrent create/edit requests
+# cannot open more S3 connections than the client's pool (AWS_MAX_POOL_CONNECTIONS).
+_upload_executor = None
+_upload_executor_lock = threading.Lock()
+
+def _get_upload_executor():
+    global _upload_executor
+    if _upload_executor is None:
+        with _upload_executor_lock:
+            if _upload_executor is None:
+                _upload_executor = ThreadPoolExecutor(
+                    max_workers=current_app.config['IMAGE_UPLOAD_MAX_WORKERS'],
+                    thread_name_prefix='listing-image-upload'
+                )
+    return _upload_executor
+
+def _timed_upload(app, file, filename, content_type=None):
+    with app.app_context():
+        start = time.perf_counter()
+        file_url = upload_to_listings_s3(file, filename, content_type)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        app.logger.info(f"Uploaded {filename} in {elapsed_ms:.1f} ms" if file_url else
+                        f"Upload of {filename} failed after {elapsed_ms:.1f} ms")
+        return file_url
+
+def upload_images_to_listings_s3(uploads):
+    """
+    Uploads several images to S3 concurrently.
+
+    Args:
+        uploads (list): (file, filename) or (file, filename, content_type) tuples.
+
+    Returns:
+        list: The image URLs in the same order as `uploads`, or None if any upload
+        failed, in which case the images that did upload are deleted again.
+    """
+    app = current_app._get_current_object()
+    start = time.perf_counter()
+    futures = [_get_upload_executor().submit(_timed_upload, app, *upload) for upload in uploads]
+    image_urls = [future.result() for future in futures]
+    current_app.logger.info(f"Uploaded {len(uploads)} images in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    if all(image_urls):
+        return image_urls
+
+    uploaded = [upload[1] for upload, file_url in zip(uploads, image_urls) if file_url]
+    if uploaded:
+        delete_from_listings_s3(uploaded)
+    return None
+
+def derivative_filename(filename, name):
+    """listings/<id>/photo.jpg -> listings/<id>/photo_thumbnail.webp"""
+    return f"{filename.rsplit('.', 1)[0]}_{name}.{IMAGE_DERIVATIVE_EXTENSION}"
+
+def _prepare_listing_image(app, file, filename):
+    # runs on the upload pool: resizing is CPU bound but Pillow releases the GIL
+    with app.app_context():
+        if not app.config['LISTING_IMAGE_DERIVATIVES']:
+            return {}
+        start = time.perf_counter()
+        try:
+            derivatives = make_image_derivatives(file, quality=app.config['IMAGE_DERIVATIVE_QUALITY'])
+        except UnsupportedImageError as e:
+            app.logger.warning(f"Storing {filename} without derivatives, could not decode it: {e}")
+            return {}
+        app.logger.info(f"Built derivatives for {filename} in {(time.perf_counter() - start) * 1000:.1f} ms "
+                        f"({', '.join(f'{name}={len(data)}B' for name, data in derivatives.items())})")
+        return derivatives
+
+def upload_listing_images(uploads):
+    """
+    Uploads listing photos together with their resized WebP derivatives.
+
+    Each photo is resized on the upload pool, then the originals and all derivatives
+    are uploaded concurrently through upload_images_to_listings_s3.
+
+    Args:
+        uploads (list): (file, filename) pairs.
+
+    Returns:
+        tuple: (list of original image URLs in upload order,
+                dict of original URL -> {derivative name: URL}), or None if any upload failed.
+    """
+    app = current_app._get_current_object()
+    executor = _get_upload_executor()
+    prepared = [
+        future.result() for future in
+        [executor.submit(_prepare_listing_image, app, file, filename) for file, filename in uploads]
+    ]
+
+    objects = []
+    for (file, filename), derivatives in zip(uploads, prepared):
+        objects.append((file, filename))
+        for name, data in derivatives.items():
+            objects.append((io.BytesIO(data), derivative_filename(filename, name), IMAGE_DERIVATIVE_CONTENT_TYPE))
+
+    object_urls = upload_images_to_listings_s3(objects)
+    if object_urls is None:
+        return None
+
+    urls_by_filename = {obj[1]: url for obj, url in zip(objects, object_urls)}
+    image_urls = [urls_by_filename[filename] for _, filename in uploads]
+    image_derivatives = {
+        urls_by_filename[filename]: {name: urls_by_filename[derivative_filename(filename, name)] for name in derivatives}
+        for (_, filename), derivatives in zip(uploads, prepared) if derivatives
+    }
+    return image_urls, image_derivatives
+
+def delete_from_listings_s3(filenames):
+    """Deletes objects from the listings bucket, in batches of up to 1000 keys."""
+    s3_client = get_aws_client('s3')
+    try:
+        for start in range(0, len(filenames), 1000):
+            s3_client.delete_objects(
+                Bucket=current_app.config['AWS_S3_LISTINGS_BUCKET_NAME'],
+                Delete={'Objects': [{'Key': filename} for filename in filenames[start:start + 1000]], 'Quiet': True}
+            )
+        current_app.logger.info(f"Deleted {len(filenames)} objects from S3.")
+        return True
+    except Exception as e:
+        current_app.logger.error(f"Failed to delete from S3: {e}")
+        return False
+
 def upload_to_listings_table(listing_data):
-    dynamodb = boto3.resource(
-        'dynamodb',
-        region_name=current_app.config['AWS_S3_REGION'],
-        aws_access_key_id=current_app.config['AWS_ACCESS_KEY_ID'],
-        aws_secret_access_key=current_app.config['AWS_SECRET_ACCESS_KEY']
-    )
-    
-    table = dynamodb.Table(current_app.config['AWS_DB_LISTINGS_TABLE_NAME'])
+    table = get_listings_table()
 
     # Convert any float values to Decimal as required by DynamoDB
     for key, value in listing_data.items():
@@ -40,48 +243,74 @@ def upload_to_listings_table(listing_data):
     if 'images' in listing_data:
         listing_data['images'] = set(listing_data['images'])  # Convert list to a set for DynamoDB SS type
 
+    # Keys of the indexes search_listings queries
+    listing_data.update(listing_search_keys(listing_data))
+
     try:
-        table.put_item(Item=listing_data)
+        _write_listing({'Put': {'TableName': table.name, 'Item': listing_data}}, 'upsert', listing_data['id'])
         current_app.logger.info(f"Listing added to DynamoDB: {listing_data['id']}")
-        return True
     except Exception as e:
         current_app.logger.error(f"Failed to add listing to DynamoDB: {e}")
         return False
 
-def delete_from_listings_table(listing_id):
-    dynamodb = boto3.resource(
-        'dynamodb',
-        region_name=current_app.config['AWS_S3_REGION'],
-        aws_access_key_id=current_app.config['AWS_ACCESS_KEY_ID'],
-        aws_secret_access_key=current_app.config['AWS_SECRET_ACCESS_KEY']
-    )
-    
-    table = dynamodb.Table(current_app.config['AWS_DB_LISTINGS_TABLE_NAME'])
+    _after_listing_write(listing_data['id'], listing_data)
+    return True
+
+# DynamoDB client method for each kind of TransactWriteItems entry
+_LISTING_WRITE_METHODS = {'Put': 'put_item', 'Update': 'update_item', 'Delete': 'delete_item'}
 
+def _write_listing(write, event_type, listing_id):
+    """
+    Applies one listing write, given as a TransactWriteItems entry.
+
+    When AWS_DB_LISTING_OUTBOX_TABLE_NAME is set, the write and an outbox item for its
+    change event go in one transaction, so an event exists exactly when the write
+    committed; relay_listing_events sends it on to the queue later.
+    """
+    client = get_aws_resource('dynamodb').meta.client
+    outbox_table = current_app.config.get('AWS_DB_LISTING_OUTBOX_TABLE_NAME')
+    if not outbox_table:
+        (action, params), = write.items()
+        getattr(client, _LISTING_WRITE_METHODS[action])(**params)
+        return
+
+    event = {'id': str(uuid.uuid4()), 'type': event_type, 'listingId': listing_id,
+             'emittedAt': Decimal(str(time.time()))}
+    client.transact_write_items(TransactItems=[write, {'Put': {'TableName': outbox_table, 'Item': event}}])
+
+def _after_listing_write(listing_id, listing=None):
+    """
+    Brings the listing cache and similar listings index up to date with a committed
+    write (listing is None for a delete). Failures here are only logged: the write
+    itself succeeded, and both heal on their own (cache TTL, periodic index rebuild).
+    """
     try:
-        response = table.delete_item(
-            Key={'id': listing_id}
-        )
-        # Check if deletion was successful based on the response status
-        if response.get('ResponseMetadata', {}).get('HTTPStatusCode') == 200:
-            current_app.logger.info(f"Listing with id {listing_id} deleted successfully.")
-            return True
+        get_listing_cache().invalidate(listing_id)
+    except Exception as e:
+        current_app.logger.error(f"Failed to invalidate cached listing {listing_id}: {e}")
+    try:
+        if listing is None:
+            remove_from_similar_listings_index(listing_id)
         else:
-            current_app.logger.error(f"Failed to delete listing with id {listing_id}: {response}")
-            return False
+            update_similar_listings_index(listing)
+    except Exception as e:
+        current_app.logger.error(f"Failed to update similar listings index for {listing_id}: {e}")
+
+def delete_from_listings_table(listing_id):
+    table = get_listings_table()
+
+    try:
+        _write_listing({'Delete': {'TableName': table.name, 'Key': {'id': listing_id}}}, 'delete', listing_id)
     except Exception as e:
         current_app.logger.error(f"Failed to delete listing with id {listing_id}: {e}")
         return False
 
+    _after_listing_write(listing_id)
+    current_app.logger.info(f"Listing with id {listing_id} deleted successfully.")
+    return True
+
 def get_all_listings():
-  dynamodb = boto3.resource(
-        'dynamodb',
-        region_name=current_app.config['AWS_S3_REGION'],
-        aws_access_key_id=current_app.config['AWS_ACCESS_KEY_ID'],
-        aws_secret_access_key=current_app.config['AWS_SECRET_ACCESS_KEY']
-    )
-      
-  table = dynamodb.Table(current_app.config['AWS_DB_LISTINGS_TABLE_NAME'])
+  table = get_listings_table()
   
   try:
       # scan to retrieve everything
@@ -100,21 +329,227 @@ def get_all_listings():
       current_app.logger.error(f"Failed to retrieve all listings: {e}")
       return []
 
+class ListingJSONEncoder(json.JSONEncoder):
+    # DynamoDB hands back Decimal numbers and string sets; convert them while encoding
+    def default(self, o):
+        if isinstance(o, Decimal):
+            return float(o)
+        if isinstance(o, set):
+            return list(o)
+        return super().default(o)
+
+def iter_all_listings():
+    """Yields the listings table one DynamoDB scan page (a list of items) at a time."""
+    table = get_listings_table()
+    scan_kwargs = {}
+
+    while True:
+        try:
+            response = table.scan(**scan_kwargs)
+        except Exception as e:
+            current_app.logger.error(f"Failed to scan listings page: {e}")
+            raise
+        yield response.get('Items', [])
+
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def iter_listings_by_seller(seller_id):
+    """Yields a seller's listings one sellerId-index query page at a time."""
+    table = get_listings_table()
+    query_kwargs = {
+        'IndexName': 'sellerId-index',
+        'KeyConditionExpression': boto3.dynamodb.conditions.Key('sellerId').eq(seller_id)
+    }
+
+    while True:
+        try:
+            response = table.query(**query_kwargs)
+        except Exception as e:
+            current_app.logger.error(f"Failed to query listings page for seller ID {seller_id}: {e}")
+            raise
+        yield response.get('Items', [])
+
+        if 'LastEvaluatedKey' not in response:
+            break
+        query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def encode_listings_cursor(last_evaluated_key):
+    # opaque, URL-safe cursor wrapping DynamoDB's LastEvaluatedKey
+    if not last_evaluated_key:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(last_evaluated_key, cls=ListingJSONEncoder).encode()).decode()
+
+def decode_listings_cursor(cursor):
+    try:
+        # index keys carry numbers too (sortPrice), which DynamoDB needs back as Decimal
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()), parse_float=Decimal, parse_int=Decimal)
+    except (binascii.Error, UnicodeError, ValueError):
+        raise ValueError(f"Invalid listings cursor: {cursor}")
+    if not isinstance(key, dict) or not isinstance(key.get('id'), str):
+        raise ValueError(f"Invalid listings cursor: {cursor}")
+    return key
+
+def get_listings_page(limit, cursor=None):
+    """Returns one scan page of at most `limit` listings and the cursor for the next page."""
+    table = get_listings_table()
+
+    scan_kwargs = {'Limit': limit}
+    if cursor:
+        scan_kwargs['ExclusiveStartKey'] = decode_listings_cursor(cursor)
+
+    try:
+        response = table.scan(**scan_kwargs)
+        listings = response.get('Items', [])
+        current_app.logger.info(f"Retrieved a page of {len(listings)} listings from the database.")
+        return listings, encode_listings_cursor(response.get('LastEvaluatedKey'))
+    except Exception as e:
+        current_app.logger.error(f"Failed to retrieve listings page: {e}")
+        return [], None
+
+# Partition key value of the catalog-* search indexes, shared by every listing so a
+# search across all categories is still a single index query
+LISTINGS_CATALOG = 'listings'
+
+# attributes listing_search_keys adds to stored listings; they are not part of the API
+LISTING_SEARCH_KEY_NAMES = ('catalog', 'sortPrice')
+
+# sorts accepted by search_listings: sortBy -> (index sort key attribute, ascending)
+LISTING_SEARCH_SORTS = {
+    'datePosted': ('datePosted', False),
+    'price': ('sortPrice', True),
+}
+
+def listing_search_keys(listing):
+    """
+    The index attributes search_listings queries on, derived from a listing: the
+    constant catalog partition key and sortPrice, the price to sort by (0 when the
+    listing has none).
+    """
+    return {'catalog': LISTINGS_CATALOG, 'sortPrice': listing.get('price') or Decimal(0)}
+
+def search_listings(category=None, location=None, min_price=None, max_price=None, sort_by='datePosted',
+                    limit=20, cursor=None):
+    """
+    Returns one page of listings matching the filters in `sort_by` order, and the
+    cursor for the next page.
+
+    Each search is a query on the index sorted by `sort_by`: category-* when a category
+    is given, catalog-* (every listing) otherwise. Price bounds on a price sort are part
+    of the key condition; location, and price bounds on a date sort, are filter
+    expressions. Listings without a price sort as 0 and only match when no price bound
+    is given. Free-text queries are served by the search service instead.
+
+    A search stops reading once LISTINGS_SEARCH_MAX_SCANNED index items have been
+    evaluated, so a page with a selective filter can come back short; its cursor then
+    continues from where the read stopped.
+
+    Returns:
+        tuple: (listings, next_cursor), next_cursor being None on the last page.
+    """
+    table = get_listings_table()
+    sort_attribute, ascending = LISTING_SEARCH_SORTS[sort_by]
+    partition = 'category' if category else 'catalog'
+    key_condition = Key(partition).eq(category or LISTINGS_CATALOG)
+
+    filters = []
+    if location:
+        filters.append(Attr('location').eq(location))
+    low = Decimal(str(min_price)) if min_price is not None else None
+    high = Decimal(str(max_price)) if max_price is not None else None
+    if low is not None or high is not None:
+        filters.append(Attr('price').exists())
+    if sort_attribute == 'sortPrice' and (low is not None or high is not None):
+        if low is not None and high is not None:
+            key_condition &= Key('sortPrice').between(low, high)
+        elif low is not None:
+            key_condition &= Key('sortPrice').gte(low)
+        else:
+            key_condition &= Key('sortPrice').lte(high)
+    else:
+        if low is not None:
+            filters.append(Attr('price').gte(low))
+        if high is not None:
+            filters.append(Attr('price').lte(high))
+
+    query_kwargs = {
+        'IndexName': f'{partition}-{sort_attribute}-index',
+        'KeyConditionExpression': key_condition,
+        'ScanIndexForward': ascending,
+    }
+    if filters:
+        query_kwargs['FilterExpression'] = reduce(lambda left, right: left & right, filters)
+    if cursor:
+        query_kwargs['ExclusiveStartKey'] = decode_listings_cursor(cursor)
+
+    # a filtered read evaluates more items than it returns, so read ahead in larger pages
+    read_size = max(limit, 100) if filters else limit
+    max_scanned = current_app.config['LISTINGS_SEARCH_MAX_SCANNED']
+    listings, scanned = [], 0
+    while True:
+        response = table.query(Limit=min(read_size, max_scanned - scanned), **query_kwargs)
+        listings.extend(response.get('Items', []))
+        scanned += response.get('ScannedCount', 0)
+        last_key = response.get('LastEvaluatedKey')
+        if len(listings) >= limit or not last_key or scanned >= max_scanned:
+            break
+        query_kwargs['ExclusiveStartKey'] = last_key
+
+    if len(listings) > limit:
+        # the read went past the page, so the next one starts after its last listing
+        listings = listings[:limit]
+        last = listings[-1]
+        last_key = {'id': last['id'], partition: last[partition], sort_attribute: last[sort_attribute]}
+
+    current_app.logger.info(f"Search returned {len(listings)} listings after evaluating {scanned}.")
+    return listings, encode_listings_cursor(last_key)
+
+def backfill_listing_search_keys():
+    """
+    Writes the search index keys onto listings stored before search_listings used
+    them, and returns how many listings were updated. Safe to re-run.
+    """
+    table = get_listings_table()
+    updated = 0
+    for page in iter_all_listings():
+        for listing in page:
+            keys = listing_search_keys(listing)
+            if all(listing.get(name) == value for name, value in keys.items()):
+                continue
+            # leave listings deleted or repriced since the scan read them to their own writes
+            if 'price' in listing:
+                condition = Attr('price').eq(listing['price'])
+            else:
+                condition = Attr('id').exists() & Attr('price').not_exists()
+            try:
+                table.update_item(
+                    Key={'id': listing['id']},
+                    UpdateExpression='SET #catalog = :catalog, #sortPrice = :sortPrice',
+                    ConditionExpression=condition,
+                    ExpressionAttributeNames={'#catalog': 'catalog', '#sortPrice': 'sortPrice'},
+                    ExpressionAttributeValues={':catalog': keys['catalog'], ':sortPrice': keys['sortPrice']},
+                )
+            except table.meta.client.exceptions.ConditionalCheckFailedException:
+                continue
+            updated += 1
+    current_app.logger.info(f"Backfilled search keys on {updated} listings.")
+    return updated
+
 def update_listing_in_table(listing_id, update_data):
-    dynamodb = boto3.resource(
-        'dynamodb',
-        region_name=current_app.config['AWS_S3_REGION'],
-        aws_access_key_id=current_app.config['AWS_ACCESS_KEY_ID'],
-        aws_secret_access_key=current_app.config['AWS_SECRET_ACCESS_KEY']
-    )
-    
-    table = dynamodb.Table(current_app.config['AWS_DB_LISTINGS_TABLE_NAME'])
+    table = get_listings_table()
     
     # Build expressions with proper handling of reserved keywords
     update_parts = []
     expr_names = {}
     expr_values = {}
     
+    # Keep the search index keys in step with the fields they are derived from
+    search_keys = listing_search_keys(update_data)
+    update_data = {**update_data, 'catalog': search_keys['catalog']}
+    if 'price' in update_data:
+        update_data['sortPrice'] = search_keys['sortPrice']
+
     for key, value in update_data.items():
         # Use expression attribute names for all fields
         attr_name = f"#{key}"
@@ -126,27 +561,32 @@ def update_listing_in_table(listing_id, update_data):
     update_expression = "SET " + ", ".join(update_parts)
 
     try:
-        response = table.update_item(
-            Key={'id': listing_id},
-            UpdateExpression=update_expression,
-            ExpressionAttributeNames=expr_names,
-            ExpressionAttributeValues=expr_values
-        )
+        _write_listing({'Update': {
+            'TableName': table.name,
+            'Key': {'id': listing_id},
+            'UpdateExpression': update_expression,
+            'ExpressionAttributeNames': expr_names,
+            'ExpressionAttributeValues': expr_values,
+        }}, 'upsert', listing_id)
         current_app.logger.info(f"Listing with id {listing_id} updated successfully.")
-        return True
     except Exception as e:
         current_app.logger.error(f"Failed to update listing with id {listing_id}: {e}")
         return False
+
+    # transactions return no attributes, so read the updated item back for the index
+    try:
+        listing = table.get_item(Key={'id': listing_id}, ConsistentRead=True).get('Item')
+    except Exception as e:
+        current_app.logger.error(f"Failed to read back updated listing {listing_id}: {e}")
+        listing = None
+    if listing is None:
+        get_listing_cache().invalidate(listing_id)
+    else:
+        _after_listing_write(listing_id, listing)
+    return True
       
 def get_listings_by_seller(seller_id):
-    dynamodb = boto3.resource(
-        'dynamodb',
-        region_name=current_app.config['AWS_S3_REGION'],
-        aws_access_key_id=current_app.config['AWS_ACCESS_KEY_ID'],
-        aws_secret_access_key=current_app.config['AWS_SECRET_ACCESS_KEY']
-    )
-    
-    table = dynamodb.Table(current_app.config['AWS_DB_LISTINGS_TABLE_NAME'])
+    table = get_listings_table()
 
     try:
         # Query the listings table using the sellerId index
@@ -162,14 +602,7 @@ def get_listings_by_seller(seller_id):
         return []
 
 def retrieve_listings_by_category(category):
-    dynamodb = boto3.resource(
-        'dynamodb',
-        region_name=current_app.config['AWS_S3_REGION'],
-        aws_access_key_id=current_app.config['AWS_ACCESS_KEY_ID'],
-        aws_secret_access_key=current_app.config['AWS_SECRET_ACCESS_KEY']
-    )
-    
-    table = dynamodb.Table(current_app.config['AWS_DB_LISTINGS_TABLE_NAME'])
+    table = get_listings_table()
 
     try:
         # Query the listings table using the sellerId index
@@ -184,15 +617,173 @@ def retrieve_listings_by_category(category):
         current_app.logger.error(f"Failed to retrieve listings for category {category}: {e}")
         return []
 
-def get_listing_by_listing_id(listing_id):
-    dynamodb = boto3.resource(
-        'dynamodb',
-        region_name=current_app.config['AWS_S3_REGION'],
-        aws_access_key_id=current_app.config['AWS_ACCESS_KEY_ID'],
-        aws_secret_access_key=current_app.config['AWS_SECRET_ACCESS_KEY']
+# Process-wide read-through cache for get_listing_by_listing_id, built from the
+# LISTING_CACHE_* settings on first use
+_listing_cache = None
+_listing_cache_lock = threading.Lock()
+
+def get_listing_cache():
+    global _listing_cache
+    if _listing_cache is None:
+        with _listing_cache_lock:
+            if _listing_cache is None:
+                redis_url = current_app.config.get('LISTING_CACHE_REDIS_URL')
+                _listing_cache = ListingCache(
+                    max_entries=current_app.config.get('LISTING_CACHE_MAX_ENTRIES', 2048),
+                    ttl_seconds=current_app.config.get('LISTING_CACHE_TTL', 30),
+                    shared=RedisListingCacheBackend(redis_url) if redis_url else None
+                )
+    return _listing_cache
+
+def reset_listing_cache():
+    """Drops the listing cache so it is rebuilt from the current config (used by tests and benchmarks)."""
+    global _listing_cache
+    with _listing_cache_lock:
+        _listing_cache = None
+
+def get_listing_cache_stats():
+    return get_listing_cache().stats()
+
+# Per-process content-similarity index for the detail page's "similar listings".
+# A background thread builds it from a table scan the first time it is needed;
+# until then detail pages get no similar listings. It is kept current by this
+# process's writes (_after_listing_write), and only rebuilt in the background about
+# every SIMILAR_LISTINGS_REBUILD_INTERVAL seconds to pick up other workers' writes.
+#
+# Writes made while a build is scanning the table are journaled and replayed onto
+# the new index before it replaces the old one, so the build's older snapshot of
+# those listings never wins (a listing deleted mid-build stays deleted).
+_similar_index = None
+_similar_index_built_at = 0.0
+_similar_index_failed_at = None
+_similar_index_generation = 0  # bumped by reset, so a build started before it is discarded
+_similar_index_thread = None
+_similar_index_pending = None  # while a build runs: listing id -> latest listing, or None if deleted
+_similar_index_lock = threading.Lock()
+# each process waits a little longer than the interval, so workers rebuild at different times
+_similar_index_interval_jitter = 1 + random.random() * 0.2
+
+# after a failed build, wait this many seconds before scanning the table again
+SIMILAR_INDEX_RETRY_SECONDS = 30
+
+def _build_similar_listings_index():
+    index = SimilarListingsIndex(
+        query_terms=current_app.config.get('SIMILAR_LISTINGS_QUERY_TERMS', 8),
+        max_df_ratio=current_app.config.get('SIMILAR_LISTINGS_MAX_DF_RATIO', 0.5)
     )
-    
-    table = dynamodb.Table(current_app.config['AWS_DB_LISTINGS_TABLE_NAME'])
+    for page in iter_all_listings():
+        for listing in page:
+            index.add(listing)
+    return index
+
+def _build_similar_listings_index_in_background(app, generation):
+    global _similar_index, _similar_index_built_at, _similar_index_failed_at, _similar_index_thread
+    global _similar_index_pending
+    try:
+        with app.app_context():
+            index = _build_similar_listings_index()
+        with _similar_index_lock:
+            if generation == _similar_index_generation:
+                for listing_id, listing in _similar_index_pending.items():
+                    if listing is None:
+                        index.remove(listing_id)
+                    else:
+                        index.add(listing)
+                _similar_index = index
+                _similar_index_built_at = time.monotonic()
+                _similar_index_failed_at = None
+        app.logger.info(f"Built similar listings index over {len(index)} listings.")
+    except Exception as e:
+        app.logger.error(f"Failed to build similar listings index: {e}")
+        with _similar_index_lock:
+            _similar_index_failed_at = time.monotonic()
+    finally:
+        with _similar_index_lock:
+            if _similar_index_thread is threading.current_thread():
+                _similar_index_thread = None
+                _similar_index_pending = None
+
+def get_similar_listings_index():
+    """
+    Returns the similar listings index, or None while it is first being built.
+
+    Starts a background build when there is no index yet or it is older than
+    SIMILAR_LISTINGS_REBUILD_INTERVAL (plus up to 20% jitter, so the workers of one
+    deployment do not all scan the table at once); requests never wait for the scan.
+    """
+    global _similar_index_thread, _similar_index_pending
+    now = time.monotonic()
+    with _similar_index_lock:
+        if _similar_index is None:
+            due = _similar_index_failed_at is None or now - _similar_index_failed_at > SIMILAR_INDEX_RETRY_SECONDS
+        else:
+            interval = current_app.config.get('SIMILAR_LISTINGS_REBUILD_INTERVAL', 3600)
+            due = now - _similar_index_built_at > interval * _similar_index_interval_jitter
+        if due and _similar_index_thread is None:
+            _similar_index_pending = {}
+            _similar_index_thread = threading.Thread(
+                target=_build_similar_listings_index_in_background,
+                args=(current_app._get_current_object(), _similar_index_generation),
+                name='similar-listings-build', daemon=True
+            )
+            _similar_index_thread.start()
+        return _similar_index
+
+def wait_for_similar_listings_index(timeout=None):
+    """Waits for a background build in progress, if any (used by tests and benchmarks)."""
+    thread = _similar_index_thread
+    if thread is not None:
+        thread.join(timeout)
+
+def reset_similar_listings_index():
+    """Drops the similar listings index (used by tests)."""
+    global _similar_index, _similar_index_failed_at, _similar_index_generation
+    wait_for_similar_listings_index()
+    with _similar_index_lock:
+        _similar_index = None
+        _similar_index_failed_at = None
+        _similar_index_generation += 1
+
+def _apply_to_similar_listings_index(listing_id, listing):
+    with _similar_index_lock:
+        if _similar_index_pending is not None:
+            _similar_index_pending[listing_id] = listing
+        index = _similar_index
+    if index is None:
+        return
+    if listing is None:
+        index.remove(listing_id)
+    else:
+        index.add(listing)
+
+def update_similar_listings_index(listing):
+    _apply_to_similar_listings_index(listing['id'], listing)
+
+def remove_from_similar_listings_index(listing_id):
+    _apply_to_similar_listings_index(listing_id, None)
+
+def get_similar_listings(listing):
+    """
+    Cards of the listings most similar to this one ([] when SIMILAR_LISTINGS_LIMIT is 0).
+
+    Read-only: a listing another worker wrote since the last rebuild is looked up by
+    its current content without being added.
+    """
+    limit = current_app.config.get('SIMILAR_LISTINGS_LIMIT', 6)
+    if limit <= 0:
+        return []
+    index = get_similar_listings_index()
+    if index is None:
+        # still building: the detail page renders without the similar strip
+        return []
+    return index.similar_to(listing, limit)
+
+def get_listing_by_listing_id(listing_id):
+    """Returns a listing by id, served from the listing cache when it is there."""
+    return get_listing_cache().get_or_load(listing_id, lambda: _read_listing(listing_id))
+
+def _read_listing(listing_id):
+    table = get_listings_table()
 
     try:
         response = table.get_item(Key={'id': listing_id})
@@ -215,3 +806,93 @@ def get_listing_by_listing_id(listing_id):
     except Exception as e:
         current_app.logger.error(f"Failed to retrieve listing with ID {listing_id}: {e}")
         return None
+
+# BatchGetItem accepts at most 100 keys per request
+BATCH_GET_MAX_KEYS = 100
+BATCH_GET_MAX_ATTEMPTS = 5
+
+def get_listings_by_ids(listing_ids):
+    """
+    Fetches many listings with BatchGetItem, 100 keys per request.
+
+    Keys DynamoDB leaves unprocessed (throttling, 16 MB response limit) are retried
+    with exponential backoff.
+
+    Returns:
+        dict or None: listing id -> listing for the ids that exist, or None on failure.
+    """
+    dynamodb = get_aws_resource('dynamodb')
+    table_name = current_app.config['AWS_DB_LISTINGS_TABLE_NAME']
+    listing_ids = list(dict.fromkeys(listing_ids))  # drop duplicates, BatchGetItem rejects them
+
+    listings = {}
+    try:
+        for start in range(0, len(listing_ids), BATCH_GET_MAX_KEYS):
+            request_items = {
+                table_name: {'Keys': [{'id': listing_id} for listing_id in listing_ids[start:start + BATCH_GET_MAX_KEYS]]}
+            }
+            for attempt in range(BATCH_GET_MAX_ATTEMPTS):
+                response = dynamodb.batch_get_item(RequestItems=request_items)
+                for listing in response.get('Responses', {}).get(table_name, []):
+                    listings[listing['id']] = listing
+
+                request_items = response.get('UnprocessedKeys')
+                if not request_items:
+                    break
+                time.sleep(0.05 * 2 ** attempt)
+            else:
+                raise RuntimeError(f"{len(request_items[table_name]['Keys'])} keys still unprocessed "
+                                   f"after {BATCH_GET_MAX_ATTEMPTS} attempts")
+
+        current_app.logger.info(f"Batch fetched {len(listings)} of {len(listing_ids)} listings.")
+        return listings
+    except Exception as e:
+        current_app.logger.error(f"Failed to batch fetch listings: {e}")
+        return None
+
+def get_listing_outbox_table():
+    return get_aws_resource('dynamodb').Table(current_app.config['AWS_DB_LISTING_OUTBOX_TABLE_NAME'])
+
+def relay_listing_events(max_events=None):
+    """
+    Sends listing change events from the outbox table to the listing events queue.
+
+    Each outbox item is deleted only after SQS accepted its message, so anything not
+    sent (SQS errors, a relay that dies mid-batch) is sent by a later call: every
+    committed write reaches the queue at least once. Events only carry the listing id,
+    and consumers read the current item from the table, so duplicates and
+    out-of-order delivery converge on the latest state.
+
+    Returns:
+        int: The number of events sent.
+    """
+    if max_events is None:
+        max_events = current_app.config['LISTING_OUTBOX_RELAY_BATCH_SIZE']
+    table = get_listing_outbox_table()
+    events = table.scan(Limit=max_events, ConsistentRead=True).get('Items', [])
+
+    sqs = get_aws_client('sqs')
+    sent = 0
+    # SendMessageBatch takes at most 10 messages
+    for start in range(0, len(events), 10):
+        batch = events[start:start + 10]
+        response = sqs.send_message_batch(
+            QueueUrl=current_app.config['LISTING_EVENTS_QUEUE_URL'],
+            Entries=[
+                {'Id': str(i), 'MessageBody': json.dumps({
+                    'type': event['type'], 'listingId': event['listingId'], 'emittedAt': float(event['emittedAt'])
+                })}
+                for i, event in enumerate(batch)
+            ]
+        )
+        for failure in response.get('Failed', []):
+            current_app.logger.error(f"Failed to send listing event {batch[int(failure['Id'])]['id']}: "
+                                     f"{failure.get('Message')}; keeping it in the outbox.")
+        with table.batch_writer() as writer:
+            for entry in response.get('Successful', []):
+                writer.delete_item(Key={'id': batch[int(entry['Id'])]['id']})
+        sent += len(response.get('Successful', []))
+
+    if sent:
+        current_app.logger.info(f"Relayed {sent} listing events.")
+    return sent
@@ -1,80 +1,269 @@
-from locust import HttpUser, task, between
+"""
+Load test for the marketplace: authenticated users walking through weighted journeys.
+
+Every simulated user logs in as one of the seeded fixture users (see
+benchmarks/fixtures.py and benchmarks/seed_fixtures.py) and repeatedly picks a
+journey:
+
+    browse   (6)  listings page -> next page -> search -> listing detail
+    shop     (3)  search -> detail -> add to wishlist -> view wishlist -> remove
+    sell     (1)  account -> create listing -> view it -> my listings -> delete it
+
+When the run ends, every endpoint is checked against the p50/p95/p99 and failure
+ratio thresholds in benchmarks/slo.json and a breach makes locust exit with 1.
+--report-file writes the results as JSON, which benchmarks/compare_reports.py
+diffs between releases.
+
+Usage (from uoft_secondhand_hub_rush_project/, services on their compose ports):
+    python benchmarks/seed_fixtures.py
+    locust -f locustfile.py --host http://localhost:5001 --headless \
+        -u 100 -r 10 -t 5m --report-file reports/bench.json
+
+USERS_HOST and SEARCH_HOST point at user_profile_service and search_engine
+(default localhost:5005 and localhost:5003).
+"""
+import itertools
+import json
+import os
 import random
+import sys
+import time
 import uuid
-import json
+from datetime import datetime
 
-# Base Locust test for Listings Service
-class ListingsServiceUser(HttpUser):
-    wait_time = between(1, 3)
+from locust import HttpUser, SequentialTaskSet, between, events, task
+from locust.runners import WorkerRunner
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'benchmarks'))
+
+import fixtures
+
+USERS_HOST = os.getenv('USERS_HOST', 'http://localhost:5005')
+SEARCH_HOST = os.getenv('SEARCH_HOST', 'http://localhost:5003')
+TEST_IMAGE = os.path.join(os.path.dirname(__file__), 'listings_service', 'test_image.jpg')
+DEFAULT_SLO_FILE = os.path.join(os.path.dirname(__file__), 'benchmarks', 'slo.json')
+PAGE_SIZE = 20
+
+# hands out fixture accounts round-robin, so concurrent users rarely share one
+_fixture_user_numbers = itertools.count()
+
+@events.init_command_line_parser.add_listener
+def add_benchmark_arguments(parser):
+    parser.add_argument('--slo-file', default=DEFAULT_SLO_FILE, help='Latency/failure thresholds to enforce')
+    parser.add_argument('--report-file', default='', help='Write a JSON report of the run here')
 
+class BrowseJourney(SequentialTaskSet):
     @task
-    def get_all_listings(self):
-        self.client.get("/api/listings/all")
+    def first_page(self):
+        self.user.load_listings_page()
 
     @task
-    def upload_listing_image(self):
-        with open("test_image.jpg", "rb") as file:
-            self.client.post("/api/listings/upload", files={"file": file})
+    def next_page(self):
+        self.user.load_listings_page(self.user.next_cursor)
 
     @task
-    def create_listing(self):
-        data = {
-            "id": str(uuid.uuid4()),
-            "title": "Test Listing",
-            "description": "This is a test listing",
-            "price": "100.00",
-            "location": "Toronto",
-            "condition": "new",
-            "category": "electronics",
-            "datePosted": "2024-01-01",
-            "sellerId": str(uuid.uuid4()),
-            "sellerName": "Test Seller"
-        }
-        files = {'file': open("test_image.jpg", "rb")}
-        self.client.post("/api/listings/create-listing", data=data, files=files)
+    def search(self):
+        self.user.search()
 
     @task
-    def delete_listing(self):
-        listing_id = str(uuid.uuid4())  # Assume listing exists
-        self.client.delete(f"/api/listings/delete/{listing_id}")
+    def detail(self):
+        self.user.view_listing(self.user.pick_listing_id())
+        self.interrupt()
 
-# Base Locust test for User Profile Service
-class UserProfileServiceUser(HttpUser):
-    wait_time = between(1, 3)
+class ShopJourney(SequentialTaskSet):
+    @task
+    def search(self):
+        self.user.search()
 
     @task
-    def register_user(self):
-        data = {
-            "username": f"user_{random.randint(1, 1000)}",
-            "email": f"user{random.randint(1, 1000)}@test.com",
-            "password": "password123"
-        }
-        self.client.post("/api/users/pre_register", json=data)
+    def detail(self):
+        self.listing_id = self.user.pick_listing_id()
+        self.user.view_listing(self.listing_id)
 
     @task
-    def login_user(self):
-        data = {
-            "email": "user@test.com",
-            "password": "password123"
-        }
-        self.client.post("/api/users/login", json=data)
+    def add_to_wishlist(self):
+        self.user.client.post(f'{USERS_HOST}/api/users/wishlist', json={'listingId': self.listing_id},
+                              headers=self.user.auth_headers, name='POST /api/users/wishlist')
 
     @task
-    def get_user_info(self):
-        self.client.get("/api/users/current_user_info")  # Assuming authentication
+    def view_wishlist(self):
+        with self.user.client.get(f'{USERS_HOST}/api/users/wishlist/get', headers=self.user.auth_headers,
+                                  name='GET /api/users/wishlist/get', catch_response=True) as response:
+            wishlist = list(response.json().get('wishlist', [])) if response.ok else []
+        if wishlist:
+            self.user.client.post('/api/listings/batch', json={'ids': wishlist}, name='POST /api/listings/batch')
 
     @task
-    def update_user_profile(self):
+    def remove_from_wishlist(self):
+        self.user.client.delete(f'{USERS_HOST}/api/users/wishlist/{self.listing_id}', headers=self.user.auth_headers,
+                                name='DELETE /api/users/wishlist/[id]')
+        self.interrupt()
+
+class SellJourney(SequentialTaskSet):
+    @task
+    def account(self):
+        self.user.client.get(f'{USERS_HOST}/api/users/current_user_info', headers=self.user.auth_headers,
+                             name='GET /api/users/current_user_info')
+
+    @task
+    def create_listing(self):
+        # created listings are deleted again at the end of the journey, so the dataset stays the seeded one
+        self.listing_id = f'bench-created-{uuid.uuid4()}'
         data = {
-            "username": f"user_{random.randint(1, 1000)}",
-            "location": "Toronto",
-            "categories": ["electronics", "furniture"]
+            'id': self.listing_id,
+            'title': 'Benchmark desk lamp',
+            'description': 'Created by the load test, deleted right after.',
+            'price': '25.00',
+            'location': 'St. George',
+            'condition': 'Used',
+            'category': 'furniture',
+            'datePosted': datetime.utcnow().isoformat(),
+            'sellerId': self.user.user_id,
+            'sellerName': self.user.username,
         }
-        self.client.post("/api/users/edit_user", data=data)
+        with open(TEST_IMAGE, 'rb') as image:
+            self.created = self.user.client.post('/api/listings/create-listing', data=data,
+                                                 files={'file': ('lamp.jpg', image, 'image/jpeg')},
+                                                 name='POST /api/listings/create-listing').ok
 
     @task
-    def forgot_password(self):
-        data = {
-            "email": "user@test.com"
+    def view_created(self):
+        if self.created:
+            self.user.view_listing(self.listing_id)
+
+    @task
+    def my_listings(self):
+        self.user.client.get(f'/api/listings/user/{self.user.user_id}', name='GET /api/listings/user/[sellerId]')
+
+    @task
+    def delete_created(self):
+        if self.created:
+            self.user.client.delete(f'/api/listings/delete/{self.listing_id}', name='DELETE /api/listings/delete/[id]')
+        self.interrupt()
+
+class MarketplaceUser(HttpUser):
+    wait_time = between(1, 3)
+    tasks = {BrowseJourney: 6, ShopJourney: 3, SellJourney: 1}
+
+    def on_start(self):
+        number = next(_fixture_user_numbers) % fixtures.USER_COUNT
+        self.user_id = fixtures.user_id(number)
+        self.username = f'bench_user_{number:04d}'
+        self.auth_headers = {}
+        self.next_cursor = None
+        self.seen_listing_ids = []
+
+        with self.client.post(f'{USERS_HOST}/api/users/login', name='POST /api/users/login', catch_response=True,
+                              json={'email': fixtures.user_email(number), 'password': fixtures.PASSWORD}) as response:
+            if not response.ok:
+                response.failure(f'fixture login failed ({response.status_code}), were the fixtures seeded?')
+                return
+            self.auth_headers = {'Authorization': f"Bearer {response.json()['access_token']}"}
+
+    def load_listings_page(self, cursor=None):
+        if cursor:
+            url, name = f'/api/listings/all?limit={PAGE_SIZE}&cursor={cursor}', 'GET /api/listings/all?cursor=[cursor]'
+        else:
+            url, name = f'/api/listings/all?limit={PAGE_SIZE}', 'GET /api/listings/all?limit=[n]'
+        with self.client.get(url, name=name, catch_response=True) as response:
+            if response.ok:
+                body = response.json()
+                self.next_cursor = body.get('nextCursor')
+                self.remember_listings(body.get('listings', []))
+
+    def search(self):
+        term = random.choice(fixtures.SEARCH_TERMS)
+        with self.client.get(f'{SEARCH_HOST}/api/search?q={term}&limit={PAGE_SIZE}', name='GET /api/search?q=[term]',
+                             catch_response=True) as response:
+            if response.ok:
+                self.remember_listings(response.json().get('listings', []))
+
+    def view_listing(self, listing_id):
+        self.client.get(f'/api/listings/{listing_id}', name='GET /api/listings/[id]')
+
+    def remember_listings(self, listings):
+        # later steps open listings the user actually saw, like a real visitor would
+        self.seen_listing_ids = [listing['id'] for listing in listings if 'id' in listing] or self.seen_listing_ids
+        if self.seen_listing_ids and self.auth_headers:
+            self.client.post(f'{USERS_HOST}/api/users/wishlist/check_bulk', json={'listingIds': self.seen_listing_ids},
+                             headers=self.auth_headers, name='POST /api/users/wishlist/check_bulk')
+
+    def pick_listing_id(self):
+        if self.seen_listing_ids:
+            return random.choice(self.seen_listing_ids)
+        return fixtures.listing_id(random.randrange(fixtures.LISTING_COUNT))
+
+def load_slos(path):
+    with open(path) as f:
+        slos = json.load(f)
+    return slos.get('default', {}), slos.get('endpoints', {})
+
+def check_slos(entry, thresholds):
+    """Returns a description of every threshold this endpoint's stats breach."""
+    breaches = []
+    for percentile in ('p50', 'p95', 'p99'):
+        limit = thresholds.get(percentile)
+        actual = entry.get_response_time_percentile(int(percentile[1:]) / 100)
+        if limit is not None and actual > limit:
+            breaches.append(f'{percentile} {actual:.0f} ms > {limit} ms')
+    max_failure_ratio = thresholds.get('max_failure_ratio')
+    if max_failure_ratio is not None and entry.fail_ratio > max_failure_ratio:
+        breaches.append(f'failure ratio {entry.fail_ratio:.3f} > {max_failure_ratio}')
+    return breaches
+
+@events.quitting.add_listener
+def enforce_slos_and_report(environment, **kwargs):
+    # in distributed runs only the master has the aggregated stats
+    if isinstance(environment.runner, WorkerRunner):
+        return
+
+    options = environment.parsed_options
+    default_slo, endpoint_slos = load_slos(options.slo_file)
+
+    endpoints = {}
+    violations = []
+    for entry in sorted(environment.stats.entries.values(), key=lambda e: e.name):
+        if not entry.num_requests:
+            continue
+        thresholds = {**default_slo, **endpoint_slos.get(entry.name, {})}
+        breaches = check_slos(entry, thresholds)
+        violations.extend(f'{entry.name}: {breach}' for breach in breaches)
+        endpoints[entry.name] = {
+            'requests': entry.num_requests,
+            'failures': entry.num_failures,
+            'rps': round(entry.total_rps, 2),
+            'avg_ms': round(entry.avg_response_time, 1),
+            'p50_ms': entry.get_response_time_percentile(0.5),
+            'p95_ms': entry.get_response_time_percentile(0.95),
+            'p99_ms': entry.get_response_time_percentile(0.99),
+            'slo': thresholds,
+            'passed': not breaches,
+        }
+
+    for violation in violations:
+        print(f'SLO breach: {violation}')
+    if violations:
+        environment.process_exit_code = 1
+
+    if options.report_file:
+        total = environment.stats.total
+        report = {
+            'generated_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'users': options.num_users,
+            'run_time': options.run_time,
+            'fixtures': {'seed': fixtures.SEED, 'users': fixtures.USER_COUNT, 'listings': fixtures.LISTING_COUNT},
+            'total': {
+                'requests': total.num_requests,
+                'failures': total.num_failures,
+                'rps': round(total.total_rps, 2),
+                'p50_ms': total.get_response_time_percentile(0.5),
+                'p95_ms': total.get_response_time_percentile(0.95),
+                'p99_ms': total.get_response_time_percentile(0.99),
+            },
+            'endpoints': endpoints,
+            'slo_violations': violations,
+            'passed': not violations,
         }
-        self.client.post("/api/users/forgot_password", json=data)
+        os.makedirs(os.path.dirname(os.path.abspath(options.report_file)), exist_ok=True)
+        with open(options.report_file, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
@@ -0,0 +1,83 @@
+import threading
+import time
+from collections import OrderedDict
+
+# Hot cache of seller aggregates for reputation reads. Each process keeps an LRU
+# of up to RATING_CACHE_MAX_ENTRIES aggregates for RATING_CACHE_TTL seconds, and a
+# batch lookup only goes to DynamoDB for the sellers it is missing.
+#
+# Ratings written through this process put the new aggregate straight into the
+# cache. Other processes serve their copy until its TTL runs out, so a seller's
+# score can lag a new rating by up to RATING_CACHE_TTL seconds.
+
+class AggregateCache:
+    def __init__(self, max_entries=10000, ttl_seconds=60.0, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # seller id -> (expires_at, aggregate), least recently used first
+        # bumped by every write, so a load that raced with a write is not cached
+        self._generation = 0
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'writes': 0}
+
+    @property
+    def enabled(self):
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def get_many(self, keys, load_many):
+        """
+        Returns {key: aggregate} for every key, calling `load_many(missing_keys)` once
+        for the keys that are not cached. load_many must return a value for each key.
+        """
+        keys = list(dict.fromkeys(keys))
+        if not self.enabled:
+            return load_many(keys) if keys else {}
+
+        found, missing = {}, []
+        with self._lock:
+            now = self._clock()
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] > now:
+                    self._entries.move_to_end(key)
+                    found[key] = dict(entry[1])
+                else:
+                    missing.append(key)
+            self._stats['hits'] += len(found)
+            self._stats['misses'] += len(missing)
+            generation = self._generation
+
+        if missing:
+            loaded = load_many(missing)
+            with self._lock:
+                if generation == self._generation:
+                    for key in missing:
+                        self._store(key, loaded[key])
+            found.update((key, dict(loaded[key])) for key in missing)
+        return found
+
+    def put(self, key, aggregate):
+        """Caches the aggregate this process just wrote."""
+        with self._lock:
+            self._generation += 1
+            self._stats['writes'] += 1
+            if self.enabled:
+                self._store(key, dict(aggregate))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, size=len(self._entries), max_entries=self.max_entries,
+                        ttl_seconds=self.ttl_seconds)
+
+    def _store(self, key, aggregate):
+        self._entries.pop(key, None)
+        self._entries[key] = (self._clock() + self.ttl_seconds, aggregate)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats['evictions'] += 1
@@ -1,11 +1,148 @@
-from flask import Flask
+import traceback
+from flask import Flask, request, jsonify
+from flask_cors import CORS
+from flask_jwt_extended import JWTManager, jwt_required, get_jwt_identity
+from ratings import MIN_SCORE, MAX_SCORE
+from ratings import format_aggregate
+from utils import RatingConflictError
+from utils import get_seller_aggregate
+from utils import get_seller_aggregates
+from utils import get_aggregate_cache_stats
+from utils import get_rating
+from utils import get_listing_seller
+from utils import submit_rating
+from utils import delete_rating
 
 app = Flask(__name__)
+CORS(app)
 app.config.from_pyfile('config.py')
+jwt = JWTManager(app)
 
 @app.route('/')
 def home():
     return 'Hello from rating service'
 
+@app.route('/health', methods=['GET'])
+def simple_health_check():
+    return jsonify({'status': 'healthy'}), 200
+
+def format_rating(rating):
+    return {**rating, 'score': int(rating['score'])}
+
+@app.route('/api/ratings/seller/<seller_id>', methods=['GET'])
+def get_seller_rating(seller_id):
+    """Seller reputation, read from the aggregate cache or the seller's aggregate item."""
+    try:
+        aggregate = get_seller_aggregate(seller_id)
+        return jsonify({'rating': format_aggregate(aggregate, app.config['RATING_PRIOR_MEAN'])}), 200
+    except Exception as e:
+        print(f"Error fetching seller rating: {str(e)}")
+        traceback.print_exc()
+        return jsonify({'error': 'Failed to fetch seller rating'}), 500
+
+@app.route('/api/ratings/sellers', methods=['POST'])
+def get_seller_ratings_batch():
+    """
+    Returns the reputation of many sellers in one call (e.g. for a grid of listing cards).
+
+    Body: {"ids": [...]}. Every requested seller is in "ratings", keyed by seller id;
+    sellers nobody rated yet get a count of 0 and the prior as score.
+    """
+    data = request.get_json(silent=True) or {}
+    seller_ids = data.get('ids')
+    if not isinstance(seller_ids, list) or not all(isinstance(seller_id, str) and seller_id for seller_id in seller_ids):
+        return jsonify({'error': 'ids must be a list of seller ids'}), 400
+    if len(seller_ids) > app.config['RATINGS_BATCH_MAX_IDS']:
+        return jsonify({'error': f"At most {app.config['RATINGS_BATCH_MAX_IDS']} ids per request"}), 400
+
+    try:
+        aggregates = get_seller_aggregates(seller_ids)
+        return jsonify({
+            'ratings': {seller_id: format_aggregate(aggregate, app.config['RATING_PRIOR_MEAN'])
+                        for seller_id, aggregate in aggregates.items()}
+        }), 200
+    except Exception as e:
+        print(f"Error fetching seller ratings batch: {str(e)}")
+        traceback.print_exc()
+        return jsonify({'error': 'Failed to fetch seller ratings'}), 500
+
+@app.route('/api/ratings/metrics', methods=['GET'])
+def metrics():
+    return jsonify({'aggregate_cache': get_aggregate_cache_stats()}), 200
+
+@app.route('/api/ratings/listing/<listing_id>', methods=['GET'])
+@jwt_required()
+def get_my_rating(listing_id):
+    """The current buyer's rating for this listing, if they left one."""
+    try:
+        rating = get_rating(listing_id, get_jwt_identity())
+        if rating is None:
+            return jsonify({'error': 'Rating not found'}), 404
+        return jsonify({'rating': format_rating(rating)}), 200
+    except Exception as e:
+        print(f"Error fetching rating: {str(e)}")
+        traceback.print_exc()
+        return jsonify({'error': 'Failed to fetch rating'}), 500
+
+@app.route('/api/ratings', methods=['POST'])
+@jwt_required()
+def rate_seller():
+    """
+    Rates the seller of a listing the buyer bought; rating the same listing again replaces it.
+
+    JSON body: listingId, score (an integer from 1 to 5) and an optional comment. The
+    seller is read from the listing; a sellerId in the body must match it.
+    """
+    data = request.get_json(silent=True) or {}
+    buyer_id = get_jwt_identity()
+    listing_id = data.get('listingId')
+    score = data.get('score')
+    comment = data.get('comment') or ''
+
+    if not listing_id or not isinstance(listing_id, str):
+        return jsonify({'error': 'listingId is required'}), 400
+    if not isinstance(score, int) or isinstance(score, bool) or not MIN_SCORE <= score <= MAX_SCORE:
+        return jsonify({'error': f'score must be an integer from {MIN_SCORE} to {MAX_SCORE}'}), 400
+    if not isinstance(comment, str) or len(comment) > app.config['RATING_MAX_COMMENT_LENGTH']:
+        return jsonify({'error': f"comment must be text of at most {app.config['RATING_MAX_COMMENT_LENGTH']} characters"}), 400
+
+    try:
+        seller_id = get_listing_seller(listing_id)
+        if seller_id is None:
+            return jsonify({'error': 'Listing not found'}), 404
+        if data.get('sellerId') not in (None, seller_id):
+            return jsonify({'error': 'sellerId does not match the listing'}), 400
+        if seller_id == buyer_id:
+            return jsonify({'error': 'You cannot rate yourself'}), 400
+
+        rating, aggregate = submit_rating(seller_id, listing_id, buyer_id, score, comment)
+        return jsonify({
+            'rating': format_rating(rating),
+            'seller': format_aggregate(aggregate, app.config['RATING_PRIOR_MEAN'])
+        }), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except RatingConflictError as e:
+        return jsonify({'error': str(e)}), 409
+    except Exception as e:
+        print(f"Error saving rating: {str(e)}")
+        traceback.print_exc()
+        return jsonify({'error': 'Failed to save rating'}), 500
+
+@app.route('/api/ratings/listing/<listing_id>', methods=['DELETE'])
+@jwt_required()
+def remove_rating(listing_id):
+    try:
+        aggregate = delete_rating(listing_id, get_jwt_identity())
+        if aggregate is None:
+            return jsonify({'error': 'Rating not found'}), 404
+        return jsonify({'seller': format_aggregate(aggregate, app.config['RATING_PRIOR_MEAN'])}), 200
+    except RatingConflictError as e:
+        return jsonify({'error': str(e)}), 409
+    except Exception as e:
+        print(f"Error deleting rating: {str(e)}")
+        traceback.print_exc()
+        return jsonify({'error': 'Failed to delete rating'}), 500
+
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000)
\ No newline at end of file
+    app.run(host='0.0.0.0', port=5000)
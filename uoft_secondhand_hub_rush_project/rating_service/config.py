@@ -1,3 +1,31 @@
 import os
 
 JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY')
+
+# AWS configuration: raw buyer -> seller ratings, one aggregate item per seller, and
+# the listings table a rated listing's seller is read from
+AWS_ACCESS_KEY_ID = os.getenv('AWS_ACCESS_KEY_ID')
+AWS_SECRET_ACCESS_KEY = os.getenv('AWS_SECRET_ACCESS_KEY')
+AWS_DB_LISTINGS_TABLE_NAME = os.getenv('AWS_DB_LISTINGS_TABLE_NAME')
+AWS_DB_RATINGS_TABLE_NAME = os.getenv('AWS_DB_RATINGS_TABLE_NAME')
+AWS_DB_SELLER_RATINGS_TABLE_NAME = os.getenv('AWS_DB_SELLER_RATINGS_TABLE_NAME')
+AWS_S3_REGION = os.getenv('AWS_S3_REGION', 'us-east-2')
+
+# Bayesian smoothing of seller scores: a seller starts as if they already had
+# RATING_PRIOR_WEIGHT ratings of RATING_PRIOR_MEAN stars
+RATING_PRIOR_MEAN = float(os.getenv('RATING_PRIOR_MEAN', 3.5))
+RATING_PRIOR_WEIGHT = float(os.getenv('RATING_PRIOR_WEIGHT', 5))
+
+# Attempts at writing a rating when it races with other ratings of the same seller
+RATING_WRITE_ATTEMPTS = int(os.getenv('RATING_WRITE_ATTEMPTS', 5))
+
+# Longest comment a buyer can leave with a rating
+RATING_MAX_COMMENT_LENGTH = int(os.getenv('RATING_MAX_COMMENT_LENGTH', 1000))
+
+# Per-process cache of seller aggregates: how many are kept, and for how many seconds
+# a worker may serve a score that another worker has since changed (0 disables it)
+RATING_CACHE_MAX_ENTRIES = int(os.getenv('RATING_CACHE_MAX_ENTRIES', 10000))
+RATING_CACHE_TTL = float(os.getenv('RATING_CACHE_TTL', 60))
+
+# Most seller ids accepted by one batch lookup
+RATINGS_BATCH_MAX_IDS = int(os.getenv('RATINGS_BATCH_MAX_IDS', 200))
@@ -0,0 +1,67 @@
+"""
+Per-seller rating aggregates, maintained incrementally as buyers rate sellers.
+
+Each seller has one aggregate item holding everything a listing card or profile
+page shows, so reputation is a single key lookup instead of a scan of raw ratings:
+
+    ratingCount   number of ratings
+    ratingSum     sum of their scores
+    mean          ratingSum / ratingCount
+    score         Bayesian-smoothed mean, which pulls sellers with few ratings
+                  towards the prior:
+
+                      (prior_weight * prior_mean + ratingSum) / (prior_weight + ratingCount)
+
+    version       bumped on every change, for optimistic concurrency
+
+apply_rating folds one added, changed or removed rating into an aggregate.
+"""
+from decimal import Decimal
+
+MIN_SCORE = 1
+MAX_SCORE = 5
+
+def smoothed_score(count, total, prior_mean, prior_weight):
+    return (prior_weight * prior_mean + total) / (prior_weight + count) if prior_weight + count else prior_mean
+
+def _decimal(value):
+    # DynamoDB numbers must be Decimal, and 4 places is plenty for a star rating
+    return Decimal(str(round(value, 4)))
+
+def empty_aggregate(seller_id):
+    return {'id': seller_id, 'ratingCount': 0, 'ratingSum': 0, 'version': 0}
+
+def apply_rating(aggregate, old_score=None, new_score=None, prior_mean=3.5, prior_weight=5):
+    """
+    Returns the seller's aggregate after one rating changed.
+
+    Args:
+        aggregate (dict): current aggregate item (see empty_aggregate).
+        old_score (int): the buyer's previous score, or None if this is a new rating.
+        new_score (int): the buyer's new score, or None if the rating was removed.
+    """
+    count = int(aggregate['ratingCount']) + (new_score is not None) - (old_score is not None)
+    total = int(aggregate['ratingSum']) + (new_score or 0) - (old_score or 0)
+    updated = {
+        **aggregate,
+        'ratingCount': count,
+        'ratingSum': total,
+        'score': _decimal(smoothed_score(count, total, prior_mean, prior_weight)),
+        'version': int(aggregate.get('version', 0)) + 1,
+    }
+    if count:
+        updated['mean'] = _decimal(total / count)
+    else:
+        updated.pop('mean', None)
+    return updated
+
+def format_aggregate(aggregate, prior_mean=3.5):
+    """JSON shape of a seller's reputation; sellers nobody rated yet get the prior as score."""
+    count = int(aggregate.get('ratingCount', 0))
+    return {
+        'sellerId': aggregate['id'],
+        'count': count,
+        'sum': int(aggregate.get('ratingSum', 0)),
+        'mean': float(aggregate['mean']) if count and 'mean' in aggregate else None,
+        'score': float(aggregate['score']) if 'score' in aggregate else float(prior_mean),
+    }
@@ -0,0 +1,245 @@
+import threading
+import boto3
+import pytest
+from decimal import Decimal
+from flask_jwt_extended import create_access_token
+from moto import mock_aws
+from app import app
+from aggregate_cache import AggregateCache
+from ratings import apply_rating, empty_aggregate, format_aggregate, smoothed_score
+import utils
+from utils import reset_aggregate_cache
+
+TEST_REGION = 'us-east-2'
+RATINGS_TABLE = 'test-ratings-table'
+LISTINGS_TABLE = 'test-listings-table'
+SELLER_RATINGS_TABLE = 'test-seller-ratings-table'
+
+def test_apply_rating_adds_changes_and_removes_scores():
+    aggregate = apply_rating(empty_aggregate('seller'), new_score=5, prior_mean=3.5, prior_weight=5)
+    aggregate = apply_rating(aggregate, new_score=2, prior_mean=3.5, prior_weight=5)
+    assert (aggregate['ratingCount'], aggregate['ratingSum'], aggregate['mean']) == (2, 7, Decimal('3.5'))
+    assert aggregate['version'] == 2
+
+    aggregate = apply_rating(aggregate, old_score=2, new_score=4, prior_mean=3.5, prior_weight=5)
+    assert (aggregate['ratingCount'], aggregate['ratingSum'], aggregate['mean']) == (2, 9, Decimal('4.5'))
+    assert aggregate['score'] == Decimal(str(round((5 * 3.5 + 9) / 7, 4)))
+
+    aggregate = apply_rating(aggregate, old_score=5, prior_mean=3.5, prior_weight=5)
+    aggregate = apply_rating(aggregate, old_score=4, prior_mean=3.5, prior_weight=5)
+    assert (aggregate['ratingCount'], aggregate['ratingSum']) == (0, 0)
+    assert 'mean' not in aggregate
+    assert aggregate['score'] == Decimal('3.5')
+
+def test_smoothed_score_favours_many_good_ratings_over_one_perfect_one():
+    one_perfect = smoothed_score(1, 5, prior_mean=3.5, prior_weight=5)
+    many_good = smoothed_score(40, 40 * 4.6, prior_mean=3.5, prior_weight=5)
+    assert one_perfect < many_good < 4.6
+
+def test_format_aggregate_of_unrated_seller():
+    assert format_aggregate(empty_aggregate('seller'), prior_mean=3.5) == {
+        'sellerId': 'seller', 'count': 0, 'sum': 0, 'mean': None, 'score': 3.5
+    }
+
+@pytest.fixture
+def client():
+    with mock_aws():
+        app.config.update(
+            TESTING=True,
+            JWT_SECRET_KEY='ratings-test-secret-key-0123456789abcdef',
+            AWS_ACCESS_KEY_ID='testing',
+            AWS_SECRET_ACCESS_KEY='testing',
+            AWS_S3_REGION=TEST_REGION,
+            AWS_DB_RATINGS_TABLE_NAME=RATINGS_TABLE,
+            AWS_DB_SELLER_RATINGS_TABLE_NAME=SELLER_RATINGS_TABLE,
+            AWS_DB_LISTINGS_TABLE_NAME=LISTINGS_TABLE,
+        )
+        reset_aggregate_cache()
+        dynamodb = boto3.resource('dynamodb', region_name=TEST_REGION)
+        for name in (RATINGS_TABLE, SELLER_RATINGS_TABLE, LISTINGS_TABLE):
+            dynamodb.create_table(
+                TableName=name,
+                KeySchema=[{'AttributeName': 'id', 'KeyType': 'HASH'}],
+                AttributeDefinitions=[{'AttributeName': 'id', 'AttributeType': 'S'}],
+                BillingMode='PAY_PER_REQUEST',
+            )
+        with app.test_client() as client:
+            yield client
+
+def auth_headers(user_id):
+    with app.app_context():
+        return {'Authorization': f'Bearer {create_access_token(identity=user_id)}'}
+
+def add_listing(listing_id, seller_id):
+    boto3.resource('dynamodb', region_name=TEST_REGION).Table(LISTINGS_TABLE).put_item(
+        Item={'id': listing_id, 'title': listing_id.title(), 'sellerId': seller_id})
+
+def rate(client, buyer_id, listing_id, score, seller_id='seller'):
+    add_listing(listing_id, seller_id)
+    return client.post('/api/ratings', headers=auth_headers(buyer_id),
+                       json={'listingId': listing_id, 'score': score, 'comment': 'Smooth pickup'})
+
+def seller_rating(client, seller_id='seller'):
+    response = client.get(f'/api/ratings/seller/{seller_id}')
+    assert response.status_code == 200
+    return response.get_json()['rating']
+
+def test_ratings_update_the_seller_aggregate(client):
+    assert rate(client, 'alice', 'desk', 5).status_code == 200
+    response = rate(client, 'bob', 'chair', 3)
+    assert response.status_code == 200
+    assert response.get_json()['seller']['count'] == 2
+
+    rating = seller_rating(client)
+    assert (rating['count'], rating['sum'], rating['mean']) == (2, 8, 4.0)
+    assert rating['score'] == pytest.approx((5 * 3.5 + 8) / 7, abs=1e-4)
+
+def test_rating_a_listing_again_replaces_the_old_score(client):
+    rate(client, 'alice', 'desk', 1)
+    rate(client, 'alice', 'desk', 4)
+    assert (seller_rating(client)['count'], seller_rating(client)['sum']) == (1, 4)
+
+    response = client.get('/api/ratings/listing/desk', headers=auth_headers('alice'))
+    assert response.get_json()['rating']['score'] == 4
+    assert response.get_json()['rating']['comment'] == 'Smooth pickup'
+
+def test_deleting_a_rating_removes_it_from_the_aggregate(client):
+    rate(client, 'alice', 'desk', 5)
+    rate(client, 'bob', 'chair', 2)
+    assert client.delete('/api/ratings/listing/desk', headers=auth_headers('alice')).status_code == 200
+    assert (seller_rating(client)['count'], seller_rating(client)['sum']) == (1, 2)
+    assert client.delete('/api/ratings/listing/desk', headers=auth_headers('alice')).status_code == 404
+    assert client.get('/api/ratings/listing/desk', headers=auth_headers('alice')).status_code == 404
+
+def test_concurrent_ratings_are_all_counted(client):
+    buyers = [f'buyer-{i}' for i in range(8)]
+
+    def rate_in_thread(buyer_id):
+        with app.test_client() as thread_client:
+            assert rate(thread_client, buyer_id, f'listing-{buyer_id}', 4).status_code == 200
+
+    app.config['RATING_WRITE_ATTEMPTS'] = 50
+    try:
+        threads = [threading.Thread(target=rate_in_thread, args=(buyer_id,)) for buyer_id in buyers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        app.config['RATING_WRITE_ATTEMPTS'] = 5
+
+    assert (seller_rating(client)['count'], seller_rating(client)['sum']) == (8, 32)
+
+def test_unrated_seller_gets_the_prior(client):
+    assert seller_rating(client, 'nobody') == {'sellerId': 'nobody', 'count': 0, 'sum': 0, 'mean': None, 'score': 3.5}
+
+@pytest.mark.parametrize('body', [
+    {'score': 5},
+    {'listingId': 'desk', 'score': 6},
+    {'listingId': 'desk', 'score': 4.5},
+    {'listingId': 'desk', 'score': True},
+    {'listingId': 'desk', 'score': 5, 'sellerId': 'someone-else'},
+    {'listingId': 'alices-desk', 'score': 5},
+])
+def test_rate_seller_rejects_bad_ratings(client, body):
+    add_listing('desk', 'seller')
+    add_listing('alices-desk', 'alice')
+    assert client.post('/api/ratings', headers=auth_headers('alice'), json=body).status_code == 400
+    assert seller_rating(client)['count'] == 0
+
+def test_rating_takes_the_seller_from_the_listing(client):
+    add_listing('desk', 'seller')
+    response = client.post('/api/ratings', headers=auth_headers('alice'),
+                           json={'listingId': 'desk', 'sellerId': 'seller', 'score': 5})
+    assert response.status_code == 200
+    assert response.get_json()['rating']['sellerId'] == 'seller'
+    assert seller_rating(client)['count'] == 1
+
+def test_rating_a_missing_listing_is_rejected(client):
+    response = client.post('/api/ratings', headers=auth_headers('alice'), json={'listingId': 'made-up', 'score': 1})
+    assert response.status_code == 404
+    assert seller_rating(client)['count'] == 0
+
+def test_rate_seller_requires_a_token(client):
+    assert client.post('/api/ratings', json={'sellerId': 'seller', 'listingId': 'desk', 'score': 5}).status_code == 401
+
+def test_aggregate_cache_loads_only_missing_keys_in_one_call():
+    cache = AggregateCache(max_entries=10, ttl_seconds=60)
+    calls = []
+
+    def load_many(keys):
+        calls.append(keys)
+        return {key: empty_aggregate(key) for key in keys}
+
+    cache.get_many(['a', 'b'], load_many)
+    assert set(cache.get_many(['b', 'a', 'c', 'c'], load_many)) == {'a', 'b', 'c'}
+    assert calls == [['a', 'b'], ['c']]
+    assert cache.stats()['hits'] == 2
+
+def test_aggregate_cache_evicts_and_expires():
+    now = [0.0]
+    cache = AggregateCache(max_entries=2, ttl_seconds=30, clock=lambda: now[0])
+    loads = []
+
+    def load_many(keys):
+        loads.extend(keys)
+        return {key: empty_aggregate(key) for key in keys}
+
+    cache.get_many(['a', 'b'], load_many)
+    cache.get_many(['a'], load_many)
+    cache.get_many(['c'], load_many)  # evicts b, the least recently used
+    cache.get_many(['a', 'b'], load_many)
+    assert loads == ['a', 'b', 'c', 'b']
+
+    now[0] = 31
+    cache.get_many(['a'], load_many)
+    assert loads[-1] == 'a'
+
+def test_aggregate_cache_drops_loads_that_race_with_a_write():
+    cache = AggregateCache()
+
+    def stale_load(keys):
+        cache.put('a', {**empty_aggregate('a'), 'ratingCount': 1})  # a rating lands mid-read
+        return {'a': empty_aggregate('a')}
+
+    assert cache.get_many(['a'], stale_load)['a']['ratingCount'] == 0
+    assert cache.get_many(['a'], lambda keys: {})['a']['ratingCount'] == 1
+
+def test_batch_lookup_returns_every_seller(client):
+    rate(client, 'alice', 'desk', 5, seller_id='sam')
+    rate(client, 'alice', 'lamp', 3, seller_id='sue')
+
+    response = client.post('/api/ratings/sellers', json={'ids': ['sam', 'sue', 'nobody', 'sam']})
+    assert response.status_code == 200
+    ratings = response.get_json()['ratings']
+    assert set(ratings) == {'sam', 'sue', 'nobody'}
+    assert (ratings['sam']['count'], ratings['sam']['mean']) == (1, 5.0)
+    assert (ratings['sue']['count'], ratings['sue']['mean']) == (1, 3.0)
+    assert ratings['nobody']['count'] == 0
+
+def test_batch_lookup_is_served_from_the_cache(client, monkeypatch):
+    seller_ids = [f'seller-{i:03d}' for i in range(150)]
+    batch_gets = []
+    real_load = utils._load_seller_aggregates
+    monkeypatch.setattr(utils, '_load_seller_aggregates', lambda ids: batch_gets.append(ids) or real_load(ids))
+
+    assert len(client.post('/api/ratings/sellers', json={'ids': seller_ids}).get_json()['ratings']) == 150
+    assert len(client.post('/api/ratings/sellers', json={'ids': seller_ids[:20]}).get_json()['ratings']) == 20
+    assert batch_gets == [seller_ids]
+    assert client.get('/api/ratings/metrics').get_json()['aggregate_cache']['hits'] == 20
+
+    # this process's writes go straight into the cache
+    rate(client, 'alice', 'desk', 4, seller_id='seller-000')
+    assert client.post('/api/ratings/sellers', json={'ids': ['seller-000']}).get_json()['ratings']['seller-000']['count'] == 1
+    assert len(batch_gets) == 1
+
+@pytest.mark.parametrize('body', [{}, {'ids': 'seller'}, {'ids': [1, 2]}, {'ids': ['']}])
+def test_batch_lookup_rejects_bad_ids(client, body):
+    assert client.post('/api/ratings/sellers', json=body).status_code == 400
+
+def test_batch_lookup_limits_ids(client):
+    app.config['RATINGS_BATCH_MAX_IDS'] = 2
+    try:
+        assert client.post('/api/ratings/sellers', json={'ids': ['a', 'b', 'c']}).status_code == 400
+    finally:
+        app.config['RATINGS_BATCH_MAX_IDS'] = 200
@@ -0,0 +1,202 @@
+import boto3
+import threading
+import time
+from datetime import datetime
+from botocore.exceptions import ClientError
+from flask import current_app
+from aggregate_cache import AggregateCache
+from ratings import apply_rating
+from ratings import empty_aggregate
+
+# BatchGetItem accepts at most 100 keys per request
+BATCH_GET_MAX_KEYS = 100
+BATCH_GET_MAX_ATTEMPTS = 5
+
+class RatingConflictError(Exception):
+    """Raised when a rating keeps losing races with concurrent writes for the same seller."""
+
+def _aws_kwargs():
+    return {
+        'region_name': current_app.config['AWS_S3_REGION'],
+        'aws_access_key_id': current_app.config['AWS_ACCESS_KEY_ID'],
+        'aws_secret_access_key': current_app.config['AWS_SECRET_ACCESS_KEY'],
+    }
+
+def get_dynamodb_resource():
+    return boto3.resource('dynamodb', **_aws_kwargs())
+
+def rating_id(listing_id, buyer_id):
+    # a buyer rates the seller once per listing they bought; rating again replaces it
+    return f'{listing_id}#{buyer_id}'
+
+def rating_key_fields(seller_id, listing_id, buyer_id):
+    return {'id': rating_id(listing_id, buyer_id), 'sellerId': seller_id, 'listingId': listing_id, 'buyerId': buyer_id}
+
+def _prior():
+    return {
+        'prior_mean': current_app.config['RATING_PRIOR_MEAN'],
+        'prior_weight': current_app.config['RATING_PRIOR_WEIGHT'],
+    }
+
+_aggregate_cache = None
+_aggregate_cache_lock = threading.Lock()
+
+def get_aggregate_cache():
+    global _aggregate_cache
+    if _aggregate_cache is None:
+        with _aggregate_cache_lock:
+            if _aggregate_cache is None:
+                _aggregate_cache = AggregateCache(
+                    max_entries=current_app.config['RATING_CACHE_MAX_ENTRIES'],
+                    ttl_seconds=current_app.config['RATING_CACHE_TTL']
+                )
+    return _aggregate_cache
+
+def reset_aggregate_cache():
+    """Drops the aggregate cache so it is rebuilt from the current config (used by tests)."""
+    global _aggregate_cache
+    with _aggregate_cache_lock:
+        _aggregate_cache = None
+
+def get_aggregate_cache_stats():
+    return get_aggregate_cache().stats()
+
+def _load_seller_aggregates(seller_ids):
+    """
+    Reads many aggregates with BatchGetItem, 100 keys per request, retrying keys
+    DynamoDB leaves unprocessed with exponential backoff.
+
+    Sellers nobody rated yet get an empty aggregate, so they are cached too.
+    """
+    dynamodb = get_dynamodb_resource()
+    table_name = current_app.config['AWS_DB_SELLER_RATINGS_TABLE_NAME']
+
+    aggregates = {seller_id: empty_aggregate(seller_id) for seller_id in seller_ids}
+    for start in range(0, len(seller_ids), BATCH_GET_MAX_KEYS):
+        request_items = {
+            table_name: {'Keys': [{'id': seller_id} for seller_id in seller_ids[start:start + BATCH_GET_MAX_KEYS]]}
+        }
+        for attempt in range(BATCH_GET_MAX_ATTEMPTS):
+            response = dynamodb.batch_get_item(RequestItems=request_items)
+            for aggregate in response.get('Responses', {}).get(table_name, []):
+                aggregates[aggregate['id']] = aggregate
+
+            request_items = response.get('UnprocessedKeys')
+            if not request_items:
+                break
+            time.sleep(0.05 * 2 ** attempt)
+        else:
+            raise RuntimeError(f"{len(request_items[table_name]['Keys'])} keys still unprocessed "
+                               f"after {BATCH_GET_MAX_ATTEMPTS} attempts")
+    return aggregates
+
+def get_seller_aggregates(seller_ids):
+    """Returns {seller id: aggregate item} for every seller, from the cache where possible."""
+    return get_aggregate_cache().get_many(seller_ids, _load_seller_aggregates)
+
+def get_seller_aggregate(seller_id):
+    """Returns the seller's aggregate item, or an empty one if nobody rated them yet."""
+    return get_seller_aggregates([seller_id])[seller_id]
+
+def get_listing_seller(listing_id):
+    """Returns the sellerId of a listing in the listings table, or None if there is no such listing."""
+    table = get_dynamodb_resource().Table(current_app.config['AWS_DB_LISTINGS_TABLE_NAME'])
+    listing = table.get_item(Key={'id': listing_id}, ProjectionExpression='sellerId').get('Item')
+    return listing.get('sellerId') if listing else None
+
+def get_rating(listing_id, buyer_id):
+    table = get_dynamodb_resource().Table(current_app.config['AWS_DB_RATINGS_TABLE_NAME'])
+    return table.get_item(Key={'id': rating_id(listing_id, buyer_id)}).get('Item')
+
+def _write_rating(seller_id, listing_id, buyer_id, build_rating):
+    """
+    Writes one rating change and the seller's new aggregate in a single transaction.
+
+    Both items are read first, and the transaction is conditional on neither having
+    changed since (the aggregate by its version, the rating by its updatedAt), so
+    concurrent ratings for the same seller never lose an update; the loser re-reads
+    and tries again, up to RATING_WRITE_ATTEMPTS times.
+
+    build_rating(old_rating) returns the new rating item, or None to delete it.
+    """
+    dynamodb = get_dynamodb_resource()
+    ratings_table = current_app.config['AWS_DB_RATINGS_TABLE_NAME']
+    aggregates_table = current_app.config['AWS_DB_SELLER_RATINGS_TABLE_NAME']
+    key = {'id': rating_id(listing_id, buyer_id)}
+
+    for _ in range(current_app.config['RATING_WRITE_ATTEMPTS']):
+        old_rating = dynamodb.Table(ratings_table).get_item(Key=key, ConsistentRead=True).get('Item')
+        aggregate = (dynamodb.Table(aggregates_table).get_item(Key={'id': seller_id}, ConsistentRead=True).get('Item')
+                     or empty_aggregate(seller_id))
+        new_rating = build_rating(old_rating)
+        new_aggregate = apply_rating(
+            aggregate,
+            old_score=int(old_rating['score']) if old_rating else None,
+            new_score=new_rating['score'] if new_rating else None,
+            **_prior()
+        )
+
+        if old_rating:
+            rating_condition = {'ConditionExpression': 'updatedAt = :old_updated_at',
+                                'ExpressionAttributeValues': {':old_updated_at': old_rating['updatedAt']}}
+        else:
+            rating_condition = {'ConditionExpression': 'attribute_not_exists(id)'}
+        rating_write = ({'Put': {'TableName': ratings_table, 'Item': new_rating, **rating_condition}} if new_rating
+                        else {'Delete': {'TableName': ratings_table, 'Key': key, **rating_condition}})
+
+        if aggregate['version']:
+            aggregate_condition = {'ConditionExpression': 'version = :old_version',
+                                   'ExpressionAttributeValues': {':old_version': aggregate['version']}}
+        else:
+            aggregate_condition = {'ConditionExpression': 'attribute_not_exists(id)'}
+
+        try:
+            dynamodb.meta.client.transact_write_items(TransactItems=[
+                rating_write,
+                {'Put': {'TableName': aggregates_table, 'Item': new_aggregate, **aggregate_condition}},
+            ])
+            get_aggregate_cache().put(seller_id, new_aggregate)
+            return new_rating, new_aggregate
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'TransactionCanceledException':
+                raise
+            current_app.logger.info(f"Rating write for seller {seller_id} raced with another write, retrying")
+
+    raise RatingConflictError(f"Could not update the rating of seller {seller_id}")
+
+def submit_rating(seller_id, listing_id, buyer_id, score, comment=''):
+    """
+    Stores the buyer's rating of the seller for this listing, replacing an earlier one.
+
+    Returns:
+        tuple: (rating item, seller aggregate item) as written.
+    """
+    def build_rating(old_rating):
+        if old_rating and old_rating['sellerId'] != seller_id:
+            raise ValueError(f"Listing {listing_id} was rated for seller {old_rating['sellerId']}, not {seller_id}")
+        now = datetime.utcnow().isoformat()
+        return {
+            **rating_key_fields(seller_id, listing_id, buyer_id),
+            'score': score,
+            'comment': comment,
+            'createdAt': old_rating['createdAt'] if old_rating else now,
+            'updatedAt': now,
+        }
+
+    rating, aggregate = _write_rating(seller_id, listing_id, buyer_id, build_rating)
+    current_app.logger.info(f"Buyer {buyer_id} rated seller {seller_id} {score} for listing {listing_id}")
+    return rating, aggregate
+
+def delete_rating(listing_id, buyer_id):
+    """
+    Removes the buyer's rating for this listing.
+
+    Returns:
+        dict or None: The seller's new aggregate, or None if there was no such rating.
+    """
+    old_rating = get_rating(listing_id, buyer_id)
+    if old_rating is None:
+        return None
+    _, aggregate = _write_rating(old_rating['sellerId'], listing_id, buyer_id, lambda _: None)
+    current_app.logger.info(f"Buyer {buyer_id} removed their rating for listing {listing_id}")
+    return aggregate
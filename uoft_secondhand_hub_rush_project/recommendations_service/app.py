@@ -1,11 +1,99 @@
-from flask import Flask
+import click
+import traceback
+from flask import Flask, request, jsonify
+from flask_cors import CORS
+from flask_jwt_extended import JWTManager, jwt_required, get_jwt_identity
+from recommender import wishlist_ids
+from utils import get_recommendation_index
+from utils import get_recommendation_index_stats
+from utils import get_user_interests
+from utils import build_similarity_matrix
+from utils import load_item_similarity
+from utils import get_item_similarity
+from utils import get_item_similarity_stats
 
 app = Flask(__name__)
+CORS(app)
 app.config.from_pyfile('config.py')
+jwt = JWTManager(app)
+load_item_similarity(app)
 
 @app.route('/')
 def home():
     return 'Hello from recommendations service'
 
+@app.route('/health', methods=['GET'])
+def simple_health_check():
+    return jsonify({'status': 'healthy'}), 200
+
+@app.route('/api/recommendations/metrics', methods=['GET'])
+def metrics():
+    return jsonify({
+        'recommendationIndex': get_recommendation_index_stats(),
+        'itemSimilarity': get_item_similarity_stats()
+    }), 200
+
+@app.route('/api/recommendations/also-saved/<listing_id>', methods=['GET'])
+def get_also_saved(listing_id):
+    """Listings most often saved together with this one, from the precomputed matrix."""
+    try:
+        limit = int(request.args.get('limit', 10))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    if limit < 1:
+        return jsonify({'error': 'limit must be at least 1'}), 400
+    limit = min(limit, app.config['RECOMMENDATION_SIMILARITY_TOP_K'])
+
+    similarity = get_item_similarity()
+    if similarity is None:
+        return jsonify({'error': 'Similarity matrix has not been built'}), 503
+
+    return jsonify({
+        'listingId': listing_id,
+        'alsoSaved': [{'id': other_id, 'score': round(score, 4)} for other_id, score in similarity.similar(listing_id, limit)]
+    }), 200
+
+@app.route('/api/recommendations', methods=['GET'])
+@jwt_required()
+def get_recommendations():
+    try:
+        limit = int(request.args.get('limit', app.config['RECOMMENDATIONS_DEFAULT_LIMIT']))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    if limit < 1:
+        return jsonify({'error': 'limit must be at least 1'}), 400
+    limit = min(limit, app.config['RECOMMENDATIONS_MAX_LIMIT'])
+
+    user_id = get_jwt_identity()
+    try:
+        interests = get_user_interests(user_id)
+        if interests is None:
+            return jsonify({'error': 'User not found'}), 404
+        categories, wishlist = interests
+
+        recommendations = get_recommendation_index().recommend(
+            user_id, categories=categories, saved_ids=wishlist_ids(wishlist), k=limit
+        )
+        return jsonify({
+            'recommendations': [{**listing, 'score': round(score, 4)} for listing, score in recommendations]
+        }), 200
+    except Exception as e:
+        print(f"Error building recommendations: {str(e)}")
+        traceback.print_exc()
+        return jsonify({'error': 'Failed to build recommendations'}), 500
+
+@app.cli.command('build-similarity-matrix')
+@click.option('--output', default=None, help='Directory to write (default: RECOMMENDATION_SIMILARITY_PATH).')
+@click.option('--top-k', type=int, default=None, help='Neighbours kept per listing.')
+def build_similarity_matrix_command(output, top_k):
+    """Build the "also saved" item-item matrix from every wishlist in the users table."""
+    path = output or app.config['RECOMMENDATION_SIMILARITY_PATH']
+    similarity = build_similarity_matrix(
+        path,
+        top_k=top_k or app.config['RECOMMENDATION_SIMILARITY_TOP_K'],
+        min_co_saves=app.config['RECOMMENDATION_SIMILARITY_MIN_CO_SAVES'],
+    )
+    click.echo(f"Wrote similarity matrix for {len(similarity)} listings ({len(similarity.neighbors)} pairs) to {path}.")
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000)
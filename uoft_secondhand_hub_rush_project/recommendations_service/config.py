@@ -1,3 +1,28 @@
 import os
 
 JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY')
+
+# AWS configuration (listings and users tables the index is built from)
+AWS_ACCESS_KEY_ID = os.getenv('AWS_ACCESS_KEY_ID')
+AWS_SECRET_ACCESS_KEY = os.getenv('AWS_SECRET_ACCESS_KEY')
+AWS_DB_LISTINGS_TABLE_NAME = os.getenv('AWS_DB_LISTINGS_TABLE_NAME')
+AWS_DB_USERS_TABLE_NAME = os.getenv('AWS_DB_USERS_TABLE_NAME')
+AWS_S3_REGION = os.getenv('AWS_S3_REGION', 'us-east-2')
+
+# Seconds before the in-memory recommendation index is rebuilt from the tables
+RECOMMENDATION_INDEX_TTL = int(os.getenv('RECOMMENDATION_INDEX_TTL', 300))
+
+# Weights of the scoring signals, and the age at which a listing's recency score halves
+RECOMMENDATION_CATEGORY_WEIGHT = float(os.getenv('RECOMMENDATION_CATEGORY_WEIGHT', 1.0))
+RECOMMENDATION_COOCCURRENCE_WEIGHT = float(os.getenv('RECOMMENDATION_COOCCURRENCE_WEIGHT', 1.5))
+RECOMMENDATION_RECENCY_WEIGHT = float(os.getenv('RECOMMENDATION_RECENCY_WEIGHT', 0.5))
+RECOMMENDATION_RECENCY_HALF_LIFE_DAYS = float(os.getenv('RECOMMENDATION_RECENCY_HALF_LIFE_DAYS', 14))
+
+# Directory of the memory-mapped "also saved" matrix, and how it is built
+RECOMMENDATION_SIMILARITY_PATH = os.getenv('RECOMMENDATION_SIMILARITY_PATH', 'data/item_similarity')
+RECOMMENDATION_SIMILARITY_TOP_K = int(os.getenv('RECOMMENDATION_SIMILARITY_TOP_K', 50))
+RECOMMENDATION_SIMILARITY_MIN_CO_SAVES = int(os.getenv('RECOMMENDATION_SIMILARITY_MIN_CO_SAVES', 1))
+
+# Number of recommendations returned by default and at most
+RECOMMENDATIONS_DEFAULT_LIMIT = int(os.getenv('RECOMMENDATIONS_DEFAULT_LIMIT', 20))
+RECOMMENDATIONS_MAX_LIMIT = int(os.getenv('RECOMMENDATIONS_MAX_LIMIT', 100))
@@ -0,0 +1,186 @@
+"""
+Per-user listing recommendations scored with NumPy over a precomputed candidate index.
+
+RecommendationIndex is built from a snapshot of every listing and every user's
+wishlist. Per listing it keeps the category, a recency score and its seller;
+the wishlists are kept as a sparse user x listing incidence, stored CSR-style in
+both directions. A request then only does array work:
+
+    category   the user's interest in each listing's category, from their profile
+               categories plus the categories of what they already saved
+    co-saves   how often the listing was saved by users whose wishlists overlap
+               the user's, normalized by the listing's popularity (cosine-like)
+    recency    0.5 ** (age / half life), fixed when the index is built
+
+score = category_weight * category + cooccurrence_weight * co-saves + recency_weight * recency
+
+Listings the user already saved or is selling are skipped, and only the top K are
+selected (argpartition) and sorted.
+"""
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import numpy as np
+
+def wishlist_ids(value):
+    """Wishlists are string sets, but older accounts store a list or an empty string."""
+    if not value or isinstance(value, str):
+        return []
+    return list(value)
+
+def format_listing(listing):
+    # same JSON shape as listings_service's format_listing
+    formatted = {
+        **listing,
+        'images': list(listing.get('images', [])),
+        'price': float(listing['price']) if isinstance(listing.get('price'), Decimal) else listing.get('price', 0),
+    }
+    if formatted['images']:
+        formatted['imageUrl'] = formatted['images'][0]
+        derivatives = listing.get('imageDerivatives', {}).get(formatted['imageUrl'], {})
+        if 'thumbnail' in derivatives:
+            formatted['thumbnailUrl'] = derivatives['thumbnail']
+    return formatted
+
+def _as_utc(value):
+    # naive timestamps (older listings, tests) are taken to be UTC already
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+def parse_date_posted(date_posted):
+    """
+    Parses a listing's datePosted as an aware UTC datetime, or None if it is not a date.
+
+    The frontend writes Date.toISOString() ("2024-11-10T12:00:00.000Z"), which
+    fromisoformat only accepts with an explicit offset before Python 3.11.
+    """
+    text = str(date_posted or '').strip()
+    if text.endswith(('Z', 'z')):
+        text = text[:-1] + '+00:00'
+    try:
+        return _as_utc(datetime.fromisoformat(text))
+    except ValueError:
+        return None
+
+def _age_days(date_posted, now):
+    posted = parse_date_posted(date_posted)
+    if posted is None:
+        return np.inf
+    return max((now - posted).total_seconds() / 86400, 0.0)
+
+def build_csr(rows, n_rows):
+    """(row, column) pairs -> (indptr, indices) with each row's columns contiguous."""
+    rows_of_pairs = np.array([row for row, _ in rows], dtype=np.int32)
+    columns = np.array([column for _, column in rows], dtype=np.int32)
+    order = np.argsort(rows_of_pairs, kind='stable')
+    indptr = np.zeros(n_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows_of_pairs, minlength=n_rows), out=indptr[1:])
+    return indptr, columns[order]
+
+def gather_csr_rows(indptr, indices, rows):
+    """Concatenates the columns of the given CSR rows; returns (columns, length of each row)."""
+    starts = indptr[rows]
+    lengths = indptr[rows + 1] - starts
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+    return indices[offsets], lengths
+
+class RecommendationIndex:
+    def __init__(self, listings, wishlists, now=None, recency_half_life_days=14.0,
+                 category_weight=1.0, cooccurrence_weight=1.5, recency_weight=0.5):
+        """
+        Args:
+            listings (list): listing items as stored in the listings table.
+            wishlists (dict): user id -> iterable of saved listing ids.
+        """
+        now = _as_utc(now or datetime.now(timezone.utc))
+        self.weights = np.array([category_weight, cooccurrence_weight, recency_weight], dtype=np.float32)
+        self.built_at = now
+
+        self.listings = [format_listing(listing) for listing in listings]
+        self.position = {listing['id']: i for i, listing in enumerate(self.listings)}
+        self.categories = {category: i for i, category in
+                           enumerate(sorted({listing.get('category') or '' for listing in self.listings}))}
+        self.item_category = np.array([self.categories[listing.get('category') or ''] for listing in self.listings],
+                                      dtype=np.int32)
+        self.item_seller = np.array([listing.get('sellerId') for listing in self.listings], dtype=object)
+        ages = np.array([_age_days(listing.get('datePosted'), now) for listing in self.listings], dtype=np.float64)
+        self.recency = np.power(0.5, ages / recency_half_life_days).astype(np.float32)
+
+        # saved listings that no longer exist are dropped
+        self.user_rows = {}
+        pairs = []
+        for user_id, saved in wishlists.items():
+            positions = {self.position[listing_id] for listing_id in wishlist_ids(saved) if listing_id in self.position}
+            if positions:
+                row = self.user_rows.setdefault(user_id, len(self.user_rows))
+                pairs.extend((row, position) for position in positions)
+
+        self.user_items = build_csr(pairs, len(self.user_rows))
+        self.item_users = build_csr([(item, user) for user, item in pairs], len(self.listings))
+        self.item_popularity = np.diff(self.item_users[0]).astype(np.float32)
+
+    def __len__(self):
+        return len(self.listings)
+
+    def stats(self):
+        return {
+            'listings': len(self.listings),
+            'usersWithWishlists': len(self.user_rows),
+            'wishlistEntries': int(self.item_popularity.sum()),
+            'builtAt': self.built_at.isoformat(),
+        }
+
+    def category_scores(self, categories, saved):
+        interest = np.zeros(len(self.categories), dtype=np.float32)
+        for category in categories:
+            if category in self.categories:
+                interest[self.categories[category]] += 1.0
+        # what the user saved counts as half an explicit interest per listing
+        interest += 0.5 * np.bincount(self.item_category[saved], minlength=len(self.categories))
+        if interest.max() > 0:
+            interest /= interest.max()
+        return interest[self.item_category]
+
+    def cooccurrence_scores(self, user_id, saved):
+        scores = np.zeros(len(self.listings), dtype=np.float32)
+        if not len(saved) or not self.user_rows:
+            return scores
+
+        # users who saved any of the same listings, weighted by how many they share
+        savers, _ = gather_csr_rows(*self.item_users, saved)
+        overlap = np.bincount(savers, minlength=len(self.user_rows)).astype(np.float32)
+        if user_id in self.user_rows:
+            overlap[self.user_rows[user_id]] = 0
+        neighbours = np.flatnonzero(overlap)
+        if not len(neighbours):
+            return scores
+
+        items, lengths = gather_csr_rows(*self.user_items, neighbours)
+        scores += np.bincount(items, weights=np.repeat(overlap[neighbours], lengths),
+                              minlength=len(self.listings)).astype(np.float32)
+        popular = self.item_popularity > 0
+        scores[popular] /= np.sqrt(self.item_popularity[popular] * len(saved))
+        return scores / scores.max() if scores.max() > 0 else scores
+
+    def score(self, user_id, categories=(), saved_ids=()):
+        """Returns the score of every listing for this user, -inf for listings to skip."""
+        saved = np.array(sorted({self.position[listing_id] for listing_id in saved_ids if listing_id in self.position}),
+                         dtype=np.int64)
+        signals = np.vstack([
+            self.category_scores(categories, saved),
+            self.cooccurrence_scores(user_id, saved),
+            self.recency,
+        ])
+        scores = self.weights @ signals
+        scores[saved] = -np.inf
+        scores[self.item_seller == user_id] = -np.inf
+        return scores
+
+    def recommend(self, user_id, categories=(), saved_ids=(), k=20):
+        """Returns up to k (listing, score) pairs, best first."""
+        if not self.listings or k < 1:
+            return []
+        scores = self.score(user_id, categories, saved_ids)
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(self.listings[i], float(scores[i])) for i in top if np.isfinite(scores[i])]
@@ -0,0 +1,124 @@
+"""
+Item-item "people who saved this also saved" similarity, built offline from wishlists.
+
+build_item_similarity turns every user's wishlist into a sparse item x item
+co-save count and keeps, per listing, its top K neighbours by cosine similarity:
+
+    similarity(i, j) = co_saves(i, j) / sqrt(saves(i) * saves(j))
+
+The result is stored CSR-style as plain .npy files in one directory:
+
+    ids.npy        listing id of each row (fixed-width unicode)
+    indptr.npy     row i's neighbours are neighbors[indptr[i]:indptr[i + 1]]
+    neighbors.npy  neighbour row numbers, best first
+    scores.npy     their similarity (float32)
+    meta.json      build time and parameters
+
+ItemSimilarity.load memory-maps the arrays, so every worker shares the same pages
+and a lookup reads only the K entries of one row.
+"""
+import json
+import os
+import shutil
+from datetime import datetime
+
+import numpy as np
+
+from recommender import build_csr, gather_csr_rows, wishlist_ids
+
+_ARRAYS = ('ids', 'indptr', 'neighbors', 'scores')
+
+class ItemSimilarity:
+    def __init__(self, ids, indptr, neighbors, scores, meta=None):
+        self.ids = ids
+        self.indptr = indptr
+        self.neighbors = neighbors
+        self.scores = scores
+        self.meta = meta or {}
+        self.position = {str(listing_id): i for i, listing_id in enumerate(ids)}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def similar(self, listing_id, k=10):
+        """Returns up to k (listing id, similarity) pairs, most similar first."""
+        row = self.position.get(listing_id)
+        if row is None:
+            return []
+        start = self.indptr[row]
+        end = min(self.indptr[row + 1], start + k)
+        return [(str(self.ids[neighbor]), float(score))
+                for neighbor, score in zip(self.neighbors[start:end], self.scores[start:end])]
+
+    def save(self, path):
+        """Writes the matrix to a new directory, then swaps it in place of the old one."""
+        new_path, old_path = f'{path}.new', f'{path}.old'
+        shutil.rmtree(new_path, ignore_errors=True)
+        os.makedirs(new_path)
+        for name in _ARRAYS:
+            np.save(os.path.join(new_path, f'{name}.npy'), getattr(self, name))
+        with open(os.path.join(new_path, 'meta.json'), 'w') as f:
+            json.dump(self.meta, f, indent=2)
+
+        shutil.rmtree(old_path, ignore_errors=True)
+        if os.path.exists(path):
+            os.rename(path, old_path)
+        os.rename(new_path, path)
+        shutil.rmtree(old_path, ignore_errors=True)
+
+    @classmethod
+    def load(cls, path):
+        arrays = {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r') for name in _ARRAYS}
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        return cls(meta=meta, **arrays)
+
+def build_item_similarity(wishlists, top_k=50, min_co_saves=1, now=None):
+    """
+    Args:
+        wishlists (dict): user id -> iterable of saved listing ids.
+        top_k (int): neighbours kept per listing.
+        min_co_saves (int): pairs saved together by fewer users are dropped.
+    """
+    ids = sorted({listing_id for saved in wishlists.values() for listing_id in wishlist_ids(saved)})
+    position = {listing_id: i for i, listing_id in enumerate(ids)}
+
+    pairs = []
+    for row, saved in enumerate(wishlists.values()):
+        pairs.extend((row, position[listing_id]) for listing_id in set(wishlist_ids(saved)))
+    user_items = build_csr(pairs, len(wishlists))
+    item_users = build_csr([(item, user) for user, item in pairs], len(ids))
+    saves = np.diff(item_users[0]).astype(np.float32)
+
+    indptr = np.zeros(len(ids) + 1, dtype=np.int64)
+    neighbor_rows, score_rows = [], []
+    for item in range(len(ids)):
+        # every listing saved by someone who saved this one, counted once per such user
+        savers, _ = gather_csr_rows(*item_users, np.array([item]))
+        co_saved, _ = gather_csr_rows(*user_items, savers)
+        counts = np.bincount(co_saved, minlength=len(ids)).astype(np.float32)
+        counts[item] = 0
+        candidates = np.flatnonzero(counts >= min_co_saves)
+
+        similarity = counts[candidates] / np.sqrt(saves[item] * saves[candidates])
+        if len(candidates) > top_k:
+            keep = np.argpartition(-similarity, top_k - 1)[:top_k]
+            candidates, similarity = candidates[keep], similarity[keep]
+        order = np.lexsort((candidates, -similarity))
+        neighbor_rows.append(candidates[order].astype(np.int32))
+        score_rows.append(similarity[order].astype(np.float32))
+        indptr[item + 1] = indptr[item] + len(candidates)
+
+    return ItemSimilarity(
+        ids=np.array(ids, dtype=str) if ids else np.array([], dtype='<U1'),
+        indptr=indptr,
+        neighbors=np.concatenate(neighbor_rows) if neighbor_rows else np.array([], dtype=np.int32),
+        scores=np.concatenate(score_rows) if score_rows else np.array([], dtype=np.float32),
+        meta={
+            'builtAt': (now or datetime.utcnow()).isoformat(),
+            'listings': len(ids),
+            'users': len(wishlists),
+            'topK': top_k,
+            'minCoSaves': min_co_saves,
+        },
+    )
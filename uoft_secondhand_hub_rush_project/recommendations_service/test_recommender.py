@@ -0,0 +1,150 @@
+import boto3
+import pytest
+from datetime import datetime
+from decimal import Decimal
+from flask_jwt_extended import create_access_token
+from moto import mock_aws
+from app import app
+from recommender import RecommendationIndex
+from utils import reset_recommendation_index
+
+TEST_REGION = 'us-east-2'
+LISTINGS_TABLE = 'test-listings-table'
+USERS_TABLE = 'test-users-table'
+NOW = datetime(2024, 11, 10)
+
+def make_listing(listing_id, category, days_old=1, seller='seller'):
+    return {
+        'id': listing_id,
+        'title': listing_id.title(),
+        'category': category,
+        'price': Decimal('10'),
+        'images': {f'https://example.com/{listing_id}.jpg'},
+        'datePosted': datetime(2024, 11, 10 - days_old).isoformat(),
+        'sellerId': seller,
+    }
+
+LISTINGS = [
+    make_listing('desk', 'furniture'),
+    make_listing('chair', 'furniture', days_old=5),
+    make_listing('lamp', 'furniture', days_old=9),
+    make_listing('laptop', 'electronics'),
+    make_listing('monitor', 'electronics', days_old=3),
+    make_listing('novel', 'books', days_old=2, seller='alice'),
+]
+
+def make_index(wishlists=None, **kwargs):
+    return RecommendationIndex(LISTINGS, wishlists or {}, now=NOW, **kwargs)
+
+def recommended_ids(index, user_id='alice', **kwargs):
+    return [listing['id'] for listing, _ in index.recommend(user_id, **kwargs)]
+
+def test_category_interest_ranks_matching_listings_first():
+    ids = recommended_ids(make_index(), categories=['electronics'], k=2)
+    assert ids == ['laptop', 'monitor']
+
+def test_recency_breaks_ties_within_a_category():
+    ids = recommended_ids(make_index(), categories=['furniture'], k=3)
+    assert ids == ['desk', 'chair', 'lamp']
+
+def test_saved_categories_count_as_interest():
+    ids = recommended_ids(make_index(), saved_ids=['monitor'], k=1)
+    assert ids == ['laptop']
+
+def test_co_saved_listings_outrank_category_and_recency():
+    # bob and carol both saved the monitor along with the lamp
+    index = make_index({'bob': {'monitor', 'lamp'}, 'carol': ['monitor', 'lamp'], 'dave': {'desk'}})
+    ids = recommended_ids(index, saved_ids=['monitor'], k=1)
+    assert ids == ['lamp']
+
+def test_saved_and_own_listings_are_never_recommended():
+    ids = recommended_ids(make_index(), saved_ids=['desk'], k=10)
+    assert 'desk' not in ids
+    assert 'novel' not in ids  # alice is selling it
+    assert len(ids) == len(LISTINGS) - 2
+
+def test_only_top_k_are_returned():
+    assert len(recommended_ids(make_index(), categories=['furniture'], k=2)) == 2
+
+def test_unknown_listings_in_wishlists_are_ignored():
+    index = make_index({'bob': {'deleted-listing', 'lamp'}, 'carol': ''})
+    assert index.stats()['wishlistEntries'] == 1
+    assert recommended_ids(index, saved_ids=['deleted-listing'], k=1) == ['desk']
+
+def test_frontend_timestamps_are_parsed_as_utc():
+    # CreateListing writes datePosted with Date.toISOString()
+    listings = [
+        {**make_listing('fresh', 'books'), 'datePosted': '2024-11-09T12:00:00.000Z'},
+        {**make_listing('stale', 'books'), 'datePosted': '2024-10-01T12:00:00.000Z'},
+        {**make_listing('offset', 'books'), 'datePosted': '2024-11-09T07:00:00-05:00'},
+        {**make_listing('garbage', 'books'), 'datePosted': 'yesterday'},
+    ]
+    index = RecommendationIndex(listings, {}, now=datetime(2024, 11, 10, 12), recency_half_life_days=1)
+    assert index.recency[0] == pytest.approx(0.5)
+    assert index.recency[2] == pytest.approx(0.5)
+    assert index.recency[1] < 1e-6
+    assert index.recency[3] == 0
+    assert [listing['id'] for listing, _ in index.recommend('alice', k=2)] == ['fresh', 'offset']
+
+def test_index_builds_with_the_current_time():
+    listing = {**make_listing('desk', 'furniture'), 'datePosted': '2026-10-10T12:00:00.000Z'}
+    assert len(RecommendationIndex([listing], {}).recommend('alice')) == 1
+
+def test_empty_index_recommends_nothing():
+    assert RecommendationIndex([], {}).recommend('alice') == []
+
+@pytest.fixture
+def client():
+    with mock_aws():
+        app.config.update(
+            TESTING=True,
+            JWT_SECRET_KEY='recommendations-test-secret-key-0123456789',
+            AWS_ACCESS_KEY_ID='testing',
+            AWS_SECRET_ACCESS_KEY='testing',
+            AWS_S3_REGION=TEST_REGION,
+            AWS_DB_LISTINGS_TABLE_NAME=LISTINGS_TABLE,
+            AWS_DB_USERS_TABLE_NAME=USERS_TABLE,
+        )
+        reset_recommendation_index()
+
+        dynamodb = boto3.resource('dynamodb', region_name=TEST_REGION)
+        for name in (LISTINGS_TABLE, USERS_TABLE):
+            dynamodb.create_table(
+                TableName=name,
+                KeySchema=[{'AttributeName': 'id', 'KeyType': 'HASH'}],
+                AttributeDefinitions=[{'AttributeName': 'id', 'AttributeType': 'S'}],
+                BillingMode='PAY_PER_REQUEST',
+            )
+        for listing in LISTINGS:
+            dynamodb.Table(LISTINGS_TABLE).put_item(Item=listing)
+        dynamodb.Table(USERS_TABLE).put_item(Item={'id': 'alice', 'categories': ['electronics'], 'wishlist': {'laptop'}})
+        dynamodb.Table(USERS_TABLE).put_item(Item={'id': 'bob', 'categories': [], 'wishlist': {'laptop', 'chair'}})
+
+        with app.test_client() as client:
+            yield client
+        reset_recommendation_index()
+
+def auth_headers(user_id):
+    with app.app_context():
+        return {'Authorization': f'Bearer {create_access_token(identity=user_id)}'}
+
+def test_recommendations_route_returns_top_listings(client):
+    response = client.get('/api/recommendations', query_string={'limit': 2}, headers=auth_headers('alice'))
+    assert response.status_code == 200
+
+    recommendations = response.get_json()['recommendations']
+    # bob also saved the laptop, so his chair beats alice's other electronics
+    assert [listing['id'] for listing in recommendations] == ['chair', 'monitor']
+    assert recommendations[1]['price'] == 10.0
+    assert recommendations[1]['imageUrl'] == 'https://example.com/monitor.jpg'
+
+def test_recommendations_route_requires_a_token(client):
+    assert client.get('/api/recommendations').status_code == 401
+
+def test_recommendations_route_rejects_bad_limits(client):
+    headers = auth_headers('alice')
+    assert client.get('/api/recommendations', query_string={'limit': 'ten'}, headers=headers).status_code == 400
+    assert client.get('/api/recommendations', query_string={'limit': 0}, headers=headers).status_code == 400
+
+def test_recommendations_route_unknown_user(client):
+    assert client.get('/api/recommendations', headers=auth_headers('nobody')).status_code == 404
@@ -0,0 +1,81 @@
+import boto3
+import numpy as np
+import pytest
+from moto import mock_aws
+from app import app
+from similarity import ItemSimilarity, build_item_similarity
+from utils import load_item_similarity
+
+WISHLISTS = {
+    'alice': {'desk', 'chair', 'lamp'},
+    'bob': {'desk', 'chair'},
+    'carol': ['desk', 'laptop'],
+    'dave': '',
+}
+
+def test_neighbours_are_ranked_by_cosine_similarity():
+    similarity = build_item_similarity(WISHLISTS)
+
+    # desk: saved by 3, chair by 2 (both together twice), lamp and laptop by 1 each
+    neighbours = similarity.similar('desk')
+    assert [listing_id for listing_id, _ in neighbours] == ['chair', 'lamp', 'laptop']
+    assert neighbours[0][1] == pytest.approx(2 / np.sqrt(3 * 2))
+    assert neighbours[1][1] == pytest.approx(1 / np.sqrt(3 * 1))
+
+def test_top_k_and_min_co_saves_limit_each_row():
+    assert len(build_item_similarity(WISHLISTS, top_k=1).similar('desk')) == 1
+    assert build_item_similarity(WISHLISTS, min_co_saves=2).similar('desk') == [('chair', pytest.approx(2 / np.sqrt(6)))]
+
+def test_similar_reads_at_most_k_and_ignores_unknown_listings():
+    similarity = build_item_similarity(WISHLISTS)
+    assert len(similarity.similar('desk', k=2)) == 2
+    assert similarity.similar('never-saved') == []
+
+def test_saved_matrix_is_memory_mapped_on_load(tmp_path):
+    path = str(tmp_path / 'item_similarity')
+    build_item_similarity(WISHLISTS).save(path)
+    build_item_similarity(WISHLISTS, top_k=1).save(path)  # replaces the previous build
+
+    loaded = ItemSimilarity.load(path)
+    assert isinstance(loaded.neighbors, np.memmap)
+    assert loaded.meta['topK'] == 1
+    assert loaded.similar('desk') == build_item_similarity(WISHLISTS, top_k=1).similar('desk')
+
+def test_empty_wishlists_build_an_empty_matrix(tmp_path):
+    path = str(tmp_path / 'item_similarity')
+    build_item_similarity({}).save(path)
+    assert len(ItemSimilarity.load(path)) == 0
+
+@pytest.fixture
+def client(tmp_path):
+    app.config.update(TESTING=True, RECOMMENDATION_SIMILARITY_PATH=str(tmp_path / 'item_similarity'))
+    with app.test_client() as client:
+        yield client
+
+def test_also_saved_route_reads_the_loaded_matrix(client):
+    build_item_similarity(WISHLISTS).save(app.config['RECOMMENDATION_SIMILARITY_PATH'])
+    load_item_similarity(app)
+
+    response = client.get('/api/recommendations/also-saved/desk', query_string={'limit': 2})
+    assert response.status_code == 200
+    assert [entry['id'] for entry in response.get_json()['alsoSaved']] == ['chair', 'lamp']
+    assert client.get('/api/recommendations/metrics').get_json()['itemSimilarity']['listings'] == 4
+
+def test_build_similarity_matrix_command(client):
+    with mock_aws():
+        app.config.update(AWS_ACCESS_KEY_ID='testing', AWS_SECRET_ACCESS_KEY='testing',
+                          AWS_S3_REGION='us-east-2', AWS_DB_USERS_TABLE_NAME='test-users-table')
+        table = boto3.resource('dynamodb', region_name='us-east-2').create_table(
+            TableName='test-users-table',
+            KeySchema=[{'AttributeName': 'id', 'KeyType': 'HASH'}],
+            AttributeDefinitions=[{'AttributeName': 'id', 'AttributeType': 'S'}],
+            BillingMode='PAY_PER_REQUEST',
+        )
+        for user_id, wishlist in WISHLISTS.items():
+            table.put_item(Item={'id': user_id, 'wishlist': wishlist})
+
+        result = app.test_cli_runner().invoke(args=['build-similarity-matrix'])
+
+    assert result.exit_code == 0, result.output
+    loaded = ItemSimilarity.load(app.config['RECOMMENDATION_SIMILARITY_PATH'])
+    assert loaded.similar('desk', k=1) == [('chair', pytest.approx(2 / np.sqrt(6)))]
@@ -0,0 +1,146 @@
+import boto3
+import os
+import threading
+import time
+from flask import current_app
+from recommender import RecommendationIndex
+from similarity import ItemSimilarity
+from similarity import build_item_similarity
+
+# The index is a snapshot of the listings and users tables. It is built on first use
+# and rebuilt in the background once it is older than RECOMMENDATION_INDEX_TTL, while
+# requests keep using the previous snapshot.
+_index_lock = threading.Lock()
+_first_build_lock = threading.Lock()
+_index = None
+_index_built_at = 0.0
+_index_refreshing = False
+_index_stats = {'builds': 0, 'lastBuildSeconds': None}
+
+# "also saved" matrix written by `flask build-similarity-matrix`; each worker maps it
+# at startup, so a newly built matrix is picked up on restart or graceful reload
+_item_similarity = None
+
+def _aws_kwargs():
+    return {
+        'region_name': current_app.config['AWS_S3_REGION'],
+        'aws_access_key_id': current_app.config['AWS_ACCESS_KEY_ID'],
+        'aws_secret_access_key': current_app.config['AWS_SECRET_ACCESS_KEY'],
+    }
+
+def get_dynamodb_resource():
+    return boto3.resource('dynamodb', **_aws_kwargs())
+
+def scan_table(table, **scan_kwargs):
+    """Yields every item of a DynamoDB table, following LastEvaluatedKey."""
+    while True:
+        response = table.scan(**scan_kwargs)
+        yield from response.get('Items', [])
+
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def load_wishlists(dynamodb):
+    table = dynamodb.Table(current_app.config['AWS_DB_USERS_TABLE_NAME'])
+    return {
+        user['id']: user.get('wishlist')
+        for user in scan_table(table, ProjectionExpression='#id, wishlist', ExpressionAttributeNames={'#id': 'id'})
+    }
+
+def build_recommendation_index():
+    dynamodb = get_dynamodb_resource()
+    listings = list(scan_table(dynamodb.Table(current_app.config['AWS_DB_LISTINGS_TABLE_NAME'])))
+    return RecommendationIndex(
+        listings,
+        load_wishlists(dynamodb),
+        recency_half_life_days=current_app.config['RECOMMENDATION_RECENCY_HALF_LIFE_DAYS'],
+        category_weight=current_app.config['RECOMMENDATION_CATEGORY_WEIGHT'],
+        cooccurrence_weight=current_app.config['RECOMMENDATION_COOCCURRENCE_WEIGHT'],
+        recency_weight=current_app.config['RECOMMENDATION_RECENCY_WEIGHT'],
+    )
+
+def refresh_recommendation_index():
+    """Builds a new index from the tables and swaps it in."""
+    global _index, _index_built_at
+    start = time.perf_counter()
+    index = build_recommendation_index()
+    with _index_lock:
+        _index = index
+        _index_built_at = time.monotonic()
+        _index_stats['builds'] += 1
+        _index_stats['lastBuildSeconds'] = round(time.perf_counter() - start, 3)
+    current_app.logger.info(f"Built recommendation index over {len(index)} listings.")
+    return index
+
+def _refresh_in_background(app):
+    global _index_refreshing
+    try:
+        with app.app_context():
+            refresh_recommendation_index()
+    except Exception as e:
+        app.logger.error(f"Failed to rebuild recommendation index: {e}")
+    finally:
+        _index_refreshing = False
+
+def get_recommendation_index():
+    global _index_refreshing
+    if _index is None:
+        # the first request builds it; requests arriving meanwhile wait for that build
+        with _first_build_lock:
+            if _index is None:
+                refresh_recommendation_index()
+        return _index
+
+    if time.monotonic() - _index_built_at > current_app.config['RECOMMENDATION_INDEX_TTL']:
+        with _index_lock:
+            start_refresh = not _index_refreshing
+            _index_refreshing = True
+        if start_refresh:
+            threading.Thread(target=_refresh_in_background, args=(current_app._get_current_object(),),
+                             name='recommendation-index-refresh', daemon=True).start()
+    return _index
+
+def reset_recommendation_index():
+    """Drops the cached index (used by tests)."""
+    global _index
+    with _index_lock:
+        _index = None
+
+def get_recommendation_index_stats():
+    index = _index
+    return {**_index_stats, 'index': index.stats() if index else None}
+
+def get_user_interests(user_id):
+    """Returns (categories, wishlist) for a user, or None when the user does not exist."""
+    table = get_dynamodb_resource().Table(current_app.config['AWS_DB_USERS_TABLE_NAME'])
+    user = table.get_item(
+        Key={'id': user_id},
+        ProjectionExpression='categories, wishlist'
+    ).get('Item')
+    if user is None:
+        return None
+    return user.get('categories') or [], user.get('wishlist')
+
+def build_similarity_matrix(path, top_k, min_co_saves):
+    """Builds the item-item matrix from every wishlist in the users table and saves it."""
+    similarity = build_item_similarity(load_wishlists(get_dynamodb_resource()), top_k=top_k,
+                                       min_co_saves=min_co_saves)
+    similarity.save(path)
+    return similarity
+
+def load_item_similarity(app):
+    global _item_similarity
+    path = app.config['RECOMMENDATION_SIMILARITY_PATH']
+    if not os.path.isdir(path):
+        app.logger.warning(f"No similarity matrix at {path}; run `flask build-similarity-matrix`.")
+        return None
+    _item_similarity = ItemSimilarity.load(path)
+    app.logger.info(f"Loaded similarity matrix over {len(_item_similarity)} listings from {path}.")
+    return _item_similarity
+
+def get_item_similarity():
+    return _item_similarity
+
+def get_item_similarity_stats():
+    return _item_similarity.meta if _item_similarity is not None else None
@@ -1,19 +1,127 @@
-from flask import Flask
-from elasticsearch import Elasticsearch
-
-es = Elasticsearch("http://elasticsearch:9200")
-
-if es.ping():
-    print("Connected to Elasticsearch!")
-else:
-    print("Could not connect to Elasticsearch.")
+import click
+import traceback
+from flask import Flask, request, jsonify
+from flask_cors import CORS
+from utils import get_es_client
+from utils import ensure_listings_index
+from utils import reindex_listings_from_table
+from utils import search_listings_index
+from utils import SEARCH_SORTS
+from utils import consume_listing_events
+from utils import get_listing_event_stats
+from utils import get_listing_events_backlog
+from utils import get_published_listing_event_stats
 
 app = Flask(__name__)
+CORS(app)
 app.config.from_pyfile('config.py')
 
 @app.route('/')
 def home():
     return 'Hello from search engine service'
 
+@app.route('/health', methods=['GET'])
+def simple_health_check():
+    return jsonify({'status': 'healthy'}), 200
+
+@app.route('/api/search/health', methods=['GET'])
+def health_check():
+    # unlike /health, this also checks that Elasticsearch is reachable
+    try:
+        if get_es_client().ping():
+            return jsonify({'status': 'healthy', 'elasticsearch': 'up'}), 200
+    except Exception as e:
+        print(f"Elasticsearch ping failed: {str(e)}")
+    return jsonify({'status': 'unhealthy', 'elasticsearch': 'down'}), 503
+
+@app.route('/api/search/metrics', methods=['GET'])
+def metrics():
+    # the consumer runs as its own process (flask consume-listing-events); the web
+    # process reports the queue backlog and the lag stats the consumer last published
+    if not app.config['LISTING_EVENTS_QUEUE_URL']:
+        return jsonify({'listingEvents': None}), 200
+    try:
+        return jsonify({
+            'listingEvents': get_listing_events_backlog(),
+            'consumer': get_published_listing_event_stats(),
+        }), 200
+    except Exception as e:
+        print(f"Error reading listing events metrics: {str(e)}")
+        return jsonify({'error': 'Failed to read listing events metrics'}), 500
+
+@app.route('/api/search', methods=['GET'])
+def search():
+    try:
+        min_price = request.args.get('minPrice', type=float)
+        max_price = request.args.get('maxPrice', type=float)
+        page = int(request.args.get('page', 1))
+        limit = int(request.args.get('limit', app.config['SEARCH_DEFAULT_PAGE_SIZE']))
+    except ValueError:
+        return jsonify({'error': 'page and limit must be integers'}), 400
+
+    sort_by = request.args.get('sortBy')
+    if sort_by is not None and sort_by not in SEARCH_SORTS:
+        return jsonify({'error': f"sortBy must be one of: {', '.join(SEARCH_SORTS)}"}), 400
+    if page < 1 or limit < 1:
+        return jsonify({'error': 'page and limit must be at least 1'}), 400
+    limit = min(limit, app.config['SEARCH_MAX_PAGE_SIZE'])
+
+    try:
+        listings, total = search_listings_index(
+            query=request.args.get('q', '').strip(),
+            category=request.args.get('category'),
+            location=request.args.get('location'),
+            min_price=min_price,
+            max_price=max_price,
+            sort_by=sort_by,
+            page=page,
+            limit=limit
+        )
+        return jsonify({
+            'listings': listings,
+            'total': total,
+            'page': page,
+            'limit': limit,
+            'totalPages': (total + limit - 1) // limit
+        }), 200
+    except Exception as e:
+        print(f"Error searching listings: {str(e)}")
+        traceback.print_exc()
+        return jsonify({'error': 'Failed to search listings'}), 500
+
+@app.cli.command('create-index')
+@click.option('--recreate', is_flag=True, help='Drop the index first if it exists.')
+def create_index_command(recreate):
+    """Create the listings index with its mapping."""
+    ensure_listings_index(recreate=recreate)
+    click.echo(f"Index '{app.config['ELASTICSEARCH_LISTINGS_INDEX']}' is ready.")
+
+@app.cli.command('reindex-listings')
+@click.option('--recreate', is_flag=True, help='Drop and recreate the index before loading.')
+def reindex_listings_command(recreate):
+    """Bulk load every listing from the DynamoDB listings table into the index."""
+    indexed, failures = reindex_listings_from_table(recreate=recreate)
+    click.echo(f"Indexed {indexed} listings ({failures} failures).")
+    if failures:
+        raise SystemExit(1)
+
+@app.cli.command('consume-listing-events')
+@click.option('--once', is_flag=True, help='Apply a single batch and exit.')
+def consume_listing_events_command(once):
+    """Keep the index in sync by applying listing events from the queue."""
+    if not app.config['LISTING_EVENTS_QUEUE_URL']:
+        raise click.UsageError('LISTING_EVENTS_QUEUE_URL is not set.')
+    ensure_listings_index()
+    while True:
+        applied = consume_listing_events()
+        if applied:
+            stats = get_listing_event_stats()
+            click.echo(
+                f"Applied {applied} events (lag {stats['last_lag_seconds'] or 0:.2f}s, "
+                f"max {stats['max_lag_seconds'] or 0:.2f}s, {stats['batches_failed']} failed batches)."
+            )
+        if once:
+            break
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000)
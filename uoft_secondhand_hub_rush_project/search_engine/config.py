@@ -1,3 +1,24 @@
 import os
 
 JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY')
+
+# Elasticsearch configuration
+ELASTICSEARCH_URL = os.getenv('ELASTICSEARCH_URL', 'http://elasticsearch:9200')
+ELASTICSEARCH_LISTINGS_INDEX = os.getenv('ELASTICSEARCH_LISTINGS_INDEX', 'listings')
+ELASTICSEARCH_REQUEST_TIMEOUT = int(os.getenv('ELASTICSEARCH_REQUEST_TIMEOUT', 10))
+SEARCH_DEFAULT_PAGE_SIZE = int(os.getenv('SEARCH_DEFAULT_PAGE_SIZE', 20))
+SEARCH_MAX_PAGE_SIZE = int(os.getenv('SEARCH_MAX_PAGE_SIZE', 100))
+REINDEX_CHUNK_SIZE = int(os.getenv('REINDEX_CHUNK_SIZE', 500))
+# index the listing events consumer publishes its stats (lag, failed batches) to
+ELASTICSEARCH_CONSUMER_STATS_INDEX = os.getenv('ELASTICSEARCH_CONSUMER_STATS_INDEX', 'listing-events-consumer')
+
+# AWS configuration (source of truth for the reindex command)
+AWS_ACCESS_KEY_ID = os.getenv('AWS_ACCESS_KEY_ID')
+AWS_SECRET_ACCESS_KEY = os.getenv('AWS_SECRET_ACCESS_KEY')
+AWS_DB_LISTINGS_TABLE_NAME = os.getenv('AWS_DB_LISTINGS_TABLE_NAME')
+AWS_S3_REGION = os.getenv('AWS_S3_REGION', 'us-east-2')
+
+# Listing change events consumed from listings_service
+LISTING_EVENTS_QUEUE_URL = os.getenv('LISTING_EVENTS_QUEUE_URL')
+LISTING_EVENTS_BATCH_SIZE = int(os.getenv('LISTING_EVENTS_BATCH_SIZE', 100))
+LISTING_EVENTS_WAIT_SECONDS = int(os.getenv('LISTING_EVENTS_WAIT_SECONDS', 20))
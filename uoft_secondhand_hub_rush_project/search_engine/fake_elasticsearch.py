@@ -0,0 +1,171 @@
+"""
+In-process stand-in for the subset of the Elasticsearch client used by this service.
+
+It understands the queries built by utils.build_listings_query (bool/must/filter with
+multi_match, match_all, term and range) and the sorts in utils.SEARCH_SORTS, which is
+enough to run the search service and its tests without an Elasticsearch container.
+Scoring is a simple boosted term count, so relative ranking follows the same field
+boosts as the real index but exact scores differ.
+"""
+import copy
+import re
+import elasticsearch
+from elastic_transport import ApiResponseMeta, HttpHeaders, NodeConfig
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+def _tokens(value):
+    return _TOKEN_RE.findall(str(value).lower())
+
+_NOT_FOUND_META = ApiResponseMeta(status=404, http_version='1.1', headers=HttpHeaders(), duration=0.0,
+                                  node=NodeConfig('http', 'localhost', 9200))
+
+class NotFoundError(elasticsearch.NotFoundError):
+    # the real client's 404 error, so code under test catches it the same way
+    def __init__(self, message):
+        super().__init__(message, _NOT_FOUND_META, {'found': False})
+
+class _FakeIndices:
+    def __init__(self, es):
+        self._es = es
+
+    def exists(self, index):
+        return index in self._es._indices
+
+    def create(self, index, mappings=None, settings=None):
+        self._es._indices[index] = {'mappings': mappings or {}, 'docs': {}}
+        return {'acknowledged': True, 'index': index}
+
+    def delete(self, index):
+        if index not in self._es._indices:
+            raise NotFoundError(index)
+        del self._es._indices[index]
+        return {'acknowledged': True}
+
+    def refresh(self, index=None):
+        return {'_shards': {'failed': 0}}
+
+class FakeElasticsearch:
+    def __init__(self):
+        self._indices = {}
+        self.indices = _FakeIndices(self)
+
+    def ping(self):
+        return True
+
+    def _index(self, name):
+        if name not in self._indices:
+            # like Elasticsearch's automatic index creation, without our mapping
+            self.indices.create(index=name)
+        return self._indices[name]
+
+    def bulk(self, operations, refresh=False):
+        items = []
+        ops = iter(operations)
+        for action_line in ops:
+            action, meta = next(iter(action_line.items()))
+            docs = self._index(meta['_index'])['docs']
+            if action == 'index':
+                docs[meta['_id']] = copy.deepcopy(next(ops))
+                items.append({'index': {'_id': meta['_id'], 'status': 201}})
+            elif action == 'delete':
+                # a delete of a missing document reports 404 but is not a bulk error
+                status = 200 if docs.pop(meta['_id'], None) is not None else 404
+                items.append({'delete': {'_id': meta['_id'], 'status': status}})
+            else:
+                raise ValueError(f"Unsupported bulk action: {action}")
+        return {'errors': False, 'items': items}
+
+    def index(self, index, id, document, refresh=False):
+        self._index(index)['docs'][id] = copy.deepcopy(document)
+        return {'_id': id, 'result': 'created'}
+
+    def get(self, index, id):
+        docs = self._index(index)['docs']
+        if id not in docs:
+            raise NotFoundError(id)
+        return {'_id': id, '_source': copy.deepcopy(docs[id]), 'found': True}
+
+    def count(self, index):
+        return {'count': len(self._index(index)['docs'])}
+
+    def search(self, index, query=None, sort=None, from_=0, size=10, track_total_hits=None):
+        idx = self._index(index)
+        properties = idx['mappings'].get('properties', {})
+
+        hits = []
+        for doc_id, doc in idx['docs'].items():
+            score = self._score(query or {'match_all': {}}, doc, properties)
+            if score is not None:
+                hits.append({'_id': doc_id, '_score': score, '_source': copy.deepcopy(doc)})
+
+        for sort_entry in reversed(sort or ['_score']):
+            self._sort(hits, sort_entry)
+
+        return {'hits': {'total': {'value': len(hits), 'relation': 'eq'}, 'hits': hits[from_:from_ + size]}}
+
+    # query evaluation: returns a score, or None when the document does not match
+    def _score(self, query, doc, properties):
+        kind, body = next(iter(query.items()))
+        if kind == 'match_all':
+            return 1.0
+        if kind == 'bool':
+            for clause in body.get('filter', []):
+                if self._score(clause, doc, properties) is None:
+                    return None
+            score = 0.0
+            for clause in body.get('must', []):
+                clause_score = self._score(clause, doc, properties)
+                if clause_score is None:
+                    return None
+                score += clause_score
+            return score
+        if kind == 'multi_match':
+            wanted = set(_tokens(body['query']))
+            score = 0.0
+            for field in body['fields']:
+                name, _, boost = field.partition('^')
+                field_tokens = _tokens(doc.get(name, ''))
+                score += float(boost or 1) * sum(1 for token in field_tokens if token in wanted)
+            return score if score > 0 else None
+        if kind == 'term':
+            field, value = next(iter(body.items()))
+            if isinstance(value, dict):
+                value = value['value']
+            actual = doc.get(field)
+            if properties.get(field, {}).get('normalizer'):
+                actual, value = str(actual).lower() if actual is not None else None, str(value).lower()
+            return 0.0 if actual == value else None
+        if kind == 'terms':
+            field, values = next(iter(body.items()))
+            return 0.0 if doc.get(field) in values else None
+        if kind == 'range':
+            field, bounds = next(iter(body.items()))
+            actual = doc.get(field)
+            if actual is None:
+                return None
+            if 'gte' in bounds and not actual >= bounds['gte']:
+                return None
+            if 'lte' in bounds and not actual <= bounds['lte']:
+                return None
+            if 'gt' in bounds and not actual > bounds['gt']:
+                return None
+            if 'lt' in bounds and not actual < bounds['lt']:
+                return None
+            return 0.0
+        raise ValueError(f"Unsupported query type: {kind}")
+
+    @staticmethod
+    def _sort(hits, sort_entry):
+        if sort_entry == '_score':
+            hits.sort(key=lambda hit: hit['_score'], reverse=True)
+            return
+        field, order = next(iter(sort_entry.items()))
+        if isinstance(order, dict):
+            order = order.get('order', 'asc')
+        descending = order == 'desc'
+        present = [hit for hit in hits if hit['_source'].get(field) is not None]
+        missing = [hit for hit in hits if hit['_source'].get(field) is None]
+        present.sort(key=lambda hit: hit['_source'][field], reverse=descending)
+        # Elasticsearch puts documents without the sort field last
+        hits[:] = present + missing
@@ -0,0 +1,188 @@
+import os
+import json
+import time
+import pytest
+import boto3
+from decimal import Decimal
+from moto import mock_aws
+from elasticsearch import Elasticsearch
+from app import app
+from fake_elasticsearch import FakeElasticsearch
+from utils import bulk_index_listings, bulk_delete_listings, ensure_listings_index, reindex_listings_from_table
+from utils import consume_listing_events, get_listing_event_stats
+
+# set ELASTICSEARCH_TEST_URL (e.g. http://localhost:9200) to run against a real
+# Elasticsearch container instead of the in-process stand-in
+ELASTICSEARCH_TEST_URL = os.getenv('ELASTICSEARCH_TEST_URL')
+TEST_INDEX = 'listings-test'
+
+LISTINGS = [
+    {'id': 'desk', 'title': 'Oak desk', 'description': 'Solid wood desk with drawers', 'category': 'furniture',
+     'location': 'St. George', 'price': Decimal('80'), 'datePosted': '2024-11-03T10:00:00',
+     'sellerId': 'alice', 'images': {'https://example.com/desk.jpg'},
+     'imageDerivatives': {'https://example.com/desk.jpg': {'thumbnail': 'https://example.com/desk_thumbnail.webp'}}},
+    {'id': 'chair', 'title': 'Office chair', 'description': 'Ergonomic chair, pairs well with a desk',
+     'category': 'furniture', 'location': 'Scarborough', 'price': Decimal('40'),
+     'datePosted': '2024-11-02T10:00:00', 'sellerId': 'bob'},
+    {'id': 'laptop', 'title': 'Laptop', 'description': 'Fast laptop for school', 'category': 'electronics',
+     'location': 'St. George', 'price': Decimal('600'), 'datePosted': '2024-11-04T10:00:00', 'sellerId': 'alice'},
+    {'id': 'novel', 'title': 'Paperback novel', 'description': 'Light reading', 'category': 'books',
+     'location': 'Mississauga', 'price': Decimal('5'), 'datePosted': '2024-11-01T10:00:00', 'sellerId': 'carol'},
+]
+
+@pytest.fixture
+def client():
+    es = Elasticsearch(ELASTICSEARCH_TEST_URL) if ELASTICSEARCH_TEST_URL else FakeElasticsearch()
+    app.config['TESTING'] = True
+    app.config['ELASTICSEARCH_LISTINGS_INDEX'] = TEST_INDEX
+    app.config['ELASTICSEARCH_CONSUMER_STATS_INDEX'] = f'{TEST_INDEX}-consumer'
+    app.extensions['elasticsearch'] = es
+
+    with app.app_context():
+        ensure_listings_index(recreate=True)
+        bulk_index_listings(LISTINGS, refresh=True)
+
+    with app.test_client() as client:
+        yield client
+
+    with app.app_context():
+        es.indices.delete(index=TEST_INDEX)
+        if es.indices.exists(index=f'{TEST_INDEX}-consumer'):
+            es.indices.delete(index=f'{TEST_INDEX}-consumer')
+    app.extensions.pop('elasticsearch', None)
+
+def refresh_index():
+    app.extensions['elasticsearch'].indices.refresh(index=TEST_INDEX)
+
+def search_ids(client, query_string):
+    response = client.get('/api/search', query_string=query_string)
+    assert response.status_code == 200
+    return [listing['id'] for listing in response.get_json()['listings']]
+
+def test_search_ranks_title_matches_first(client):
+    assert search_ids(client, {'q': 'desk'}) == ['desk', 'chair']
+
+def test_search_filters(client):
+    assert search_ids(client, {'location': 'st. george'}) == ['laptop', 'desk']
+    assert search_ids(client, {'category': 'Furniture', 'maxPrice': 50}) == ['chair']
+    assert search_ids(client, {'q': 'desk', 'location': 'Scarborough'}) == ['chair']
+
+def test_search_sort_and_pagination(client):
+    response = client.get('/api/search', query_string={'sortBy': 'price', 'limit': 3, 'page': 2})
+    data = response.get_json()
+    assert [listing['id'] for listing in data['listings']] == ['laptop']
+    assert data['total'] == 4
+    assert data['totalPages'] == 2
+
+def test_search_documents_are_json_friendly(client):
+    listing = client.get('/api/search', query_string={'q': 'oak'}).get_json()['listings'][0]
+    assert listing['price'] == 80
+    assert listing['images'] == ['https://example.com/desk.jpg']
+    assert listing['imageUrl'] == 'https://example.com/desk.jpg'
+    assert listing['thumbnailUrl'] == 'https://example.com/desk_thumbnail.webp'
+
+def test_search_rejects_bad_params(client):
+    assert client.get('/api/search?sortBy=title').status_code == 400
+    assert client.get('/api/search?page=0').status_code == 400
+
+def test_bulk_delete_listings(client):
+    with app.app_context():
+        assert bulk_delete_listings(['novel', 'missing'], refresh=True) == 0
+    assert 'novel' not in search_ids(client, {})
+
+@pytest.fixture
+def listings_table():
+    with mock_aws():
+        app.config.update(
+            AWS_ACCESS_KEY_ID='testing',
+            AWS_SECRET_ACCESS_KEY='testing',
+            AWS_S3_REGION='us-east-2',
+            AWS_DB_LISTINGS_TABLE_NAME='test-listings-table',
+        )
+        yield boto3.resource('dynamodb', region_name='us-east-2').create_table(
+            TableName='test-listings-table',
+            KeySchema=[{'AttributeName': 'id', 'KeyType': 'HASH'}],
+            AttributeDefinitions=[{'AttributeName': 'id', 'AttributeType': 'S'}],
+            BillingMode='PAY_PER_REQUEST',
+        )
+
+def test_reindex_listings_from_table(client, listings_table):
+    app.config['REINDEX_CHUNK_SIZE'] = 2
+    for i in range(5):
+        listings_table.put_item(Item={'id': f'table-{i}', 'title': f'Bike {i}', 'price': Decimal(i)})
+
+    with app.app_context():
+        indexed, failures = reindex_listings_from_table(recreate=True)
+
+    assert (indexed, failures) == (5, 0)
+    assert sorted(search_ids(client, {'q': 'bike'})) == [f'table-{i}' for i in range(5)]
+
+@pytest.fixture
+def listing_events_queue(listings_table):
+    sqs = boto3.client('sqs', region_name='us-east-2')
+    queue_url = sqs.create_queue(QueueName='listing-events')['QueueUrl']
+    app.config.update(LISTING_EVENTS_QUEUE_URL=queue_url, LISTING_EVENTS_BATCH_SIZE=100)
+    yield lambda event_type, listing_id: sqs.send_message(QueueUrl=queue_url, MessageBody=json.dumps(
+        {'type': event_type, 'listingId': listing_id, 'emittedAt': time.time()}
+    ))
+    app.config['LISTING_EVENTS_QUEUE_URL'] = None
+
+def test_consume_listing_events(client, listings_table, listing_events_queue):
+    publish = listing_events_queue
+    for i in range(15):
+        listings_table.put_item(Item={'id': f'bike-{i}', 'title': f'Bike {i}', 'price': Decimal(i)})
+        publish('upsert', f'bike-{i}')
+    # an edit followed by a delete of the same listing in one batch ends up deleted
+    publish('upsert', 'desk')
+    publish('delete', 'desk')
+
+    with app.app_context():
+        assert consume_listing_events(wait_seconds=0) == 17
+        refresh_index()
+        assert consume_listing_events(wait_seconds=0) == 0
+
+    ids = search_ids(client, {'limit': 100})
+    assert sorted(i for i in ids if i.startswith('bike')) == sorted(f'bike-{i}' for i in range(15))
+    assert 'desk' not in ids
+
+    stats = get_listing_event_stats()
+    assert stats['events_applied'] >= 17
+    assert 0 <= stats['last_lag_seconds'] < 60
+
+    metrics = client.get('/api/search/metrics').get_json()
+    assert metrics['listingEvents'] == {'waiting': 0, 'inFlight': 0}
+    assert metrics['consumer']['events_applied'] == stats['events_applied']
+    assert metrics['consumer']['last_lag_seconds'] == stats['last_lag_seconds']
+
+def test_invalid_listing_events_are_skipped_and_acknowledged(client, listings_table, listing_events_queue):
+    listings_table.put_item(Item={'id': 'lamp', 'title': 'Desk lamp', 'price': Decimal(12)})
+    listing_events_queue('upsert', 'lamp')
+    listing_events_queue('upsert', None)
+    listing_events_queue('rename', 'desk')
+    sqs = boto3.client('sqs', region_name='us-east-2')
+    sqs.send_message(QueueUrl=app.config['LISTING_EVENTS_QUEUE_URL'], MessageBody=json.dumps(['lamp']))
+    skipped_before = get_listing_event_stats()['events_skipped']
+
+    with app.app_context():
+        assert consume_listing_events(wait_seconds=0) == 1
+        refresh_index()
+
+    assert 'lamp' in search_ids(client, {'q': 'lamp'})
+    assert 'desk' in search_ids(client, {'q': 'desk'})
+    assert get_listing_event_stats()['events_skipped'] - skipped_before == 3
+    assert client.get('/api/search/metrics').get_json()['listingEvents'] == {'waiting': 0, 'inFlight': 0}
+
+def test_metrics_without_published_consumer_stats(client, listing_events_queue):
+    assert client.get('/api/search/metrics').get_json()['consumer'] is None
+    # the stats index can exist without the consumer's document
+    app.extensions['elasticsearch'].indices.create(index=f'{TEST_INDEX}-consumer')
+    response = client.get('/api/search/metrics')
+    assert response.status_code == 200
+    assert response.get_json()['consumer'] is None
+
+def test_consume_listing_events_keeps_failed_batches(client, listings_table, listing_events_queue):
+    listing_events_queue('upsert', 'desk')
+    app.config['AWS_DB_LISTINGS_TABLE_NAME'] = 'missing-table'
+    with app.app_context():
+        assert consume_listing_events(wait_seconds=0) == 0
+    assert client.get('/api/search/metrics').get_json()['listingEvents']['inFlight'] == 1
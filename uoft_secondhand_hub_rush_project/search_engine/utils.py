@@ -0,0 +1,443 @@
+import boto3
+import json
+import threading
+import time
+from decimal import Decimal
+from elasticsearch import Elasticsearch
+from elasticsearch import NotFoundError
+from flask import current_app
+
+# Index layout for listings. Free text fields are analyzed for relevance ranking,
+# category/location are lowercase-normalized keywords so filters are exact but
+# case-insensitive, and price/datePosted are typed so they can be ranged and sorted.
+LISTINGS_INDEX_SETTINGS = {
+    'number_of_shards': 1,
+    'number_of_replicas': 0,
+    'analysis': {
+        'normalizer': {
+            'lowercase_normalizer': {'type': 'custom', 'filter': ['lowercase']}
+        }
+    }
+}
+
+LISTINGS_INDEX_MAPPINGS = {
+    'dynamic': False,
+    'properties': {
+        'id': {'type': 'keyword'},
+        'title': {'type': 'text', 'analyzer': 'english'},
+        'description': {'type': 'text', 'analyzer': 'english'},
+        'category': {'type': 'keyword', 'normalizer': 'lowercase_normalizer'},
+        'location': {'type': 'keyword', 'normalizer': 'lowercase_normalizer'},
+        'condition': {'type': 'keyword', 'normalizer': 'lowercase_normalizer'},
+        'price': {'type': 'scaled_float', 'scaling_factor': 100},
+        'datePosted': {'type': 'date', 'ignore_malformed': True},
+        'sellerId': {'type': 'keyword'},
+        'sellerName': {'type': 'keyword', 'index': False},
+        'imageUrl': {'type': 'keyword', 'index': False},
+        'thumbnailUrl': {'type': 'keyword', 'index': False},
+        'images': {'type': 'keyword', 'index': False},
+    }
+}
+
+# fields searched by the free text query, with relevance boosts
+SEARCH_FIELDS = ['title^3', 'category^2', 'description']
+
+# sortBy values accepted by search_listings_index
+SEARCH_SORTS = {
+    'relevance': ['_score', {'datePosted': {'order': 'desc'}}],
+    'datePosted': [{'datePosted': {'order': 'desc'}}],
+    'price': [{'price': {'order': 'asc'}}],
+}
+
+def get_es_client():
+    """
+    Returns the Elasticsearch client for this app, creating it on first use.
+
+    Tests (or a local harness) can install a different client, e.g. the in-process
+    stand-in from fake_elasticsearch.py, by setting app.extensions['elasticsearch'].
+    """
+    client = current_app.extensions.get('elasticsearch')
+    if client is None:
+        client = Elasticsearch(
+            current_app.config['ELASTICSEARCH_URL'],
+            request_timeout=current_app.config['ELASTICSEARCH_REQUEST_TIMEOUT']
+        )
+        current_app.extensions['elasticsearch'] = client
+    return client
+
+def ensure_listings_index(recreate=False):
+    """Creates the listings index with our mapping if it does not exist yet."""
+    es = get_es_client()
+    index_name = current_app.config['ELASTICSEARCH_LISTINGS_INDEX']
+
+    if recreate and es.indices.exists(index=index_name):
+        es.indices.delete(index=index_name)
+        current_app.logger.info(f"Deleted Elasticsearch index '{index_name}'.")
+
+    if not es.indices.exists(index=index_name):
+        es.indices.create(index=index_name, settings=LISTINGS_INDEX_SETTINGS, mappings=LISTINGS_INDEX_MAPPINGS)
+        current_app.logger.info(f"Created Elasticsearch index '{index_name}'.")
+
+def listing_to_document(listing):
+    """Converts a DynamoDB listing item into the document we store in the index."""
+    document = {}
+    for field in LISTINGS_INDEX_MAPPINGS['properties']:
+        value = listing.get(field)
+        if value is None:
+            continue
+        if isinstance(value, Decimal):
+            value = float(value)
+        elif isinstance(value, set):
+            value = sorted(value)
+        document[field] = value
+
+    if document.get('images') and 'imageUrl' not in document:
+        document['imageUrl'] = document['images'][0]
+    # search results render as grid cards, so keep the cover image's thumbnail derivative
+    thumbnail = (listing.get('imageDerivatives') or {}).get(document.get('imageUrl'), {}).get('thumbnail')
+    if thumbnail and 'thumbnailUrl' not in document:
+        document['thumbnailUrl'] = thumbnail
+    return document
+
+def bulk_index_listings(listings, refresh=False):
+    """
+    Indexes listings with a single bulk request.
+
+    Returns:
+        int: The number of listings that failed to index.
+    """
+    operations = []
+    for listing in listings:
+        operations.append({'index': {'_index': current_app.config['ELASTICSEARCH_LISTINGS_INDEX'], '_id': listing['id']}})
+        operations.append(listing_to_document(listing))
+    return _send_bulk(operations, refresh)
+
+def bulk_delete_listings(listing_ids, refresh=False):
+    """
+    Removes listings from the index with a single bulk request.
+
+    Returns:
+        int: The number of deletes that failed (already-missing documents are not failures).
+    """
+    operations = [
+        {'delete': {'_index': current_app.config['ELASTICSEARCH_LISTINGS_INDEX'], '_id': listing_id}}
+        for listing_id in listing_ids
+    ]
+    return _send_bulk(operations, refresh)
+
+def _send_bulk(operations, refresh):
+    if not operations:
+        return 0
+
+    response = get_es_client().bulk(operations=operations, refresh=refresh)
+    if not response.get('errors'):
+        return 0
+
+    failures = 0
+    for item in response['items']:
+        action, result = next(iter(item.items()))
+        if result.get('status', 200) >= 300 and not (action == 'delete' and result.get('status') == 404):
+            failures += 1
+            current_app.logger.error(f"Bulk {action} failed for listing {result.get('_id')}: {result.get('error')}")
+    return failures
+
+def _aws_kwargs():
+    return {
+        'region_name': current_app.config['AWS_S3_REGION'],
+        'aws_access_key_id': current_app.config['AWS_ACCESS_KEY_ID'],
+        'aws_secret_access_key': current_app.config['AWS_SECRET_ACCESS_KEY'],
+    }
+
+def get_listings_table():
+    return boto3.resource('dynamodb', **_aws_kwargs()).Table(current_app.config['AWS_DB_LISTINGS_TABLE_NAME'])
+
+def iter_listings_table_pages():
+    """Yields the DynamoDB listings table one scan page at a time."""
+    table = get_listings_table()
+
+    scan_kwargs = {}
+    while True:
+        response = table.scan(**scan_kwargs)
+        yield response.get('Items', [])
+
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def reindex_listings_from_table(recreate=False):
+    """
+    Rebuilds the search index from the listings DynamoDB table.
+
+    Returns:
+        tuple: (number of listings indexed, number of failures)
+    """
+    ensure_listings_index(recreate=recreate)
+    chunk_size = current_app.config['REINDEX_CHUNK_SIZE']
+
+    indexed = 0
+    failures = 0
+    chunk = []
+    for page in iter_listings_table_pages():
+        for listing in page:
+            chunk.append(listing)
+            if len(chunk) >= chunk_size:
+                failures += bulk_index_listings(chunk)
+                indexed += len(chunk)
+                chunk = []
+    if chunk:
+        failures += bulk_index_listings(chunk)
+        indexed += len(chunk)
+
+    get_es_client().indices.refresh(index=current_app.config['ELASTICSEARCH_LISTINGS_INDEX'])
+    current_app.logger.info(f"Reindexed {indexed} listings ({failures} failures).")
+    return indexed - failures, failures
+
+def build_listings_query(query=None, category=None, location=None, min_price=None, max_price=None):
+    """Builds the bool query: text relevance in `must`, exact filters in `filter` (not scored)."""
+    if query:
+        must = [{'multi_match': {'query': query, 'fields': SEARCH_FIELDS, 'fuzziness': 'AUTO'}}]
+    else:
+        must = [{'match_all': {}}]
+
+    filters = []
+    if category:
+        filters.append({'term': {'category': category}})
+    if location:
+        filters.append({'term': {'location': location}})
+    price_range = {}
+    if min_price is not None:
+        price_range['gte'] = min_price
+    if max_price is not None:
+        price_range['lte'] = max_price
+    if price_range:
+        filters.append({'range': {'price': price_range}})
+
+    return {'bool': {'must': must, 'filter': filters}}
+
+def search_listings_index(query=None, category=None, location=None, min_price=None, max_price=None,
+                          sort_by=None, page=1, limit=20):
+    """
+    Runs a paginated listings search.
+
+    Returns:
+        tuple: (list of listing documents for the page, total number of matches)
+    """
+    if sort_by is None:
+        sort_by = 'relevance' if query else 'datePosted'
+
+    response = get_es_client().search(
+        index=current_app.config['ELASTICSEARCH_LISTINGS_INDEX'],
+        query=build_listings_query(query, category, location, min_price, max_price),
+        sort=SEARCH_SORTS[sort_by],
+        from_=(page - 1) * limit,
+        size=limit,
+        track_total_hits=True
+    )
+    hits = response['hits']
+    return [hit['_source'] for hit in hits['hits']], hits['total']['value']
+
+# Listing change events (published by listings_service to an SQS queue)
+
+LISTING_EVENT_TYPES = {'upsert', 'delete'}
+
+_consumer_stats_lock = threading.Lock()
+_consumer_stats = {
+    'events_received': 0,
+    'events_skipped': 0,
+    'events_applied': 0,
+    'batches_applied': 0,
+    'batches_failed': 0,
+    'last_lag_seconds': None,
+    'max_lag_seconds': None,
+    'last_applied_at': None,
+}
+
+def get_listing_event_stats():
+    """Returns a snapshot of the listing events consumer counters and lag."""
+    with _consumer_stats_lock:
+        return dict(_consumer_stats)
+
+def _record_applied_batch(events, applied_at):
+    # lag is measured from when listings_service emitted the event to when the
+    # index write covering it returned
+    lags = [applied_at - event['emittedAt'] for event in events
+            if isinstance(event.get('emittedAt'), (int, float))]
+    with _consumer_stats_lock:
+        _consumer_stats['events_applied'] += len(events)
+        _consumer_stats['batches_applied'] += 1
+        _consumer_stats['last_applied_at'] = applied_at
+        if lags:
+            _consumer_stats['last_lag_seconds'] = max(lags)
+            _consumer_stats['max_lag_seconds'] = max(_consumer_stats['max_lag_seconds'] or 0, max(lags))
+
+def publish_listing_event_stats():
+    """
+    Stores this consumer's stats as a single document in Elasticsearch, so the web
+    processes (which do not consume events) can report lag on /api/search/metrics.
+    """
+    stats = dict(get_listing_event_stats(), published_at=time.time())
+    get_es_client().index(index=current_app.config['ELASTICSEARCH_CONSUMER_STATS_INDEX'],
+                          id='listing-events', document=stats)
+
+def get_published_listing_event_stats():
+    """Returns the stats last published by the listing events consumer, or None if it never ran."""
+    try:
+        return get_es_client().get(index=current_app.config['ELASTICSEARCH_CONSUMER_STATS_INDEX'],
+                                   id='listing-events')['_source']
+    except NotFoundError:
+        # no stats index yet, or it exists without the document
+        return None
+
+def _try_publish_listing_event_stats():
+    # stats are best effort: the batch is applied whether or not they are published
+    try:
+        publish_listing_event_stats()
+    except Exception as e:
+        current_app.logger.error(f"Failed to publish listing event stats: {e}")
+
+def get_listing_events_backlog():
+    """Returns how many listing events are waiting in the queue or being processed."""
+    attributes = boto3.client('sqs', **_aws_kwargs()).get_queue_attributes(
+        QueueUrl=current_app.config['LISTING_EVENTS_QUEUE_URL'],
+        AttributeNames=['ApproximateNumberOfMessages', 'ApproximateNumberOfMessagesNotVisible']
+    )['Attributes']
+    return {
+        'waiting': int(attributes['ApproximateNumberOfMessages']),
+        'inFlight': int(attributes['ApproximateNumberOfMessagesNotVisible']),
+    }
+
+def fetch_listings_by_ids(listing_ids):
+    """
+    Reads the current version of each listing with BatchGetItem.
+
+    Returns:
+        dict: listing id -> item, for the listings that still exist
+    """
+    dynamodb = boto3.resource('dynamodb', **_aws_kwargs())
+    table_name = current_app.config['AWS_DB_LISTINGS_TABLE_NAME']
+    listing_ids = list(listing_ids)
+
+    found = {}
+    for start in range(0, len(listing_ids), 100):
+        request = {table_name: {'Keys': [{'id': listing_id} for listing_id in listing_ids[start:start + 100]]}}
+        attempts = 0
+        while request:
+            response = dynamodb.batch_get_item(RequestItems=request)
+            for item in response.get('Responses', {}).get(table_name, []):
+                found[item['id']] = item
+            request = response.get('UnprocessedKeys')
+            attempts += 1
+            if request and attempts >= 5:
+                raise RuntimeError(f"BatchGetItem left {len(request[table_name]['Keys'])} keys unprocessed")
+            if request:
+                time.sleep(0.05 * 2 ** attempts)
+    return found
+
+def valid_listing_events(events):
+    """
+    Returns the events that can be applied, logging and leaving out the rest: events
+    without a listingId or with a type listings_service does not publish.
+    """
+    valid = []
+    for event in events:
+        if (isinstance(event, dict) and event.get('type') in LISTING_EVENT_TYPES
+                and isinstance(event.get('listingId'), str) and event['listingId']):
+            valid.append(event)
+        else:
+            current_app.logger.error(f"Skipping invalid listing event: {event!r}")
+    return valid
+
+def apply_listing_events(events):
+    """
+    Applies a batch of listing change events to the search index.
+
+    Events are collapsed per listing and each surviving id is re-read from the listings
+    table, so the index ends up with the table's current state no matter how events were
+    ordered or duplicated: listings that still exist are re-indexed, the rest deleted.
+    Invalid events are skipped (see valid_listing_events).
+
+    Returns:
+        int: The number of index operations that failed.
+    """
+    listing_ids = {event['listingId'] for event in valid_listing_events(events)}
+    if not listing_ids:
+        return 0
+
+    current = fetch_listings_by_ids(listing_ids)
+    missing = [listing_id for listing_id in listing_ids if listing_id not in current]
+
+    failures = bulk_index_listings(list(current.values()))
+    failures += bulk_delete_listings(missing)
+    return failures
+
+def consume_listing_events(wait_seconds=None):
+    """
+    Receives one batch of listing events from the queue and applies it to the index.
+
+    Messages are only deleted from the queue once the whole batch has been applied, so a
+    failed batch is redelivered after the queue's visibility timeout. Messages that are
+    not valid listing events are logged and deleted with the batch, as redelivering
+    them can never succeed. The consumer's stats are published after every batch.
+
+    Returns:
+        int: The number of events applied.
+    """
+    queue_url = current_app.config['LISTING_EVENTS_QUEUE_URL']
+    batch_size = current_app.config['LISTING_EVENTS_BATCH_SIZE']
+    if wait_seconds is None:
+        wait_seconds = current_app.config['LISTING_EVENTS_WAIT_SECONDS']
+    sqs = boto3.client('sqs', **_aws_kwargs())
+
+    # SQS hands out at most 10 messages per receive, so keep pulling until the batch
+    # is full or the queue is drained
+    messages = []
+    while len(messages) < batch_size:
+        response = sqs.receive_message(
+            QueueUrl=queue_url,
+            MaxNumberOfMessages=min(10, batch_size - len(messages)),
+            WaitTimeSeconds=0 if messages else wait_seconds
+        )
+        received = response.get('Messages', [])
+        if not received:
+            break
+        messages.extend(received)
+
+    if not messages:
+        return 0
+
+    events = []
+    for message in messages:
+        try:
+            events.append(json.loads(message['Body']))
+        except ValueError:
+            current_app.logger.error(f"Dropping malformed listing event: {message['Body']!r}")
+    events = valid_listing_events(events)
+    with _consumer_stats_lock:
+        _consumer_stats['events_received'] += len(messages)
+        _consumer_stats['events_skipped'] += len(messages) - len(events)
+
+    try:
+        failures = apply_listing_events(events)
+    except Exception as e:
+        failures = None
+        current_app.logger.error(f"Failed to apply listing events: {e}")
+    if failures:
+        current_app.logger.error(f"{failures} index operations failed; leaving {len(messages)} events for redelivery.")
+    if failures is None or failures:
+        with _consumer_stats_lock:
+            _consumer_stats['batches_failed'] += 1
+        _try_publish_listing_event_stats()
+        return 0
+
+    _record_applied_batch(events, time.time())
+    _try_publish_listing_event_stats()
+    for start in range(0, len(messages), 10):
+        sqs.delete_message_batch(
+            QueueUrl=queue_url,
+            Entries=[
+                {'Id': str(i), 'ReceiptHandle': message['ReceiptHandle']}
+                for i, message in enumerate(messages[start:start + 10])
+            ]
+        )
+    current_app.logger.info(f"Applied {len(events)} listing events.")
+    return len(events)
@@ -11,7 +11,6 @@ from werkzeug.security import generate_password_hash, check_password_hash
 import uuid
 import os
 from itsdangerous import URLSafeTimedSerializer, SignatureExpired, BadSignature
-import smtplib
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from flask_cors import CORS
@@ -19,14 +18,25 @@ from flask_sqlalchemy import SQLAlchemy
 import datetime
 import json
 
+from mailer import MailQueue
+from pending_store import create_pending_registration_store
+from revocation import RevocationCache
+from wishlist_cache import WishlistCache
 from utils import (
     get_user_table,
+    init_user_table,
+    get_table_stats,
     upload_to_user_table,
     get_user_by_id,
     get_user_by_username,
+    get_user_by_email,
     scan_users_by_attribute,
     update_user,
     upload_to_user_s3,
+    get_user_wishlist,
+    add_to_user_wishlist,
+    remove_from_user_wishlist,
+    wishlist_to_set,
 )
 
 db = SQLAlchemy()
@@ -46,11 +56,6 @@ def send_verification_email(email, username, serializer):
     # Email content
     subject = "Verify Your Email Address"
     sender_email = current_app.config["SENDER_EMAIL"]
-    smtp_server = current_app.config["SMTP_SERVER"]
-    smtp_port = current_app.config["SMTP_PORT"]
-    smtp_username = current_app.config["SMTP_USERNAME"]
-    smtp_password = current_app.config["SMTP_PASSWORD"]
-
     receiver_email = email
 
     # Craft the email message
@@ -78,17 +83,12 @@ def send_verification_email(email, username, serializer):
     message.attach(part1)
     message.attach(part2)
 
-    # Send the email via SMTP
-    try:
-        with smtplib.SMTP(smtp_server, smtp_port) as server:
-            server.starttls()  # Upgrade the connection to secure
-            server.login(smtp_username, smtp_password)
-            server.sendmail(sender_email, receiver_email, message.as_string())
-        current_app.logger.info(f"Verification email sent to {receiver_email}")
+    # Hand the email to the background mail queue; delivery happens off the request path
+    if current_app.mail_queue.enqueue(sender_email, receiver_email, message):
+        current_app.logger.info(f"Verification email queued for {receiver_email}")
         return token
-    except Exception as e:
-        current_app.logger.error(f"Failed to send verification email: {e}")
-        return None
+    current_app.logger.error(f"Failed to queue verification email for {receiver_email}")
+    return None
 
 
 def send_password_reset_email(email, username, serializer):
@@ -107,11 +107,6 @@ def send_password_reset_email(email, username, serializer):
     # Email content
     subject = "Password Reset Request"
     sender_email = current_app.config["SENDER_EMAIL"]
-    smtp_server = current_app.config["SMTP_SERVER"]
-    smtp_port = current_app.config["SMTP_PORT"]
-    smtp_username = current_app.config["SMTP_USERNAME"]
-    smtp_password = current_app.config["SMTP_PASSWORD"]
-
     receiver_email = email
 
     # Craft the email message
@@ -149,17 +144,12 @@ Thank you!
     message.attach(part1)
     message.attach(part2)
 
-    # Send the email via SMTP
-    try:
-        with smtplib.SMTP(smtp_server, smtp_port) as server:
-            server.starttls()  # Upgrade the connection to secure
-            server.login(smtp_username, smtp_password)
-            server.sendmail(sender_email, receiver_email, message.as_string())
-        current_app.logger.info(f"Password reset email sent to {receiver_email}")
+    # Hand the email to the background mail queue; delivery happens off the request path
+    if current_app.mail_queue.enqueue(sender_email, receiver_email, message):
+        current_app.logger.info(f"Password reset email queued for {receiver_email}")
         return token
-    except Exception as e:
-        current_app.logger.error(f"Failed to send password reset email: {e}")
-        return None
+    current_app.logger.error(f"Failed to queue password reset email for {receiver_email}")
+    return None
 
 
 def create_app(config_filename=None):
@@ -185,6 +175,10 @@ def create_app(config_filename=None):
             SMTP_USERNAME=os.getenv("SMTP_USERNAME", "default_smtp_user"),
             SMTP_PASSWORD=os.getenv("SMTP_PASSWORD", "default_smtp_password"),
             SENDER_EMAIL=os.getenv("SENDER_EMAIL", "no-reply@default.com"),
+            SMTP_USE_TLS=os.getenv("SMTP_USE_TLS", "true").lower() == "true",
+            MAIL_WORKERS=int(os.getenv("MAIL_WORKERS", 2)),
+            MAIL_MAX_RETRIES=int(os.getenv("MAIL_MAX_RETRIES", 3)),
+            MAIL_RETRY_BACKOFF=float(os.getenv("MAIL_RETRY_BACKOFF", 1.0)),
             AWS_ACCESS_KEY_ID=os.getenv("AWS_ACCESS_KEY_ID", "default_access_key"),
             AWS_SECRET_ACCESS_KEY=os.getenv(
                 "AWS_SECRET_ACCESS_KEY", "default_secret_key"
@@ -201,6 +195,18 @@ def create_app(config_filename=None):
             ),
             SQLALCHEMY_TRACK_MODIFICATIONS=False,
             JWT_ACCESS_TOKEN_EXPIRES=datetime.timedelta(minutes=30),
+            PENDING_REGISTRATION_BACKEND=os.getenv("PENDING_REGISTRATION_BACKEND", "memory"),
+            PENDING_REGISTRATION_TTL=int(os.getenv("PENDING_REGISTRATION_TTL", 3600)),
+            PENDING_REGISTRATION_MAX_ENTRIES=int(os.getenv("PENDING_REGISTRATION_MAX_ENTRIES", 10000)),
+            PENDING_REGISTRATIONS_TABLE_NAME=os.getenv("PENDING_REGISTRATIONS_TABLE_NAME"),
+            REVOCATION_SYNC_INTERVAL=float(os.getenv("REVOCATION_SYNC_INTERVAL", 1.0)),
+            REVOCATION_PURGE_INTERVAL=int(os.getenv("REVOCATION_PURGE_INTERVAL", 300)),
+            WISHLIST_CACHE_TTL=float(os.getenv("WISHLIST_CACHE_TTL", 5.0)),
+            WISHLIST_CACHE_MAX_USERS=int(os.getenv("WISHLIST_CACHE_MAX_USERS", 10000)),
+            WISHLIST_CHECK_MAX_IDS=int(os.getenv("WISHLIST_CHECK_MAX_IDS", 200)),
+            VERIFY_USER_TABLE_ON_STARTUP=os.getenv(
+                "VERIFY_USER_TABLE_ON_STARTUP", "true"
+            ).lower() == "true",
         )
 
     # Initialize extensions
@@ -211,8 +217,17 @@ def create_app(config_filename=None):
     serializer = URLSafeTimedSerializer(app.config["SECRET_KEY"])
     app.serializer = serializer
 
-    # Initialize pending registrations store
-    app.pending_registrations = {}
+    # Background queue that delivers verification and password reset emails
+    app.mail_queue = MailQueue(app)
+
+    # Initialize pending registrations store (shared across workers unless the memory backend is used)
+    app.pending_registrations = create_pending_registration_store(app.config)
+
+    # Per-user wishlist sets for the bulk membership check
+    app.wishlist_cache = WishlistCache(
+        ttl_seconds=app.config.get("WISHLIST_CACHE_TTL", 5.0),
+        max_users=app.config.get("WISHLIST_CACHE_MAX_USERS", 10000),
+    )
 
     # Register routes
     register_routes(app)
@@ -224,12 +239,16 @@ def create_app(config_filename=None):
     with app.app_context():
         db.create_all()
 
-    # Set up JWT token-in-blacklist callback
+        # Verify the users table once up front so requests reuse the cached handle
+        if app.config.get("VERIFY_USER_TABLE_ON_STARTUP", True):
+            init_user_table()
+
+    # Set up JWT token-in-blacklist callback, answered from the in-process revocation cache
+    app.revocation_cache = RevocationCache(app, db, TokenBlocklist)
+
     @jwt.token_in_blocklist_loader
     def check_if_token_revoked(jwt_header, jwt_payload):
-        jti = jwt_payload["jti"]
-        token = TokenBlocklist.query.filter_by(jti=jti).first()
-        return token is not None
+        return app.revocation_cache.is_revoked(jwt_payload["jti"])
 
     return app
 
@@ -271,6 +290,15 @@ def register_routes(app):
     def simple_health_check():
         return jsonify({"status": "healthy"}), 200
 
+    @app.route("/api/users/metrics", methods=["GET"])
+    def metrics():
+        return jsonify({
+            "dynamodb": get_table_stats(),
+            "mail": app.mail_queue.stats(),
+            "revocation": app.revocation_cache.stats(),
+            "wishlist_cache": app.wishlist_cache.stats(),
+        }), 200
+
     @app.route("/api/users/pre_register", methods=["POST"])
     def pre_register():
         app.logger.info("Received pre-registration request")
@@ -297,11 +325,10 @@ def register_routes(app):
             return jsonify({"error": "U of T email is required"}), 401
 
         # Check if username or email already exists
-        exists_username = scan_users_by_attribute("username", username)
-        exists_email = scan_users_by_attribute("email", email)
+        exists_username = get_user_by_username(username)
+        exists_email = get_user_by_email(email)
 
         if exists_username and exists_email:
-            assert(len(exists_username) == 1 and len(exists_email) == 1)
             app.logger.info(
                 f"Pre-registration failed: Username and email already exist for {email}"
             )
@@ -310,22 +337,21 @@ def register_routes(app):
                 400,
             )
         elif exists_username:
-            assert(len(exists_username) == 1)
             app.logger.info(
                 f"Pre-registration failed: Username already exists for {username}"
             )
             return jsonify({"error": "User with this username already exists"}), 400
         elif exists_email:
-            assert(len(exists_email) == 1)
             app.logger.info(
                 f"Pre-registration failed: Email already exists for {email}"
             )
             return jsonify({"error": "User with this email already exists"}), 400
 
-        # Temporarily store user data in pending registrations
+        # Temporarily store user data in pending registrations; the password is hashed
+        # now so the plaintext never reaches a shared store
         app.pending_registrations[email] = {
             "username": username,
-            "password": password,
+            "password_hash": generate_password_hash(password),
             "wishlist": wishlist,
             "categories": categories,
             "location": location,
@@ -348,7 +374,7 @@ def register_routes(app):
             )
         else:
             # Cleanup pending registration if email sending fails
-            del app.pending_registrations[email]
+            app.pending_registrations.delete(email)
             app.logger.error(f"Failed to send verification email to {email}")
             return (
                 jsonify(
@@ -364,8 +390,8 @@ def register_routes(app):
         try:
             # Decode the token to get the email
             email = app.serializer.loads(
-                token, salt="email-confirm-salt", max_age=3600
-            )  # 1 hour validity
+                token, salt="email-confirm-salt", max_age=app.config["PENDING_REGISTRATION_TTL"]
+            )  # 1 hour validity, same as the pending registration
             app.logger.info(f"Token decoded successfully for {email}")
 
             pending_data = app.pending_registrations.get(email)
@@ -382,12 +408,16 @@ def register_routes(app):
                 "id": str(uuid.uuid4()),  # Assuming 'id' is the primary key
                 "username": pending_data["username"],
                 "email": email,
-                "password": generate_password_hash(pending_data["password"]),
-                "wishlist": pending_data["wishlist"],
+                "password": pending_data["password_hash"],
                 "categories": pending_data["categories"],
                 "location": pending_data["location"],
                 "email_verified": True,
             }
+            # stored as a string set from the start (and left out while empty), so the
+            # first wishlist add is a single atomic ADD
+            wishlist = wishlist_to_set(pending_data["wishlist"])
+            if wishlist:
+                user_data["wishlist"] = wishlist
             app.logger.info(f"Uploading user data to DynamoDB for {email}")
             success = upload_to_user_table(user_data)
 
@@ -396,7 +426,7 @@ def register_routes(app):
                 return jsonify({"error": "Failed to create user in database"}), 500
 
             # Remove from pending registrations
-            del app.pending_registrations[email]
+            app.pending_registrations.delete(email)
             app.logger.info(
                 f"User {email} successfully registered and pending registration removed"
             )
@@ -462,7 +492,7 @@ def register_routes(app):
             return jsonify({"error": "Username parameter is required"}), 400
 
         # Check if a user with this username exists
-        existing_user = scan_users_by_attribute("username", username)
+        existing_user = get_user_by_username(username)
         if existing_user:
             return jsonify({"exists": True}), 200
         else:
@@ -477,7 +507,7 @@ def register_routes(app):
             return jsonify({"error": "Email parameter is required"}), 400
 
         # Check if a user with this email exists
-        existing_user = scan_users_by_attribute("email", email)
+        existing_user = get_user_by_email(email)
         if existing_user:
             return jsonify({"exists": True}), 200
         else:
@@ -495,14 +525,11 @@ def register_routes(app):
         if not email or not password:
             return jsonify({"error": "Email and password are required"}), 400
 
-        # Fetch users by email (returns a list)
-        users = scan_users_by_attribute("email", email)
-        if not users or len(users) == 0:
+        # Fetch the user through the email index
+        user = get_user_by_email(email)
+        if not user:
             return jsonify({"error": "Invalid email or password"}), 401
 
-        # Since email should be unique, take the first user
-        user = users[0]
-
         if not check_password_hash(user["password"], password):
             return jsonify({"error": "Invalid email or password"}), 401
 
@@ -516,10 +543,7 @@ def register_routes(app):
     @app.route("/api/users/logout", methods=["POST"])
     @jwt_required()
     def logout():
-        jti = get_jwt()["jti"]
-        now = datetime.datetime.utcnow()
-        db.session.add(TokenBlocklist(jti=jti, created_at=now))
-        db.session.commit()
+        app.revocation_cache.revoke(get_jwt()["jti"])
         return jsonify({"message": "Successfully logged out"}), 200
 
     @app.route("/api/users/user_id", methods=["GET"])
@@ -608,25 +632,16 @@ def register_routes(app):
 
         listing_id = data["listingId"]
 
-        # Fetch user data
-        user = get_user_by_id(user_id)
-        if not user:
-            return jsonify({"error": "User not found"}), 404
-
-        # Initialize wishlist as list if it doesn't exist or is a string
-        if not user.get("wishlist") or isinstance(user["wishlist"], str):
-            user["wishlist"] = []
-        
-        # Update the user's wishlist
-        if listing_id not in user["wishlist"]:
-            user["wishlist"].append(listing_id)
-
-        success = update_user(user_id, {"wishlist": user["wishlist"]})
-        if not success:
+        # Single atomic ADD on the wishlist string set; concurrent adds can't overwrite each other
+        wishlist = add_to_user_wishlist(user_id, listing_id)
+        if wishlist is None:
+            if not get_user_by_id(user_id):
+                return jsonify({"error": "User not found"}), 404
             return jsonify({"error": "Failed to update wishlist"}), 500
+        app.wishlist_cache.set(user_id, wishlist)
 
         return (
-            jsonify({"message": "Listing added to wishlist", "wishlist": user["wishlist"]}),
+            jsonify({"message": "Listing added to wishlist", "wishlist": wishlist}),
             200,
         )
 
@@ -634,16 +649,15 @@ def register_routes(app):
     @jwt_required()
     def remove_from_wishlist(listing_id):
         user_id = get_jwt_identity()
-        user = get_user_by_id(user_id)
-        
-        if not user:
-            return jsonify({"error": "User not found"}), 404
-            
-        wishlist = user.get("wishlist", [])
-        if listing_id in wishlist:
-            wishlist.remove(listing_id)
-            update_user(user_id, {"wishlist": wishlist})
-            
+
+        # Single atomic DELETE on the wishlist string set
+        wishlist = remove_from_user_wishlist(user_id, listing_id)
+        if wishlist is None:
+            if not get_user_by_id(user_id):
+                return jsonify({"error": "User not found"}), 404
+            return jsonify({"error": "Failed to update wishlist"}), 500
+        app.wishlist_cache.set(user_id, wishlist)
+
         return jsonify({"message": "Removed from wishlist", "wishlist": wishlist}), 200
 
     @app.route("/api/users/edit_user", methods=["POST"])
@@ -711,6 +725,8 @@ def register_routes(app):
         # Proceed to update with only allowed fields
         try:
             if update_user(user_id, data):
+                if "wishlist" in data:
+                    app.wishlist_cache.invalidate(user_id)
                 current_app.logger.info(f"User {user_id} updated successfully with data: {data}")
                 return jsonify({"message": "Updated user successfully"}), 200
             else:
@@ -742,6 +758,30 @@ def register_routes(app):
 
         return jsonify({"is_in_wishlist": is_in_wishlist}), 200
 
+    @app.route("/api/users/wishlist/check_bulk", methods=["POST"])
+    @jwt_required()
+    def check_wishlist_bulk():
+        user_id = get_jwt_identity()
+        data = request.get_json(silent=True)
+
+        listing_ids = data.get("listingIds") if isinstance(data, dict) else None
+        if not isinstance(listing_ids, list) or not all(isinstance(listing_id, str) for listing_id in listing_ids):
+            return jsonify({"error": "listingIds must be a list of listing IDs"}), 400
+
+        max_ids = app.config.get("WISHLIST_CHECK_MAX_IDS", 200)
+        if len(listing_ids) > max_ids:
+            return jsonify({"error": f"At most {max_ids} listing IDs can be checked at once"}), 400
+
+        # One wishlist read answers the whole page, and repeat pages come from the cache
+        wishlist = app.wishlist_cache.get(user_id)
+        if wishlist is None:
+            wishlist = get_user_wishlist(user_id)
+            if wishlist is None:
+                return jsonify({"error": "User not found"}), 404
+            app.wishlist_cache.set(user_id, wishlist)
+
+        return jsonify({"in_wishlist": {listing_id: listing_id in wishlist for listing_id in listing_ids}}), 200
+
 
     @app.route("/api/users/change_password", methods=["POST"])
     @jwt_required()
@@ -811,14 +851,12 @@ def register_routes(app):
             return jsonify({"error": "Email is required"}), 400
 
         # Check if the user exists
-        users = scan_users_by_attribute("email", email)
-        if not users:
+        user = get_user_by_email(email)
+        if not user:
             app.logger.warning(f"Forgot password requested for non-existent email: {email}")
             # To prevent email enumeration, respond with a generic message
             return jsonify({"message": "If the email exists, a reset link has been sent."}), 200
 
-        assert(len(users) == 1)
-        user = users[0]
         username = user["username"]
 
         # Generate and send a password reset email
@@ -859,13 +897,11 @@ def register_routes(app):
             app.logger.info(f"Token decoded successfully for {email}")
 
             # Fetch user data
-            users = scan_users_by_attribute("email", email)
-            if not users:
+            user = get_user_by_email(email)
+            if not user:
                 app.logger.warning(f"No user found for email: {email}")
                 return jsonify({"error": "Invalid token or user does not exist"}), 400
 
-            assert(len(users) == 1)
-            user = users[0]
             user_id = user["id"]
 
             # Update the user's password
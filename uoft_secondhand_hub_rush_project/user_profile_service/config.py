@@ -14,4 +14,29 @@ SMTP_SERVER = os.getenv('SMTP_SERVER')
 SMTP_PORT = os.getenv('SMTP_PORT')
 SMTP_USERNAME = os.getenv('SMTP_USERNAME')
 SMTP_PASSWORD = os.getenv('SMTP_PASSWORD')
-SENDER_EMAIL = os.getenv('SENDER_EMAIL')
\ No newline at end of file
+SENDER_EMAIL = os.getenv('SENDER_EMAIL')
+SMTP_USE_TLS = os.getenv('SMTP_USE_TLS', 'true').lower() == 'true'
+
+# Background mail queue: worker threads (one SMTP connection each) and retry policy
+MAIL_WORKERS = int(os.getenv('MAIL_WORKERS', 2))
+MAIL_MAX_RETRIES = int(os.getenv('MAIL_MAX_RETRIES', 3))
+MAIL_RETRY_BACKOFF = float(os.getenv('MAIL_RETRY_BACKOFF', 1.0))
+
+# Verify the DynamoDB users table once at startup instead of on every request
+VERIFY_USER_TABLE_ON_STARTUP = os.getenv('VERIFY_USER_TABLE_ON_STARTUP', 'true').lower() == 'true'
+
+# Registrations waiting on email verification: 'memory' (single worker) or 'dynamodb' (shared)
+PENDING_REGISTRATION_BACKEND = os.getenv('PENDING_REGISTRATION_BACKEND', 'memory')
+PENDING_REGISTRATION_TTL = int(os.getenv('PENDING_REGISTRATION_TTL', 3600))
+PENDING_REGISTRATION_MAX_ENTRIES = int(os.getenv('PENDING_REGISTRATION_MAX_ENTRIES', 10000))
+PENDING_REGISTRATIONS_TABLE_NAME = os.getenv('PENDING_REGISTRATIONS_TABLE_NAME')
+
+# JWT revocation cache: how often each worker pulls new blocklist entries, and how
+# often expired entries are purged from the table
+REVOCATION_SYNC_INTERVAL = float(os.getenv('REVOCATION_SYNC_INTERVAL', 1.0))
+REVOCATION_PURGE_INTERVAL = int(os.getenv('REVOCATION_PURGE_INTERVAL', 300))
+
+# Per-worker cache of wishlist sets used by the bulk membership check (TTL 0 disables it)
+WISHLIST_CACHE_TTL = float(os.getenv('WISHLIST_CACHE_TTL', 5.0))
+WISHLIST_CACHE_MAX_USERS = int(os.getenv('WISHLIST_CACHE_MAX_USERS', 10000))
+WISHLIST_CHECK_MAX_IDS = int(os.getenv('WISHLIST_CHECK_MAX_IDS', 200))
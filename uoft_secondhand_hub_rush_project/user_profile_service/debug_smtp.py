@@ -0,0 +1,139 @@
+"""
+Minimal SMTP server for local development and tests.
+
+It accepts every message (and any AUTH PLAIN/LOGIN credentials) and keeps the
+raw messages in memory instead of delivering them. It does not offer STARTTLS,
+so point the service at it with SMTP_USE_TLS=false.
+
+Run it standalone to print incoming mail to stdout:
+    python debug_smtp.py --port 1025
+"""
+import argparse
+import email
+import socketserver
+import threading
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        server = self.server
+        self.reply("220 debug-smtp ready")
+        sender, recipients = None, []
+
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command, _, argument = line.decode(errors="replace").rstrip("\r\n").partition(" ")
+            command = command.upper()
+
+            if command in ("EHLO", "HELO"):
+                if command == "EHLO":
+                    self.reply("250-debug-smtp")
+                    self.reply("250 AUTH PLAIN LOGIN")
+                else:
+                    self.reply("250 debug-smtp")
+            elif command == "AUTH":
+                if argument.upper().startswith("LOGIN"):
+                    # username and password prompts; their content is ignored
+                    self.reply("334 VXNlcm5hbWU6")
+                    self.rfile.readline()
+                    self.reply("334 UGFzc3dvcmQ6")
+                    self.rfile.readline()
+                self.reply("235 Authentication successful")
+            elif command == "MAIL":
+                if server.fail_next > 0:
+                    server.fail_next -= 1
+                    self.reply("421 Service not available, try again later")
+                    return
+                sender, recipients = argument.split(":", 1)[1].strip("<> "), []
+                self.reply("250 OK")
+            elif command == "RCPT":
+                recipients.append(argument.split(":", 1)[1].strip("<> "))
+                self.reply("250 OK")
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                while True:
+                    data_line = self.rfile.readline()
+                    if data_line in (b".\r\n", b".\n", b""):
+                        break
+                    lines.append(data_line[1:] if data_line.startswith(b"..") else data_line)
+                server.received(sender, recipients, b"".join(lines))
+                self.reply("250 OK: queued")
+            elif command == "RSET":
+                sender, recipients = None, []
+                self.reply("250 OK")
+            elif command == "NOOP":
+                self.reply("250 OK")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+class DebugSMTPServer(socketserver.ThreadingTCPServer):
+    """
+    Runs in a background thread; use as a context manager in tests:
+
+        with DebugSMTPServer() as smtp:
+            app.config["SMTP_PORT"] = smtp.port
+            ...
+            assert smtp.messages[0]["To"] == "someone@mail.utoronto.ca"
+    """
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, echo=False):
+        super().__init__((host, port), _SMTPHandler)
+        self.host, self.port = self.server_address
+        self.echo = echo
+        self.messages = []
+        self.connections = 0
+        # number of upcoming MAIL commands to reject with a transient 421 (for retry tests)
+        self.fail_next = 0
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def process_request(self, request, client_address):
+        with self._lock:
+            self.connections += 1
+        super().process_request(request, client_address)
+
+    def received(self, sender, recipients, raw):
+        message = email.message_from_bytes(raw)
+        with self._lock:
+            self.messages.append(message)
+        if self.echo:
+            print(f"---------- from {sender} to {', '.join(recipients)} ----------")
+            print(raw.decode(errors="replace"), flush=True)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    args = parser.parse_args()
+
+    server = DebugSMTPServer(args.host, args.port, echo=True)
+    print(f"Debug SMTP server listening on {server.host}:{server.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
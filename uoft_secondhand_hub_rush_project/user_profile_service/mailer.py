@@ -0,0 +1,146 @@
+"""
+Background delivery queue for outgoing email.
+
+Request handlers build the message and call MailQueue.enqueue(), which returns
+immediately. A small pool of worker threads sends the queued messages. Each
+worker keeps its own SMTP connection open between messages (smtplib connections
+are not thread-safe) and closes it after MAIL_SMTP_IDLE_TIMEOUT seconds without
+work. Failed sends are retried with exponential backoff on a fresh connection.
+"""
+import queue
+import smtplib
+import threading
+import time
+
+def _is_permanent(error):
+    # 5xx replies (bad recipient, rejected credentials) will not succeed on a retry
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return True
+    return isinstance(error, smtplib.SMTPResponseException) and 500 <= error.smtp_code < 600
+
+class MailQueue:
+    def __init__(self, app=None):
+        self._queue = None
+        self._workers = []
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {"queued": 0, "sent": 0, "retried": 0, "failed": 0, "dropped": 0, "connections": 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.config = {
+            "server": app.config["SMTP_SERVER"],
+            "port": int(app.config["SMTP_PORT"] or 587),
+            "username": app.config["SMTP_USERNAME"],
+            "password": app.config["SMTP_PASSWORD"],
+            "use_tls": app.config.get("SMTP_USE_TLS", True),
+            "timeout": app.config.get("SMTP_TIMEOUT", 10),
+            "workers": app.config.get("MAIL_WORKERS", 2),
+            "max_retries": app.config.get("MAIL_MAX_RETRIES", 3),
+            "retry_backoff": app.config.get("MAIL_RETRY_BACKOFF", 1.0),
+            "idle_timeout": app.config.get("MAIL_SMTP_IDLE_TIMEOUT", 60),
+        }
+        self._queue = queue.Queue(maxsize=app.config.get("MAIL_QUEUE_SIZE", 1000))
+        app.extensions["mail_queue"] = self
+
+    def enqueue(self, sender, recipient, message):
+        """
+        Queues a message for delivery.
+
+        Returns:
+            bool: False if the queue is full and the message was not accepted.
+        """
+        self._start_workers()
+        try:
+            self._queue.put_nowait((sender, recipient, message.as_string()))
+        except queue.Full:
+            self._count("dropped")
+            self.app.logger.error(f"Mail queue is full, dropping email to {recipient}")
+            return False
+        self._count("queued")
+        return True
+
+    def join(self):
+        """Blocks until every queued message has been sent or given up on."""
+        self._queue.join()
+
+    def stats(self):
+        with self._stats_lock:
+            return dict(self._stats, pending=self._queue.qsize())
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self._stats[name] += amount
+
+    def _start_workers(self):
+        # workers start on first use, so apps that never send mail (e.g. most tests) don't spawn threads
+        if self._workers:
+            return
+        with self._lock:
+            if self._workers:
+                return
+            for i in range(self.config["workers"]):
+                worker = threading.Thread(target=self._work, name=f"mail-worker-{i}", daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    def _connect(self):
+        server = smtplib.SMTP(self.config["server"], self.config["port"], timeout=self.config["timeout"])
+        if self.config["use_tls"]:
+            server.starttls()  # Upgrade the connection to secure
+        if self.config["username"]:
+            server.login(self.config["username"], self.config["password"])
+        self._count("connections")
+        return server
+
+    @staticmethod
+    def _close(server):
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+    def _work(self):
+        server = None
+        while True:
+            try:
+                sender, recipient, body = self._queue.get(timeout=self.config["idle_timeout"])
+            except queue.Empty:
+                # let the mail server reclaim the connection while we are idle
+                if server is not None:
+                    self._close(server)
+                    server = None
+                continue
+
+            try:
+                server = self._deliver(server, sender, recipient, body)
+            finally:
+                self._queue.task_done()
+
+    def _deliver(self, server, sender, recipient, body):
+        for attempt in range(self.config["max_retries"] + 1):
+            try:
+                if server is None:
+                    server = self._connect()
+                start = time.perf_counter()
+                server.sendmail(sender, recipient, body)
+                self._count("sent")
+                self.app.logger.info(
+                    f"Email sent to {recipient} in {(time.perf_counter() - start) * 1000:.1f} ms"
+                )
+                return server
+            except (smtplib.SMTPException, OSError) as e:
+                # the connection may be half-dead, so retry on a fresh one
+                if server is not None:
+                    self._close(server)
+                    server = None
+                if attempt == self.config["max_retries"] or _is_permanent(e):
+                    self._count("failed")
+                    self.app.logger.error(f"Giving up on email to {recipient} after {attempt + 1} attempts: {e}")
+                    return None
+                delay = self.config["retry_backoff"] * 2 ** attempt
+                self._count("retried")
+                self.app.logger.warning(f"Email to {recipient} failed ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
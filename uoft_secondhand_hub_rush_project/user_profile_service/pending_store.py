@@ -0,0 +1,174 @@
+"""
+Stores for registrations that are waiting on email verification.
+
+Entries expire after PENDING_REGISTRATION_TTL seconds, which matches the max_age of
+the verification token, so an entry never outlives the link that completes it.
+
+Backends (PENDING_REGISTRATION_BACKEND):
+    memory   - per-process and bounded by PENDING_REGISTRATION_MAX_ENTRIES. Only
+               suitable for a single worker.
+    dynamodb - shared by every worker and instance through the
+               PENDING_REGISTRATIONS_TABLE_NAME table (hash key "email"). Enable
+               DynamoDB TTL on its "expires_at" attribute so that abandoned
+               registrations are deleted by DynamoDB.
+
+Both stores support the dict operations the routes use (get, [], in, del, pop, clear).
+"""
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+import boto3
+
+
+class PendingRegistrationStore(ABC):
+    """Dict-style access on top of get/set/delete/clear, which backends implement."""
+
+    @abstractmethod
+    def get(self, email, default=None):
+        """Returns the entry's data, or default if there is none or it has expired."""
+
+    @abstractmethod
+    def set(self, email, data):
+        """Stores data for email, replacing any previous entry and restarting its TTL."""
+
+    @abstractmethod
+    def delete(self, email):
+        """Removes an entry; returns False if there was none."""
+
+    @abstractmethod
+    def clear(self):
+        """Removes every entry."""
+
+    def __getitem__(self, email):
+        data = self.get(email)
+        if data is None:
+            raise KeyError(email)
+        return data
+
+    def __setitem__(self, email, data):
+        self.set(email, data)
+
+    def __delitem__(self, email):
+        if not self.delete(email):
+            raise KeyError(email)
+
+    def __contains__(self, email):
+        return self.get(email) is not None
+
+    def pop(self, email, default=None):
+        data = self.get(email)
+        if data is None:
+            return default
+        self.delete(email)
+        return data
+
+
+class MemoryPendingRegistrationStore(PendingRegistrationStore):
+    def __init__(self, ttl_seconds=3600, max_entries=10000, clock=time.time):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._clock = clock
+        self._lock = threading.Lock()
+        # email -> (expires_at, data), oldest first; every entry has the same TTL,
+        # so insertion order is also expiry order
+        self._entries = OrderedDict()
+
+    def _purge_expired(self, now):
+        while self._entries:
+            email, (expires_at, _) = next(iter(self._entries.items()))
+            if expires_at > now:
+                break
+            del self._entries[email]
+
+    def get(self, email, default=None):
+        with self._lock:
+            entry = self._entries.get(email)
+            if entry is None or entry[0] <= self._clock():
+                return default
+            return entry[1]
+
+    def set(self, email, data):
+        with self._lock:
+            now = self._clock()
+            self._purge_expired(now)
+            self._entries.pop(email, None)
+            self._entries[email] = (now + self.ttl_seconds, data)
+            # evict the oldest registrations rather than grow without bound
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, email):
+        with self._lock:
+            return self._entries.pop(email, None) is not None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            self._purge_expired(self._clock())
+            return len(self._entries)
+
+
+class DynamoDBPendingRegistrationStore(PendingRegistrationStore):
+    def __init__(self, table, ttl_seconds=3600, clock=time.time):
+        self.table = table
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+
+    def get(self, email, default=None):
+        item = self.table.get_item(Key={"email": email}, ConsistentRead=True).get("Item")
+        # DynamoDB TTL deletes lazily (often hours late), so check expiry ourselves
+        if item is None or item["expires_at"] <= self._clock():
+            return default
+        return json.loads(item["data"])
+
+    def set(self, email, data):
+        self.table.put_item(
+            Item={
+                "email": email,
+                "data": json.dumps(data),
+                "expires_at": int(self._clock() + self.ttl_seconds),
+            }
+        )
+
+    def delete(self, email):
+        response = self.table.delete_item(Key={"email": email}, ReturnValues="ALL_OLD")
+        return "Attributes" in response
+
+    def clear(self):
+        scan_kwargs = {"ProjectionExpression": "email"}
+        with self.table.batch_writer() as batch:
+            while True:
+                response = self.table.scan(**scan_kwargs)
+                for item in response.get("Items", []):
+                    batch.delete_item(Key={"email": item["email"]})
+                if "LastEvaluatedKey" not in response:
+                    break
+                scan_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def create_pending_registration_store(config):
+    """Builds the store selected by PENDING_REGISTRATION_BACKEND."""
+    backend = config.get("PENDING_REGISTRATION_BACKEND", "memory")
+    ttl_seconds = config.get("PENDING_REGISTRATION_TTL", 3600)
+
+    if backend == "memory":
+        return MemoryPendingRegistrationStore(
+            ttl_seconds=ttl_seconds,
+            max_entries=config.get("PENDING_REGISTRATION_MAX_ENTRIES", 10000),
+        )
+    if backend == "dynamodb":
+        dynamodb = boto3.resource(
+            "dynamodb",
+            region_name=config["AWS_S3_REGION"],
+            aws_access_key_id=config["AWS_ACCESS_KEY_ID"],
+            aws_secret_access_key=config["AWS_SECRET_ACCESS_KEY"],
+        )
+        table = dynamodb.Table(config["PENDING_REGISTRATIONS_TABLE_NAME"])
+        return DynamoDBPendingRegistrationStore(table, ttl_seconds=ttl_seconds)
+    raise ValueError(f"Unknown PENDING_REGISTRATION_BACKEND: {backend}")
@@ -0,0 +1,110 @@
+"""
+In-process cache of revoked JWT ids in front of the TokenBlocklist table.
+
+The JWT blocklist check runs on every @jwt_required request, and nearly every
+token it sees is not revoked. The cache answers that from a dict instead of
+querying the database. It stays correct across workers by pulling rows added
+since its last sync at most once every REVOCATION_SYNC_INTERVAL seconds, so a
+logout on one worker is honoured by every other worker within that interval
+(immediately on the worker that handled it).
+
+A revoked token stops mattering once it would have expired anyway, so rows
+older than JWT_ACCESS_TOKEN_EXPIRES are dropped from the cache on sync and
+deleted from the table by a background purge thread.
+"""
+import datetime
+import threading
+import time
+
+# rows written by another worker can land slightly before our last sync time
+# (clock skew, commit latency), so each sync re-reads this much overlap
+_SYNC_OVERLAP = datetime.timedelta(seconds=5)
+
+
+class RevocationCache:
+    def __init__(self, app, db, model):
+        self.app = app
+        self.db = db
+        self.model = model
+        self.token_lifetime = app.config["JWT_ACCESS_TOKEN_EXPIRES"]
+        if not isinstance(self.token_lifetime, datetime.timedelta):
+            # Flask-JWT-Extended also accepts seconds; False (never expire) means never purge
+            self.token_lifetime = datetime.timedelta(seconds=self.token_lifetime) if self.token_lifetime else None
+        self.sync_interval = app.config.get("REVOCATION_SYNC_INTERVAL", 1.0)
+        self.purge_interval = app.config.get("REVOCATION_PURGE_INTERVAL", 300)
+
+        self._lock = threading.Lock()
+        self._revoked = {}  # jti -> created_at of its blocklist row
+        self._synced_until = None  # created_at watermark of the last sync
+        self._next_sync = 0.0
+        self._purger = None
+        self._stats = {"syncs": 0, "purged": 0}
+
+    def is_revoked(self, jti):
+        if time.monotonic() >= self._next_sync:
+            self.sync()
+        return jti in self._revoked
+
+    def revoke(self, jti):
+        now = datetime.datetime.utcnow()
+        self.db.session.add(self.model(jti=jti, created_at=now))
+        self.db.session.commit()
+        with self._lock:
+            self._revoked[jti] = now
+
+    def sync(self):
+        """Pulls blocklist rows added by any worker since the last sync and drops expired ones."""
+        self._start_purger()
+
+        now = datetime.datetime.utcnow()
+        cutoff = now - self.token_lifetime if self.token_lifetime else datetime.datetime.min
+        since = cutoff if self._synced_until is None else max(cutoff, self._synced_until - _SYNC_OVERLAP)
+
+        rows = (
+            self.db.session.query(self.model.jti, self.model.created_at)
+            .filter(self.model.created_at >= since)
+            .all()
+        )
+        with self._lock:
+            for jti, created_at in rows:
+                self._revoked[jti] = created_at
+            expired = [jti for jti, created_at in self._revoked.items() if created_at < cutoff]
+            for jti in expired:
+                del self._revoked[jti]
+            self._synced_until = now
+            self._next_sync = time.monotonic() + self.sync_interval
+            self._stats["syncs"] += 1
+
+    def purge_expired(self):
+        """Deletes blocklist rows for tokens that have expired by now."""
+        cutoff = datetime.datetime.utcnow() - self.token_lifetime
+        deleted = self.model.query.filter(self.model.created_at < cutoff).delete(synchronize_session=False)
+        self.db.session.commit()
+        self._stats["purged"] += deleted
+        if deleted:
+            self.app.logger.info(f"Purged {deleted} expired entries from the token blocklist")
+        return deleted
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, cached=len(self._revoked))
+
+    def _start_purger(self):
+        # started on first use, so apps that never check a token (e.g. most tests) don't spawn threads
+        if self._purger is not None or not self.purge_interval or not self.token_lifetime:
+            return
+        with self._lock:
+            if self._purger is not None:
+                return
+            self._purger = threading.Thread(target=self._purge_loop, name="token-blocklist-purger", daemon=True)
+            self._purger.start()
+
+    def _purge_loop(self):
+        while True:
+            time.sleep(self.purge_interval)
+            with self.app.app_context():
+                try:
+                    self.purge_expired()
+                except Exception as e:
+                    self.db.session.rollback()
+                    self.app.logger.error(f"Failed to purge the token blocklist: {e}")
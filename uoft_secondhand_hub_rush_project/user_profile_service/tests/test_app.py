@@ -35,10 +35,12 @@ class TestFlaskApp(unittest.TestCase):
 
 
     @patch("app.send_verification_email")
-    @patch("app.scan_users_by_attribute")
-    def test_pre_register_success(self, mock_scan_users, mock_send_verification_email):
-        # Mock scan_users_by_attribute to return no existing user
-        mock_scan_users.return_value = []
+    @patch("app.get_user_by_email")
+    @patch("app.get_user_by_username")
+    def test_pre_register_success(self, mock_get_user_by_username, mock_get_user_by_email, mock_send_verification_email):
+        # Mock get_user_by_username and get_user_by_email to return no existing user
+        mock_get_user_by_username.return_value = None
+        mock_get_user_by_email.return_value = None
 
         # Mock send_verification_email to return a token
         mock_send_verification_email.return_value = "test-token"
@@ -73,15 +75,18 @@ class TestFlaskApp(unittest.TestCase):
             "test@example.com", "testuser", self.app.serializer
         )
 
-    @patch("app.scan_users_by_attribute")
-    def test_pre_register_existing_username(self, mock_scan_users):
-        # Mock scan_users_by_attribute to return existing username
-        def side_effect(attribute, value):
-            if attribute == "username" and value == "testuser":
-                return [{"username": "testuser"}]
-            return []
+    @patch("app.get_user_by_email")
+    @patch("app.get_user_by_username")
+    def test_pre_register_existing_username(self, mock_get_user_by_username, mock_get_user_by_email):
+        mock_get_user_by_email.return_value = None
 
-        mock_scan_users.side_effect = side_effect
+        # Mock get_user_by_username to return existing username
+        def side_effect(username):
+            if username == "testuser":
+                return {"username": "testuser"}
+            return None
+
+        mock_get_user_by_username.side_effect = side_effect
 
         # Define the user data
         user_data = {
@@ -102,15 +107,17 @@ class TestFlaskApp(unittest.TestCase):
         self.assertEqual(response.status_code, 400)
         self.assertIn(b"User with this username already exists", response.data)
 
-    @patch("app.scan_users_by_attribute")
-    def test_pre_register_existing_email(self, mock_scan_users):
-        # Mock scan_users_by_attribute to return existing email
-        def side_effect(attribute, value):
-            if attribute == "email" and value == "test@example.com":
-                return [{"email": "test@example.com"}]
-            return []
+    @patch("app.get_user_by_email")
+    @patch("app.get_user_by_username")
+    def test_pre_register_existing_email(self, mock_get_user_by_username, mock_get_user_by_email):
+        # Mock get_user_by_email to return existing email
+        def side_effect(email):
+            if email == "test@example.com":
+                return {"email": "test@example.com"}
+            return None
 
-        mock_scan_users.side_effect = side_effect
+        mock_get_user_by_username.return_value = None
+        mock_get_user_by_email.side_effect = side_effect
 
         # Define the user data
         user_data = {
@@ -131,17 +138,12 @@ class TestFlaskApp(unittest.TestCase):
         self.assertEqual(response.status_code, 400)
         self.assertIn(b"User with this email already exists", response.data)
 
-    @patch("app.scan_users_by_attribute")
-    def test_pre_register_existing_username_and_email(self, mock_scan_users):
-        # Mock scan_users_by_attribute to return existing username and email
-        def side_effect(attribute, value):
-            if (attribute == "username" and value == "testuser") or (
-                attribute == "email" and value == "test@example.com"
-            ):
-                return [{"username": "testuser", "email": "test@example.com"}]
-            return []
-
-        mock_scan_users.side_effect = side_effect
+    @patch("app.get_user_by_email")
+    @patch("app.get_user_by_username")
+    def test_pre_register_existing_username_and_email(self, mock_get_user_by_username, mock_get_user_by_email):
+        # Mock get_user_by_username and get_user_by_email to return existing username and email
+        mock_get_user_by_username.return_value = {"username": "testuser", "email": "test@example.com"}
+        mock_get_user_by_email.return_value = {"username": "testuser", "email": "test@example.com"}
 
         # Define the user data
         user_data = {
@@ -172,7 +174,7 @@ class TestFlaskApp(unittest.TestCase):
             # Add a pending registration
             self.pending_registrations["test@example.com"] = {
                 "username": "testuser",
-                "password": "TestPassword123",
+                "password_hash": "hashed-password",
                 "wishlist": "",
                 "categories": "",
                 "location": "",
@@ -196,7 +198,8 @@ class TestFlaskApp(unittest.TestCase):
             user_data = args[0]
             self.assertEqual(user_data["username"], "testuser")
             self.assertEqual(user_data["email"], "test@example.com")
-            self.assertEqual(user_data["wishlist"], "")
+            self.assertEqual(user_data["password"], "hashed-password")
+            self.assertNotIn("wishlist", user_data)
             self.assertEqual(user_data["categories"], "")
             self.assertEqual(user_data["location"], "")
             self.assertTrue(user_data["email_verified"])
@@ -288,12 +291,10 @@ class TestFlaskApp(unittest.TestCase):
         self.assertEqual(response.status_code, 400)
         self.assertIn(b"No pending registration for this email", response.data)
     
-    @patch("app.get_user_by_id")
-    @patch("app.update_user")
-    def test_add_to_wishlist(self, mock_update_user, mock_get_user_by_id):
-        # Mock the user retrieval and update functions
-        mock_get_user_by_id.return_value = {"id": "testuser", "wishlist": []}
-        mock_update_user.return_value = True
+    @patch("app.add_to_user_wishlist")
+    def test_add_to_wishlist(self, mock_add_to_user_wishlist):
+        # Mock the atomic wishlist update
+        mock_add_to_user_wishlist.return_value = ["test-listing-id"]
 
         # Define data for the request
         data = {"listingId": "test-listing-id"}
@@ -310,6 +311,8 @@ class TestFlaskApp(unittest.TestCase):
         self.assertIn(
             "Listing added to wishlist", response.get_json().get("message", "")
         )
+        self.assertEqual(response.get_json()["wishlist"], ["test-listing-id"])
+        mock_add_to_user_wishlist.assert_called_with("testuser", "test-listing-id")
 
     def test_add_to_wishlist_missing_listing_id(self):
         # Make the POST request without the listingId
@@ -328,17 +331,17 @@ class TestFlaskApp(unittest.TestCase):
         except Exception as e:
             self.fail(f"Response is not JSON or is missing expected error message: {e}. Raw response: {response.data}")
 
-    @patch('app.scan_users_by_attribute')
+    @patch('app.get_user_by_email')
     @patch('app.check_password_hash')
-    def test_login_success(self, mock_check_password_hash, mock_scan_users):
-        # Mock scan_users_by_attribute to return a list containing a user
+    def test_login_success(self, mock_check_password_hash, mock_get_user_by_email):
+        # Mock get_user_by_email to return a user
         user_data = {
             "id": "testuser_id",
             "email": "test@example.com",
             "password": "hashed_password",
             "email_verified": True
         }
-        mock_scan_users.return_value = [user_data]  # Return a list of users
+        mock_get_user_by_email.return_value = user_data
 
         # Mock check_password_hash to return True
         mock_check_password_hash.return_value = True
@@ -362,17 +365,17 @@ class TestFlaskApp(unittest.TestCase):
         self.assertIn("access_token", response_json)
         self.assertEqual(response_json["message"], "Login successful")
 
-    @patch('app.scan_users_by_attribute')
+    @patch('app.get_user_by_email')
     @patch('app.check_password_hash')
-    def test_login_invalid_credentials(self, mock_check_password_hash, mock_scan_users):
-        # Mock scan_users_by_attribute to return a list containing a user
+    def test_login_invalid_credentials(self, mock_check_password_hash, mock_get_user_by_email):
+        # Mock get_user_by_email to return a user
         user_data = {
             "id": "testuser_id",
             "email": "test@example.com",
             "password": "hashed_password",
             "email_verified": True
         }
-        mock_scan_users.return_value = [user_data]  # Return a list of users
+        mock_get_user_by_email.return_value = user_data
 
         # Mock check_password_hash to return False (invalid password)
         mock_check_password_hash.return_value = False
@@ -395,17 +398,17 @@ class TestFlaskApp(unittest.TestCase):
         response_json = response.get_json()
         self.assertEqual(response_json["error"], "Invalid email or password")
 
-    @patch('app.scan_users_by_attribute')
+    @patch('app.get_user_by_email')
     @patch('app.check_password_hash')
-    def test_login_unverified_email(self, mock_check_password_hash, mock_scan_users):
-        # Mock scan_users_by_attribute to return a list containing a user
+    def test_login_unverified_email(self, mock_check_password_hash, mock_get_user_by_email):
+        # Mock get_user_by_email to return a user
         user_data = {
             "id": "testuser_id",
             "email": "test@example.com",
             "password": "hashed_password",
             "email_verified": False  # Email not verified
         }
-        mock_scan_users.return_value = [user_data]  # Return a list of users
+        mock_get_user_by_email.return_value = user_data
 
         # Mock check_password_hash to return True
         mock_check_password_hash.return_value = True
@@ -556,6 +559,77 @@ class TestFlaskApp(unittest.TestCase):
         self.assertEqual(response.status_code, 404)
         self.assertIn("User not found", response.get_json()["error"])
 
+    @patch("app.get_user_wishlist")
+    def test_check_wishlist_bulk(self, mock_get_user_wishlist):
+        mock_get_user_wishlist.return_value = {"listing_1", "listing_3"}
+
+        response = self.client.post(
+            "/api/users/wishlist/check_bulk",
+            headers=self.headers,
+            data=json.dumps({"listingIds": ["listing_1", "listing_2", "listing_3"]})
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.get_json()["in_wishlist"],
+            {"listing_1": True, "listing_2": False, "listing_3": True},
+        )
+        mock_get_user_wishlist.assert_called_once_with("testuser")
+
+    @patch("app.remove_from_user_wishlist")
+    @patch("app.get_user_wishlist")
+    def test_check_wishlist_bulk_uses_cached_wishlist(self, mock_get_user_wishlist, mock_remove):
+        mock_get_user_wishlist.return_value = {"listing_1", "listing_2"}
+        mock_remove.return_value = ["listing_2"]
+
+        def check():
+            response = self.client.post(
+                "/api/users/wishlist/check_bulk",
+                headers=self.headers,
+                data=json.dumps({"listingIds": ["listing_1", "listing_2"]})
+            )
+            return response.get_json()["in_wishlist"]
+
+        self.assertEqual(check(), {"listing_1": True, "listing_2": True})
+        self.assertEqual(check(), {"listing_1": True, "listing_2": True})
+        mock_get_user_wishlist.assert_called_once()
+
+        # A wishlist change on this worker refreshes the cached set
+        self.client.delete("/api/users/wishlist/listing_1", headers=self.headers)
+        self.assertEqual(check(), {"listing_1": False, "listing_2": True})
+        mock_get_user_wishlist.assert_called_once()
+        self.assertEqual(self.app.wishlist_cache.stats()["hits"], 2)
+
+    @patch("app.get_user_wishlist")
+    def test_check_wishlist_bulk_invalid_input(self, mock_get_user_wishlist):
+        for body in ({}, {"listingIds": "listing_1"}, {"listingIds": [1, 2]}):
+            response = self.client.post(
+                "/api/users/wishlist/check_bulk", headers=self.headers, data=json.dumps(body)
+            )
+            self.assertEqual(response.status_code, 400)
+
+        self.app.config["WISHLIST_CHECK_MAX_IDS"] = 2
+        response = self.client.post(
+            "/api/users/wishlist/check_bulk",
+            headers=self.headers,
+            data=json.dumps({"listingIds": ["a", "b", "c"]})
+        )
+        self.assertEqual(response.status_code, 400)
+        mock_get_user_wishlist.assert_not_called()
+
+    @patch("app.get_user_wishlist")
+    def test_check_wishlist_bulk_user_not_found(self, mock_get_user_wishlist):
+        mock_get_user_wishlist.return_value = None
+
+        response = self.client.post(
+            "/api/users/wishlist/check_bulk",
+            headers=self.headers,
+            data=json.dumps({"listingIds": ["listing_1"]})
+        )
+
+        self.assertEqual(response.status_code, 404)
+        self.assertIn("User not found", response.get_json()["error"])
+
     @patch("app.get_user_by_id")
     def test_get_user_info_success(self, mock_get_user_by_id):
         # Mock the user retrieval to return user information
@@ -761,17 +835,17 @@ class TestFlaskApp(unittest.TestCase):
 
     # Unit tests for forgot_password feature
     @patch("app.send_password_reset_email")
-    @patch("app.scan_users_by_attribute")
+    @patch("app.get_user_by_email")
     def test_forgot_password_success(
-        self, mock_scan_users, mock_send_password_reset_email
+        self, mock_get_user_by_email, mock_send_password_reset_email
     ):
-        # Mock scan_users_by_attribute to return user
+        # Mock get_user_by_email to return user
         user_data = {
             "id": "testuser_id",
             "username": "testuser",
             "email": "test@example.com",
         }
-        mock_scan_users.return_value = [user_data]
+        mock_get_user_by_email.return_value = user_data
 
         # Mock send_password_reset_email to return token
         mock_send_password_reset_email.return_value = "test-reset-token"
@@ -817,10 +891,10 @@ class TestFlaskApp(unittest.TestCase):
         response_json = response.get_json()
         self.assertEqual(response_json["error"], "Email is required")
 
-    @patch("app.scan_users_by_attribute")
-    def test_forgot_password_user_not_found(self, mock_scan_users):
-        # Mock scan_users_by_attribute to return empty list
-        mock_scan_users.return_value = []
+    @patch("app.get_user_by_email")
+    def test_forgot_password_user_not_found(self, mock_get_user_by_email):
+        # Mock get_user_by_email to find no user
+        mock_get_user_by_email.return_value = None
 
         # Prepare data
         data = {
@@ -844,16 +918,16 @@ class TestFlaskApp(unittest.TestCase):
 
     # Unit tests for reset_password feature
     @patch("app.update_user")
-    @patch("app.scan_users_by_attribute")
-    def test_reset_password_success(self, mock_scan_users, mock_update_user):
+    @patch("app.get_user_by_email")
+    def test_reset_password_success(self, mock_get_user_by_email, mock_update_user):
         # Mock serializer.loads to return email
         with patch.object(self.app.serializer, "loads", return_value="test@example.com"):
-            # Mock scan_users_by_attribute to return user
+            # Mock get_user_by_email to return user
             user_data = {
                 "id": "testuser_id",
                 "email": "test@example.com",
             }
-            mock_scan_users.return_value = [user_data]
+            mock_get_user_by_email.return_value = user_data
 
             # Mock update_user to return True
             mock_update_user.return_value = True
@@ -942,14 +1016,14 @@ class TestFlaskApp(unittest.TestCase):
             response_json = response.get_json()
             self.assertEqual(response_json["error"], "New password is required")
 
-    @patch("app.scan_users_by_attribute")
-    def test_reset_password_user_not_found(self, mock_scan_users):
+    @patch("app.get_user_by_email")
+    def test_reset_password_user_not_found(self, mock_get_user_by_email):
         # Mock serializer.loads to return email
         with patch.object(
             self.app.serializer, "loads", return_value="nonexistent@example.com"
         ):
-            # Mock scan_users_by_attribute to return empty list
-            mock_scan_users.return_value = []
+            # Mock get_user_by_email to find no user
+            mock_get_user_by_email.return_value = None
 
             # Prepare data
             data = {
@@ -0,0 +1,99 @@
+# tests/test_mailer.py
+
+import unittest
+from unittest.mock import patch
+import os
+import time
+from dotenv import load_dotenv
+
+# Load environment variables from .env.test
+load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), "..", ".env.test"))
+
+from app import create_app, send_verification_email, send_password_reset_email
+from debug_smtp import DebugSMTPServer
+from mailer import MailQueue
+
+
+class TestMailQueue(unittest.TestCase):
+    def setUp(self):
+        # Point the app at an in-process SMTP stand-in instead of a real mail server
+        self.smtp = DebugSMTPServer().start()
+        self.addCleanup(self.smtp.stop)
+
+        self.app = create_app()
+        self.app.config.update(
+            TESTING=True,
+            SMTP_SERVER=self.smtp.host,
+            SMTP_PORT=self.smtp.port,
+            SMTP_USE_TLS=False,
+            MAIL_WORKERS=1,
+            MAIL_RETRY_BACKOFF=0.01,
+        )
+        self.app.mail_queue = MailQueue(self.app)
+        self.client = self.app.test_client()
+
+    def test_emails_are_delivered_in_the_background(self):
+        with self.app.app_context():
+            token = send_verification_email("newuser@mail.utoronto.ca", "newuser", self.app.serializer)
+            reset_token = send_password_reset_email("olduser@mail.utoronto.ca", "olduser", self.app.serializer)
+        self.assertIsNotNone(token)
+        self.assertIsNotNone(reset_token)
+
+        self.app.mail_queue.join()
+        self.assertEqual(
+            [message["To"] for message in self.smtp.messages],
+            ["newuser@mail.utoronto.ca", "olduser@mail.utoronto.ca"],
+        )
+        self.assertEqual(self.smtp.messages[0]["Subject"], "Verify Your Email Address")
+        self.assertIn(token, self.smtp.messages[0].get_payload(0).get_payload())
+
+    def test_smtp_connection_is_reused(self):
+        with self.app.app_context():
+            for i in range(5):
+                send_verification_email(f"user{i}@mail.utoronto.ca", f"user{i}", self.app.serializer)
+        self.app.mail_queue.join()
+
+        self.assertEqual(len(self.smtp.messages), 5)
+        self.assertEqual(self.smtp.connections, 1)
+        self.assertEqual(self.app.mail_queue.stats()["connections"], 1)
+
+    def test_transient_failures_are_retried(self):
+        self.smtp.fail_next = 2
+        with self.app.app_context():
+            send_verification_email("retry@mail.utoronto.ca", "retry", self.app.serializer)
+        self.app.mail_queue.join()
+
+        self.assertEqual(len(self.smtp.messages), 1)
+        stats = self.app.mail_queue.stats()
+        self.assertEqual((stats["sent"], stats["retried"], stats["failed"]), (1, 2, 0))
+
+    def test_gives_up_after_max_retries(self):
+        self.app.mail_queue.config["max_retries"] = 1
+        self.smtp.fail_next = 5
+        with self.app.app_context():
+            send_verification_email("down@mail.utoronto.ca", "down", self.app.serializer)
+        self.app.mail_queue.join()
+
+        self.assertEqual(self.smtp.messages, [])
+        self.assertEqual(self.app.mail_queue.stats()["failed"], 1)
+
+    @patch("app.get_user_by_email")
+    def test_forgot_password_does_not_wait_for_smtp(self, mock_get_user_by_email):
+        mock_get_user_by_email.return_value = {"username": "slowuser"}
+        self.app.mail_queue.config["retry_backoff"] = 0.5
+        self.smtp.fail_next = 1  # the first delivery attempt backs off for 0.5s
+
+        start = time.perf_counter()
+        response = self.client.post(
+            "/api/users/forgot_password", json={"email": "slowuser@mail.utoronto.ca"}
+        )
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(response.status_code, 200)
+        self.assertLess(elapsed, 0.3)
+        self.app.mail_queue.join()
+        self.assertEqual(len(self.smtp.messages), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+# tests/test_pending_store.py
+
+import unittest
+import os
+import boto3
+from moto import mock_aws
+from dotenv import load_dotenv
+
+# Load environment variables from .env.test
+load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), "..", ".env.test"))
+
+from pending_store import (
+    PendingRegistrationStore,
+    MemoryPendingRegistrationStore,
+    DynamoDBPendingRegistrationStore,
+    create_pending_registration_store,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestPendingRegistrationStore(unittest.TestCase):
+    def test_incomplete_backend_cannot_be_created(self):
+        class NoClearStore(PendingRegistrationStore):
+            def get(self, email, default=None):
+                return default
+
+            def set(self, email, data):
+                pass
+
+            def delete(self, email):
+                return False
+
+        with self.assertRaises(TypeError):
+            NoClearStore()
+
+
+class TestMemoryPendingRegistrationStore(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.store = MemoryPendingRegistrationStore(ttl_seconds=3600, max_entries=3, clock=self.clock)
+
+    def test_dict_style_access(self):
+        self.store["a@mail.utoronto.ca"] = {"username": "a"}
+        self.assertIn("a@mail.utoronto.ca", self.store)
+        self.assertEqual(self.store["a@mail.utoronto.ca"]["username"], "a")
+
+        del self.store["a@mail.utoronto.ca"]
+        self.assertNotIn("a@mail.utoronto.ca", self.store)
+        self.assertIsNone(self.store.get("a@mail.utoronto.ca"))
+        with self.assertRaises(KeyError):
+            del self.store["a@mail.utoronto.ca"]
+
+    def test_entries_expire_after_ttl(self):
+        self.store["a@mail.utoronto.ca"] = {"username": "a"}
+        self.clock.now += 3599
+        self.assertIn("a@mail.utoronto.ca", self.store)
+        self.clock.now += 1
+        self.assertNotIn("a@mail.utoronto.ca", self.store)
+        self.assertEqual(len(self.store), 0)
+
+    def test_memory_is_bounded(self):
+        for i in range(5):
+            self.store[f"user{i}@mail.utoronto.ca"] = {"username": f"user{i}"}
+            self.clock.now += 1
+
+        self.assertEqual(len(self.store), 3)
+        self.assertNotIn("user0@mail.utoronto.ca", self.store)
+        self.assertIn("user4@mail.utoronto.ca", self.store)
+
+    def test_re_registering_refreshes_the_entry(self):
+        self.store["a@mail.utoronto.ca"] = {"username": "old"}
+        self.clock.now += 3000
+        self.store["a@mail.utoronto.ca"] = {"username": "new"}
+        self.clock.now += 3000
+        self.assertEqual(self.store["a@mail.utoronto.ca"]["username"], "new")
+
+
+class TestDynamoDBPendingRegistrationStore(unittest.TestCase):
+    def setUp(self):
+        self.mock = mock_aws()
+        self.mock.start()
+        self.addCleanup(self.mock.stop)
+
+        self.table = boto3.resource("dynamodb", region_name="us-east-2").create_table(
+            TableName="test_pending_registrations",
+            KeySchema=[{"AttributeName": "email", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "email", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        self.clock = FakeClock()
+
+    def make_store(self):
+        return DynamoDBPendingRegistrationStore(self.table, ttl_seconds=3600, clock=self.clock)
+
+    def test_entries_are_shared_between_workers(self):
+        worker_a, worker_b = self.make_store(), self.make_store()
+
+        worker_a["a@mail.utoronto.ca"] = {"username": "a", "wishlist": ["1"]}
+        self.assertEqual(worker_b["a@mail.utoronto.ca"], {"username": "a", "wishlist": ["1"]})
+
+        self.assertTrue(worker_b.delete("a@mail.utoronto.ca"))
+        self.assertNotIn("a@mail.utoronto.ca", worker_a)
+        self.assertFalse(worker_a.delete("a@mail.utoronto.ca"))
+
+    def test_expired_entries_are_ignored_before_dynamodb_deletes_them(self):
+        store = self.make_store()
+        store["a@mail.utoronto.ca"] = {"username": "a"}
+
+        item = self.table.get_item(Key={"email": "a@mail.utoronto.ca"})["Item"]
+        self.assertEqual(item["expires_at"], int(self.clock.now) + 3600)
+
+        self.clock.now += 3600
+        self.assertIsNone(store.get("a@mail.utoronto.ca"))
+
+    def test_clear(self):
+        store = self.make_store()
+        for i in range(30):
+            store[f"user{i}@mail.utoronto.ca"] = {"username": f"user{i}"}
+        store.clear()
+        self.assertEqual(self.table.scan()["Count"], 0)
+
+    def test_factory_builds_configured_backend(self):
+        config = {
+            "PENDING_REGISTRATION_BACKEND": "dynamodb",
+            "PENDING_REGISTRATION_TTL": 600,
+            "PENDING_REGISTRATIONS_TABLE_NAME": "test_pending_registrations",
+            "AWS_S3_REGION": "us-east-2",
+            "AWS_ACCESS_KEY_ID": "testing",
+            "AWS_SECRET_ACCESS_KEY": "testing",
+        }
+        store = create_pending_registration_store(config)
+        self.assertIsInstance(store, DynamoDBPendingRegistrationStore)
+        self.assertEqual(store.ttl_seconds, 600)
+
+        config["PENDING_REGISTRATION_BACKEND"] = "memcached"
+        with self.assertRaises(ValueError):
+            create_pending_registration_store(config)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+# tests/test_revocation.py
+
+import unittest
+from unittest.mock import patch
+import datetime
+import os
+import tempfile
+from dotenv import load_dotenv
+from flask_jwt_extended import create_access_token
+
+# Load environment variables from .env.test
+load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), "..", ".env.test"))
+
+from app import create_app, db, TokenBlocklist
+
+
+class TestRevocationCache(unittest.TestCase):
+    def setUp(self):
+        # Two app instances sharing one blocklist database, like two gunicorn workers
+        db_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(db_dir.cleanup)
+        with patch.dict(os.environ, {"DATABASE_URI": f"sqlite:///{db_dir.name}/tokens.db"}):
+            self.worker_a = create_app()
+            self.worker_b = create_app()
+        for app in (self.worker_a, self.worker_b):
+            app.config["TESTING"] = True
+            app.revocation_cache.sync_interval = 0.0
+
+        with self.worker_a.app_context():
+            self.headers = {"Authorization": f"Bearer {create_access_token(identity='testuser')}"}
+
+    def logout(self, app):
+        return app.test_client().post("/api/users/logout", headers=self.headers)
+
+    def get_user_id(self, app):
+        return app.test_client().get("/api/users/user_id", headers=self.headers)
+
+    def test_logout_is_seen_by_other_workers(self):
+        self.assertEqual(self.get_user_id(self.worker_b).status_code, 200)
+        self.assertEqual(self.logout(self.worker_a).status_code, 200)
+
+        response = self.get_user_id(self.worker_b)
+        self.assertEqual(response.status_code, 401)
+        self.assertIn("Token has been revoked", response.get_json()["msg"])
+
+    def test_worker_does_not_query_between_syncs(self):
+        cache = self.worker_b.revocation_cache
+        cache.sync_interval = 3600
+        with self.worker_b.app_context():
+            self.assertFalse(cache.is_revoked("not-revoked"))
+            syncs = cache.stats()["syncs"]
+            for _ in range(100):
+                self.assertFalse(cache.is_revoked("not-revoked"))
+        self.assertEqual(cache.stats()["syncs"], syncs)
+
+    def test_expired_entries_are_purged(self):
+        now = datetime.datetime.utcnow()
+        with self.worker_a.app_context():
+            db.session.add(TokenBlocklist(jti="old", created_at=now - datetime.timedelta(hours=1)))
+            db.session.add(TokenBlocklist(jti="recent", created_at=now))
+            db.session.commit()
+
+            cache = self.worker_a.revocation_cache
+            self.assertFalse(cache.is_revoked("old"))
+            self.assertTrue(cache.is_revoked("recent"))
+
+            self.assertEqual(cache.purge_expired(), 1)
+            self.assertEqual([row.jti for row in TokenBlocklist.query.all()], ["recent"])
+
+
+if __name__ == "__main__":
+    unittest.main()
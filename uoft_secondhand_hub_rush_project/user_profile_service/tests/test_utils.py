@@ -0,0 +1,223 @@
+# tests/test_utils.py
+
+import unittest
+from unittest.mock import patch
+import os
+import threading
+import boto3
+from moto import mock_aws
+from dotenv import load_dotenv
+
+# Load environment variables from .env.test
+load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), "..", ".env.test"))
+
+from app import create_app
+from utils import (
+    get_user_by_id,
+    get_user_by_email,
+    get_user_by_username,
+    get_user_table,
+    get_table_stats,
+    init_user_table,
+    invalidate_user_table,
+    upload_to_user_table,
+    get_user_wishlist,
+    add_to_user_wishlist,
+    remove_from_user_wishlist,
+    update_user,
+    wishlist_to_set,
+)
+
+
+def create_users_table(dynamodb, table_name):
+    return dynamodb.create_table(
+        TableName=table_name,
+        KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
+        AttributeDefinitions=[
+            {"AttributeName": "id", "AttributeType": "S"},
+            {"AttributeName": "username", "AttributeType": "S"},
+            {"AttributeName": "email", "AttributeType": "S"},
+        ],
+        GlobalSecondaryIndexes=[
+            {
+                "IndexName": "username-index",
+                "KeySchema": [{"AttributeName": "username", "KeyType": "HASH"}],
+                "Projection": {"ProjectionType": "ALL"},
+            },
+            {
+                "IndexName": "email-index",
+                "KeySchema": [{"AttributeName": "email", "KeyType": "HASH"}],
+                "Projection": {"ProjectionType": "ALL"},
+            },
+        ],
+        BillingMode="PAY_PER_REQUEST",
+    )
+
+
+class TestUserTableUtils(unittest.TestCase):
+    def setUp(self):
+        # Run every DynamoDB call in this test class against moto
+        self.mock = mock_aws()
+        self.mock.start()
+
+        self.app = create_app()
+        self.app.config["TESTING"] = True
+        self.table_name = self.app.config["AWS_DB_USERS_TABLE_NAME"]
+        self.dynamodb = boto3.resource(
+            "dynamodb", region_name=self.app.config["AWS_S3_REGION"]
+        )
+        create_users_table(self.dynamodb, self.table_name)
+
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        invalidate_user_table()
+
+    def tearDown(self):
+        invalidate_user_table()
+        self.ctx.pop()
+        self.mock.stop()
+
+    def test_get_user_table_verifies_once(self):
+        start = get_table_stats()["describe_table_calls"]
+
+        upload_to_user_table({"id": "user-1", "username": "alice"})
+        for _ in range(5):
+            self.assertEqual(get_user_by_id("user-1")["username"], "alice")
+
+        self.assertEqual(get_table_stats()["describe_table_calls"] - start, 1)
+
+    def test_get_user_by_email_uses_index(self):
+        upload_to_user_table({"id": "user-1", "username": "alice", "email": "alice@mail.utoronto.ca"})
+        upload_to_user_table({"id": "user-2", "username": "bob", "email": "bob@mail.utoronto.ca"})
+
+        user = get_user_by_email("bob@mail.utoronto.ca")
+        self.assertEqual(user["id"], "user-2")
+        self.assertIsNone(get_user_by_email("nobody@mail.utoronto.ca"))
+
+    def test_get_user_by_username_uses_index(self):
+        upload_to_user_table({"id": "user-1", "username": "alice", "email": "alice@mail.utoronto.ca"})
+        upload_to_user_table({"id": "user-2", "username": "bob", "email": "bob@mail.utoronto.ca"})
+
+        user = get_user_by_username("bob")
+        self.assertEqual(user["id"], "user-2")
+        self.assertIsNone(get_user_by_username("nobody"))
+
+    def test_init_user_table_caches_handle(self):
+        self.assertTrue(init_user_table())
+        start = get_table_stats()["describe_table_calls"]
+
+        get_user_table()
+        get_user_table()
+
+        self.assertEqual(get_table_stats()["describe_table_calls"], start)
+
+    def test_init_user_table_defers_when_missing(self):
+        self.dynamodb.Table(self.table_name).delete()
+        self.assertFalse(init_user_table())
+
+    def test_resource_not_found_triggers_reverification(self):
+        get_user_table()
+        start = get_table_stats()["describe_table_calls"]
+
+        # The table disappears behind our cached handle
+        self.dynamodb.Table(self.table_name).delete()
+        self.assertIsNone(get_user_by_id("user-1"))
+
+        # Once it is back, the next access re-verifies exactly once
+        create_users_table(self.dynamodb, self.table_name)
+        get_user_table()
+        get_user_table()
+        self.assertEqual(get_table_stats()["describe_table_calls"] - start, 1)
+
+
+
+class TestWishlistUtils(unittest.TestCase):
+    def setUp(self):
+        self.mock = mock_aws()
+        self.mock.start()
+
+        self.app = create_app()
+        self.app.config["TESTING"] = True
+        self.table_name = self.app.config["AWS_DB_USERS_TABLE_NAME"]
+        dynamodb = boto3.resource("dynamodb", region_name=self.app.config["AWS_S3_REGION"])
+        self.table = create_users_table(dynamodb, self.table_name)
+
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        invalidate_user_table()
+
+    def tearDown(self):
+        invalidate_user_table()
+        self.ctx.pop()
+        self.mock.stop()
+
+    def test_add_and_remove_return_new_state(self):
+        upload_to_user_table({"id": "user-1", "username": "alice"})
+
+        self.assertEqual(add_to_user_wishlist("user-1", "listing-b"), ["listing-b"])
+        self.assertEqual(add_to_user_wishlist("user-1", "listing-a"), ["listing-a", "listing-b"])
+        self.assertEqual(add_to_user_wishlist("user-1", "listing-a"), ["listing-a", "listing-b"])
+        self.assertEqual(remove_from_user_wishlist("user-1", "listing-b"), ["listing-a"])
+        self.assertEqual(remove_from_user_wishlist("user-1", "listing-a"), [])
+        self.assertEqual(remove_from_user_wishlist("user-1", "listing-a"), [])
+        self.assertEqual(get_user_by_id("user-1").get("wishlist", []), [])
+
+    def test_missing_user_is_not_created(self):
+        self.assertIsNone(add_to_user_wishlist("ghost", "listing-a"))
+        self.assertNotIn("Item", self.table.get_item(Key={"id": "ghost"}))
+
+    def test_legacy_wishlists_are_converted(self):
+        upload_to_user_table({"id": "user-1", "username": "alice", "wishlist": ["listing-a", "listing-b"]})
+        upload_to_user_table({"id": "user-2", "username": "bob", "wishlist": ""})
+
+        self.assertEqual(add_to_user_wishlist("user-1", "listing-c"), ["listing-a", "listing-b", "listing-c"])
+        self.assertEqual(self.table.get_item(Key={"id": "user-1"})["Item"]["wishlist"],
+                         {"listing-a", "listing-b", "listing-c"})
+        self.assertEqual(remove_from_user_wishlist("user-2", "listing-a"), [])
+        self.assertEqual(add_to_user_wishlist("user-2", "listing-a"), ["listing-a"])
+
+    def test_new_wishlists_are_string_sets(self):
+        self.assertIsNone(wishlist_to_set(""))
+        self.assertIsNone(wishlist_to_set([]))
+        self.assertEqual(wishlist_to_set(["listing-a", "", "listing-a"]), {"listing-a"})
+        self.assertEqual(wishlist_to_set("listing-a, listing-b"), {"listing-a", "listing-b"})
+
+        upload_to_user_table({"id": "user-1", "username": "alice"})
+        self.assertTrue(update_user("user-1", {"wishlist": ["listing-a"], "location": "St. George"}))
+        self.assertEqual(self.table.get_item(Key={"id": "user-1"})["Item"]["wishlist"], {"listing-a"})
+        with patch("utils._convert_wishlist_to_set") as convert:
+            self.assertEqual(add_to_user_wishlist("user-1", "listing-b"), ["listing-a", "listing-b"])
+        convert.assert_not_called()
+
+        self.assertTrue(update_user("user-1", {"wishlist": []}))
+        self.assertNotIn("wishlist", self.table.get_item(Key={"id": "user-1"})["Item"])
+
+    def test_get_user_wishlist(self):
+        upload_to_user_table({"id": "user-1", "username": "alice"})
+        upload_to_user_table({"id": "user-2", "username": "bob", "wishlist": ["listing-a", ""]})
+        upload_to_user_table({"id": "user-3", "username": "carol", "wishlist": ""})
+        add_to_user_wishlist("user-1", "listing-b")
+
+        self.assertEqual(get_user_wishlist("user-1"), {"listing-b"})
+        self.assertEqual(get_user_wishlist("user-2"), {"listing-a"})
+        self.assertEqual(get_user_wishlist("user-3"), set())
+        self.assertIsNone(get_user_wishlist("ghost"))
+
+    def test_concurrent_adds_are_not_lost(self):
+        upload_to_user_table({"id": "user-1", "username": "alice"})
+
+        def add(listing_id):
+            with self.app.app_context():
+                add_to_user_wishlist("user-1", listing_id)
+
+        threads = [threading.Thread(target=add, args=(f"listing-{i}",)) for i in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(get_user_by_id("user-1")["wishlist"]), 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,17 @@
 import boto3
+import threading
 from flask import current_app
 from decimal import Decimal
 from boto3.dynamodb.conditions import Key, Attr
 import logging
 
+# Process-wide cache of verified DynamoDB Table handles, keyed by (region, table name).
+# The table is verified once (at startup or on first use) instead of on every request,
+# and only re-verified after a ResourceNotFoundException invalidates the cached handle.
+_user_table_lock = threading.Lock()
+_user_table_cache = {}
+_table_stats = {"describe_table_calls": 0}
+
 def get_dynamodb_resource():
     """
     Initializes and returns the DynamoDB resource using credentials from Flask's config.
@@ -35,6 +43,7 @@ def verify_dynamodb_table_exists(table_name):
     dynamodb = get_dynamodb_resource()
     try:
         table = dynamodb.Table(table_name)
+        _table_stats["describe_table_calls"] += 1
         table.load()  # Attempt to load the table details to verify existence
         current_app.logger.info(f"DynamoDB table '{table_name}' exists.")
         return True
@@ -49,21 +58,80 @@ def verify_dynamodb_table_exists(table_name):
 
 def get_user_table():
     """
-    Retrieves the DynamoDB table object for the users table.
+    Retrieves the cached DynamoDB table object for the users table.
+
+    The table is verified with a DescribeTable call only the first time it is
+    requested in this process, or again after invalidate_user_table().
 
     Returns:
         boto3.resources.factory.dynamodb.Table: The DynamoDB table object.
     """
     table_name = current_app.config['AWS_DB_USERS_TABLE_NAME']
-    if not verify_dynamodb_table_exists(table_name):
-        raise ValueError(f"The DynamoDB table '{table_name}' does not exist.")
-    dynamodb = get_dynamodb_resource()
-    return dynamodb.Table(table_name)
-    
+    cache_key = (current_app.config['AWS_S3_REGION'], table_name)
+
+    table = _user_table_cache.get(cache_key)
+    if table is not None:
+        return table
+
+    with _user_table_lock:
+        table = _user_table_cache.get(cache_key)
+        if table is None:
+            if not verify_dynamodb_table_exists(table_name):
+                raise ValueError(f"The DynamoDB table '{table_name}' does not exist.")
+            table = get_dynamodb_resource().Table(table_name)
+            _user_table_cache[cache_key] = table
+    return table
+
+
+def init_user_table():
+    """
+    Verifies the users table once at startup and caches its handle.
+
+    Returns:
+        bool: True if the table was verified, False if verification is deferred to first use.
+    """
+    try:
+        get_user_table()
+        return True
+    except Exception as e:
+        current_app.logger.warning(f"Deferring users table verification until first use: {e}")
+        return False
+
+
+def invalidate_user_table():
+    """
+    Drops the cached users table handle so the next access re-verifies it.
+    """
+    with _user_table_lock:
+        _user_table_cache.clear()
+
+
+def handle_table_error(error):
+    """
+    Invalidates the cached table handle if the error says the table is gone.
+
+    Args:
+        error (Exception): The exception raised by a DynamoDB table operation.
+    """
+    if isinstance(error, ClientError) and error.response['Error']['Code'] == 'ResourceNotFoundException':
+        current_app.logger.warning("Users table not found; cached table handle invalidated.")
+        invalidate_user_table()
+
+
+def get_table_stats():
+    """
+    Returns the DynamoDB table verification counters for this process.
+
+    Returns:
+        dict: Counters such as the number of DescribeTable calls made so far.
+    """
+    return dict(_table_stats)
+
 
 def convert_decimals(obj):
     """
-    Recursively converts Decimal objects to int or float.
+    Recursively converts Decimal objects to int or float, and sets (e.g. the
+    wishlist string set) to sorted lists.
 
     Args:
         obj (dict or list or Decimal): The object to convert.
@@ -75,6 +143,8 @@ def convert_decimals(obj):
         return [convert_decimals(item) for item in obj]
     elif isinstance(obj, dict):
         return {k: convert_decimals(v) for k, v in obj.items()}
+    elif isinstance(obj, set):
+        return sorted(convert_decimals(item) for item in obj)
     elif isinstance(obj, Decimal):
         # Convert to int if possible, else float
         if obj % 1 == 0:
@@ -132,6 +202,7 @@ def upload_to_user_table(user_data):
         return True
     except Exception as e:
         current_app.logger.error(f"Failed to add user to DynamoDB: {e}")
+        handle_table_error(e)
         return False
 
 def get_user_by_id(user_id):
@@ -158,6 +229,7 @@ def get_user_by_id(user_id):
             return None
     except Exception as e:
         current_app.logger.error(f"Failed to query DynamoDB for user_id={user_id}: {e}")
+        handle_table_error(e)
         return None
 
 def get_user_by_username(username):
@@ -170,14 +242,7 @@ def get_user_by_username(username):
     Returns:
         dict or None: The user data if found, converted to native Python types, else None.
     """
-    dynamodb = boto3.resource(
-        'dynamodb',
-        region_name=current_app.config['AWS_S3_REGION'],
-        aws_access_key_id=current_app.config['AWS_ACCESS_KEY_ID'],
-        aws_secret_access_key=current_app.config['AWS_SECRET_ACCESS_KEY']
-    )
-    
-    table = dynamodb.Table(current_app.config['AWS_DB_USERS_TABLE_NAME'])
+    table = get_user_table()
 
     try:
         response = table.query(
@@ -192,6 +257,38 @@ def get_user_by_username(username):
             return None
     except Exception as e:
         current_app.logger.error(f"Failed to query DynamoDB for username={username}: {e}")
+        handle_table_error(e)
+        return None
+
+def get_user_by_email(email):
+    """
+    Retrieves a user by their email using the email-index GSI.
+
+    Unlike scan_users_by_attribute, this reads only the matching index entry
+    instead of the whole users table.
+
+    Args:
+        email (str): The email of the user to retrieve.
+
+    Returns:
+        dict or None: The user data if found, converted to native Python types, else None.
+    """
+    table = get_user_table()
+
+    try:
+        response = table.query(
+            IndexName='email-index',
+            KeyConditionExpression=Key('email').eq(email)
+        )
+        items = response.get('Items', [])
+        current_app.logger.info(f"Queried DynamoDB for email={email}: Found {len(items)} items.")
+        if items:
+            return convert_decimals(items[0])
+        else:
+            return None
+    except Exception as e:
+        current_app.logger.error(f"Failed to query DynamoDB for email={email}: {e}")
+        handle_table_error(e)
         return None
 
 def scan_users_by_attribute(attribute_name, attribute_value):
@@ -216,6 +313,7 @@ def scan_users_by_attribute(attribute_name, attribute_value):
         return convert_decimals(items)
     except Exception as e:
         current_app.logger.error(f"Failed to scan DynamoDB for {attribute_name}={attribute_value}: {e}")
+        handle_table_error(e)
         return None
 
 def update_user(user_id, updates):
@@ -242,21 +340,28 @@ def update_user(user_id, updates):
         return False
 
     # Initialize components for UpdateExpression
-    update_expression = "SET "
     expression_attribute_values = {}
     expression_attribute_names = {}
     update_fields = []
+    remove_fields = []
 
     # Iterate over the updates to build the UpdateExpression
     for idx, (key, value) in enumerate(updates.items()):
         # Handle attribute names that might conflict with DynamoDB reserved words
         attribute_name = f"#attr{idx}"
         attribute_value = f":val{idx}"
-        update_fields.append(f"{attribute_name} = {attribute_value}")
 
         # Map the expression attribute names and values
         expression_attribute_names[attribute_name] = key
 
+        # The wishlist is kept as a string set so add/remove stay single atomic updates
+        if key == "wishlist":
+            value = wishlist_to_set(value)
+            if value is None:
+                remove_fields.append(attribute_name)
+                continue
+        update_fields.append(f"{attribute_name} = {attribute_value}")
+
         # Convert numerical types to Decimal
         if isinstance(value, float):
             expression_attribute_values[attribute_value] = Decimal(str(value))
@@ -266,20 +371,148 @@ def update_user(user_id, updates):
             expression_attribute_values[attribute_value] = value
 
     # Combine all fields into the UpdateExpression
-    update_expression += ", ".join(update_fields)
+    update_expression = " ".join(
+        clause for clause in (
+            "SET " + ", ".join(update_fields) if update_fields else "",
+            "REMOVE " + ", ".join(remove_fields) if remove_fields else "",
+        ) if clause
+    )
 
     try:
         response = table.update_item(
             Key={'id': user_id},
             UpdateExpression=update_expression,
             ExpressionAttributeNames=expression_attribute_names,
-            ExpressionAttributeValues=expression_attribute_values,
-            ReturnValues="UPDATED_NEW"  # Returns the updated attributes
+            ReturnValues="UPDATED_NEW",  # Returns the updated attributes
+            **({"ExpressionAttributeValues": expression_attribute_values} if expression_attribute_values else {})
         )
         updated_attributes = response.get('Attributes', {})
         current_app.logger.info(f"Successfully updated user {user_id}: {updated_attributes}")
         return True
     except Exception as e:
         current_app.logger.error(f"Failed to update user {user_id}: {e}")
+        handle_table_error(e)
         return False
 
+
+def get_user_wishlist(user_id):
+    """
+    Reads only the wishlist attribute of a user.
+
+    Returns:
+        set or None: The listing ids on the user's wishlist, or None if the user does not exist or the read failed.
+    """
+    table = get_user_table()
+
+    try:
+        item = table.get_item(
+            Key={'id': user_id},
+            ProjectionExpression="#id, #wishlist",
+            ExpressionAttributeNames={'#id': 'id', '#wishlist': 'wishlist'}
+        ).get('Item')
+    except Exception as e:
+        current_app.logger.error(f"Failed to read wishlist of user {user_id}: {e}")
+        handle_table_error(e)
+        return None
+
+    if item is None:
+        return None
+    wishlist = item.get('wishlist', set())
+    # legacy accounts store a list, or "" for an empty wishlist
+    if isinstance(wishlist, str):
+        return set()
+    return {listing_id for listing_id in wishlist if listing_id}
+
+
+def add_to_user_wishlist(user_id, listing_id):
+    """
+    Atomically adds a listing to the user's wishlist with a single ADD on a string set.
+
+    Returns:
+        list or None: The updated wishlist, or None if the user does not exist or the update failed.
+    """
+    return _update_wishlist(user_id, "ADD", listing_id)
+
+
+def remove_from_user_wishlist(user_id, listing_id):
+    """
+    Atomically removes a listing from the user's wishlist with a single DELETE on a string set.
+
+    Returns:
+        list or None: The updated wishlist, or None if the user does not exist or the update failed.
+    """
+    return _update_wishlist(user_id, "DELETE", listing_id)
+
+
+def wishlist_to_set(wishlist):
+    """
+    Returns the wishlist as the string set new rows store, or None when it is empty
+    (DynamoDB cannot store an empty set, so the attribute is left out instead).
+
+    Accepts a list of listing ids, or the comma-separated string pre-registration sends.
+    """
+    if isinstance(wishlist, str):
+        wishlist = wishlist.split(",")
+    listing_ids = {listing_id.strip() for listing_id in wishlist or [] if isinstance(listing_id, str)}
+    listing_ids.discard("")
+    return listing_ids or None
+
+
+def _update_wishlist(user_id, action, listing_id):
+    table = get_user_table()
+    for attempt in range(2):
+        try:
+            response = table.update_item(
+                Key={'id': user_id},
+                UpdateExpression=f"{action} #wishlist :listing_ids",
+                ConditionExpression="attribute_exists(#id)",
+                ExpressionAttributeNames={'#wishlist': 'wishlist', '#id': 'id'},
+                ExpressionAttributeValues={':listing_ids': {listing_id}},
+                ReturnValues="ALL_NEW"
+            )
+            # DynamoDB drops a string set once its last element is deleted
+            return convert_decimals(response['Attributes'].get('wishlist', set()))
+        except ClientError as e:
+            error_code = e.response['Error']['Code']
+            if error_code == 'ConditionalCheckFailedException':
+                current_app.logger.warning(f"Wishlist update for missing user {user_id}")
+                return None
+            # older accounts store the wishlist as a list (or ""), which ADD/DELETE reject
+            if error_code == 'ValidationException' and attempt == 0 and _convert_wishlist_to_set(table, user_id):
+                continue
+            current_app.logger.error(f"Failed to {action} {listing_id} on wishlist of user {user_id}: {e}")
+            handle_table_error(e)
+            return None
+        except Exception as e:
+            current_app.logger.error(f"Failed to {action} {listing_id} on wishlist of user {user_id}: {e}")
+            return None
+
+
+def _convert_wishlist_to_set(table, user_id):
+    """
+    Rewrites a legacy list/string wishlist as a string set (or removes it when empty).
+
+    The write is conditional on the old value, so a concurrent conversion or update is
+    never overwritten; the caller's retry then applies on top of whichever write won.
+    """
+    item = table.get_item(Key={'id': user_id}, ConsistentRead=True).get('Item')
+    if not item or 'wishlist' not in item or isinstance(item['wishlist'], set):
+        return item is not None
+
+    old_wishlist = item['wishlist']
+    listing_ids = {listing_id for listing_id in old_wishlist if listing_id} if isinstance(old_wishlist, list) else set()
+    try:
+        table.update_item(
+            Key={'id': user_id},
+            UpdateExpression="SET #wishlist = :listing_ids" if listing_ids else "REMOVE #wishlist",
+            ConditionExpression="#wishlist = :old_wishlist",
+            ExpressionAttributeNames={'#wishlist': 'wishlist'},
+            ExpressionAttributeValues={':old_wishlist': old_wishlist,
+                                       **({':listing_ids': listing_ids} if listing_ids else {})}
+        )
+        current_app.logger.info(f"Converted wishlist of user {user_id} to a string set")
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            current_app.logger.error(f"Failed to convert wishlist of user {user_id}: {e}")
+            return False
+    return True
@@ -0,0 +1,62 @@
+"""
+Per-process cache of each user's wishlist as a set of listing ids.
+
+Grid pages ask "which of these listings are wishlisted?" for every page of cards,
+so the bulk membership check answers from this cache and only reads the users
+table when a user's entry is missing or older than WISHLIST_CACHE_TTL seconds.
+
+Wishlist writes handled by this worker refresh the entry straight away; writes
+handled by another worker are picked up within the TTL. A TTL of 0 disables the
+cache. At most WISHLIST_CACHE_MAX_USERS users are kept, least recently used first
+out.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class WishlistCache:
+    def __init__(self, ttl_seconds=5.0, max_users=10000, clock=time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.max_users = max_users
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # user_id -> (expires_at, frozenset of listing ids)
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    @property
+    def enabled(self):
+        return self.ttl_seconds > 0 and self.max_users > 0
+
+    def get(self, user_id):
+        """Returns the cached wishlist set, or None if it is missing or stale."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] <= self._clock():
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self._stats["hits"] += 1
+            return entry[1]
+
+    def set(self, user_id, wishlist):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._entries[user_id] = (self._clock() + self.ttl_seconds, frozenset(wishlist))
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, cached=len(self._entries))